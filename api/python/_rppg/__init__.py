@@ -0,0 +1,6 @@
+"""
+Shared rPPG signal-processing helpers used by heartrate.py and scripts/process_rppg.py.
+
+The package name starts with an underscore so Vercel does not deploy it as a
+standalone Python function; heartrate.py.config.json ships it via includeFiles.
+"""
@@ -0,0 +1,44 @@
+"""
+DSP backend selection.
+RPPG_DSP_BACKEND=scipy uses scipy, =numpy uses the pure-NumPy primitives in _rppg.npdsp, and the
+default (auto) uses scipy when it is installed and falls back to NumPy otherwise. The backend
+module is resolved on first use, so importing _rppg never pulls in scipy by itself.
+
+RPPG_DSP_PRECISION=float32 runs frame reduction, POS, filtering and the spectra in single
+precision (half the memory and bandwidth on frame stacks); the default is float64.
+"""
+
+import importlib
+import importlib.util
+import os
+
+import numpy as np
+
+_backend = None
+_dtype = None
+
+PRECISIONS = {"float64": np.float64, "float32": np.float32}
+
+
+def get_backend():
+    """선택된 DSP 백엔드 모듈(_rppg.spdsp 또는 _rppg.npdsp)을 반환합니다."""
+    global _backend
+    if _backend is None:
+        name = os.environ.get("RPPG_DSP_BACKEND", "auto")
+        if name == "auto":
+            name = "scipy" if importlib.util.find_spec("scipy") is not None else "numpy"
+        if name not in ("scipy", "numpy"):
+            raise ValueError(f"Unknown RPPG_DSP_BACKEND: {name}")
+        _backend = importlib.import_module(".spdsp" if name == "scipy" else ".npdsp", __package__)
+    return _backend
+
+
+def get_dtype():
+    """신호 경로에 쓸 부동소수점 dtype (RPPG_DSP_PRECISION, 기본 float64)."""
+    global _dtype
+    if _dtype is None:
+        name = os.environ.get("RPPG_DSP_PRECISION", "float64")
+        if name not in PRECISIONS:
+            raise ValueError(f"Unknown RPPG_DSP_PRECISION: {name}")
+        _dtype = np.dtype(PRECISIONS[name])
+    return _dtype
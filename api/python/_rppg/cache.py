@@ -0,0 +1,182 @@
+"""
+Content-addressed result cache.
+Results are keyed by a SHA-256 of the frame payload plus the processing parameters, kept in a
+bounded in-memory LRU and optionally in an on-disk tier (one JSON file per key) that evicts
+the least recently used files once it grows past a byte limit.
+
+Configured with RPPG_CACHE_ENTRIES (in-memory entries, 0 disables the cache),
+RPPG_CACHE_DIR (enables the disk tier) and RPPG_CACHE_DISK_MB.
+"""
+
+import collections
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# 알고리즘이 바뀌어 이전 결과를 무효화해야 할 때 올림
+CACHE_VERSION = 1
+
+
+def payload_key(chunks, params=None):
+    """바이트/문자열 조각들과 처리 파라미터(dict)로 SHA-256 캐시 키를 만듭니다."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"v": CACHE_VERSION, "params": params or {}}, sort_keys=True).encode())
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        # 조각 경계가 키에 반영되도록 길이를 함께 해시
+        digest.update(len(chunk).to_bytes(8, "little"))
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """메모리 LRU와 선택적 디스크 계층으로 구성된 결과 캐시입니다. 스레드 안전합니다."""
+
+    def __init__(self, max_entries=128, disk_dir=None, disk_max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def get(self, key):
+        """캐시된 결과의 사본을 반환하고, 없으면 None을 반환합니다."""
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+        result = self._disk_get(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._remember(key, result)
+        if self.disk_dir:
+            self._disk_put(key, result)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+                "maxEntries": self.max_entries,
+                "diskBytes": self._disk_bytes if self.disk_dir else None,
+            }
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                result = json.load(f)
+            os.utime(path)  # 최근 사용 시각 갱신 (LRU 축출 기준)
+            return result
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key, result):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(result).encode()
+        # 다른 프로세스가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_bytes += len(data) - previous
+            over_limit = self._disk_bytes > self.disk_max_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self):
+        """디스크 계층이 한도의 90% 이하가 될 때까지 가장 오래 사용하지 않은 파일부터 삭제합니다."""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """환경 변수로 설정된 프로세스 전역 캐시를 반환합니다. RPPG_CACHE_ENTRIES=0이면 None."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            max_entries = int(os.environ.get("RPPG_CACHE_ENTRIES", 128))
+            if max_entries <= 0:
+                return None
+            _cache = ResultCache(
+                max_entries=max_entries,
+                disk_dir=os.environ.get("RPPG_CACHE_DIR") or None,
+                disk_max_bytes=int(float(os.environ.get("RPPG_CACHE_DISK_MB", 256)) * 1024 * 1024),
+            )
+        return _cache
+
+
+def cache_stats():
+    """GET 상태 응답용 캐시 통계 (캐시가 비활성이면 {"enabled": False})."""
+    cache = get_result_cache()
+    if cache is None:
+        return {"enabled": False}
+    return dict(enabled=True, **cache.stats())
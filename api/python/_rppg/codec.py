@@ -0,0 +1,100 @@
+"""
+Compact binary frame payloads for heartrate.py.
+
+Two request formats are accepted besides JSON:
+
+- RPPG container: b"RPPG" magic, then little-endian header
+  <version:u8> <dtype:u8> <ndim:u8> <reserved:u8> <fps:f32> <shape:u32 * ndim>
+  followed by the raw C-ordered array bytes.
+- NumPy .npy (b"\\x93NUMPY" magic); fps comes from the caller (query string or header).
+
+Both are mapped with np.frombuffer, so the frame array is a zero-copy view of the body.
+"""
+
+import io
+import struct
+
+import numpy as np
+
+MAGIC = b"RPPG"
+NPY_MAGIC = b"\x93NUMPY"
+VERSION = 1
+
+# dtype 코드 <-> numpy dtype
+DTYPES = {0: np.dtype(np.uint8), 1: np.dtype('<f4'), 2: np.dtype('<f8')}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+_HEADER = struct.Struct("<4sBBBBf")
+
+
+def is_binary_payload(body):
+    """본문이 RPPG 또는 .npy 바이너리 형식인지 확인합니다."""
+    head = bytes(body[:6])
+    return head[:4] == MAGIC or head == NPY_MAGIC
+
+
+def encode_frame_payload(frames, fps):
+    """프레임 배열을 RPPG 바이너리 형식으로 인코딩합니다 (uint8, float32, float64 지원)."""
+    frames = np.ascontiguousarray(frames)
+    dtype = frames.dtype.newbyteorder('<') if frames.dtype.itemsize > 1 else frames.dtype
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unsupported frame dtype: {frames.dtype}")
+
+    header = _HEADER.pack(MAGIC, VERSION, DTYPE_CODES[dtype], frames.ndim, 0, float(fps))
+    shape = struct.pack(f"<{frames.ndim}I", *frames.shape)
+    return header + shape + frames.astype(dtype, copy=False).tobytes()
+
+
+def decode_frame_payload(body, fps=None):
+    """
+    바이너리 본문을 (frames, fps)로 디코딩합니다.
+
+    frames는 본문 버퍼를 그대로 가리키는 읽기 전용 배열입니다.
+    .npy 형식은 fps를 담지 않으므로 인자로 받은 값(없으면 30)을 사용합니다.
+    """
+    view = memoryview(body)
+
+    if bytes(view[:4]) == MAGIC:
+        if len(view) < _HEADER.size:
+            raise ValueError("Truncated RPPG header")
+        _, version, dtype_code, ndim, _, header_fps = _HEADER.unpack_from(view)
+        if version != VERSION:
+            raise ValueError(f"Unsupported RPPG payload version: {version}")
+        if dtype_code not in DTYPES:
+            raise ValueError(f"Unsupported RPPG dtype code: {dtype_code}")
+
+        shape = struct.unpack_from(f"<{ndim}I", view, _HEADER.size)
+        offset = _HEADER.size + 4 * ndim
+        dtype = DTYPES[dtype_code]
+        count = int(np.prod(shape)) if shape else 0
+        if len(view) - offset < count * dtype.itemsize:
+            raise ValueError("Truncated RPPG payload")
+
+        frames = np.frombuffer(view, dtype=dtype, count=count, offset=offset).reshape(shape)
+        return frames, (fps if fps is not None else float(header_fps))
+
+    if bytes(view[:6]) == NPY_MAGIC:
+        # 헤더 부분만 복사해서 파싱하고, 데이터는 본문 버퍼에서 바로 읽음
+        major = view[6]
+        if major == 1:
+            (header_len,), prefix = struct.unpack_from("<H", view, 8), 10
+        elif major == 2:
+            (header_len,), prefix = struct.unpack_from("<I", view, 8), 12
+        else:
+            raise ValueError(f"Unsupported .npy version: {major}")
+
+        stream = io.BytesIO(bytes(view[:prefix + header_len]))
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+        if dtype.hasobject:
+            raise ValueError("Object arrays are not accepted")
+
+        count = int(np.prod(shape)) if shape else 1
+        frames = np.frombuffer(view, dtype=dtype, count=count, offset=stream.tell())
+        frames = frames.reshape(shape[::-1]).T if fortran_order else frames.reshape(shape)
+        return frames, (fps if fps is not None else 30)
+
+    raise ValueError("Unknown binary payload format")
@@ -0,0 +1,184 @@
+"""
+Vectorized rPPG signal pipeline.
+detrend -> normalize -> POS -> Butterworth band-pass (filtfilt) -> band-limited spectrum peak,
+applied along the last axis so K recordings of equal length and fps are scored in one pass.
+"""
+
+import numpy as np
+
+from .backend import get_backend, get_dtype
+from .metrics import current as current_metrics
+from .plan import HR_BAND, get_plan, get_zoom_plan
+
+# POS 투영 행렬 (Wang et al., "Algorithmic Principles of Remote PPG," 2017)
+POS_PROJECTION = np.array([[0, 1, -1], [-2, 1, 1]], dtype=np.float64)
+
+# 대역 SNR에서 신호로 보는 최대 성분 주변 폭 (Hz)
+SNR_HALFWIDTH = 0.1
+
+
+def _safe_divide(a, b):
+    return np.divide(a, b, out=np.zeros(np.broadcast(a, b).shape, dtype=np.result_type(a, b)), where=b != 0)
+
+
+def rgb_from_frames(frames):
+    """
+    프레임 배열에서 (3, N) RGB 트레이스를 만듭니다.
+
+    (N, 3, H, W) 프레임 스택은 채널별 공간 평균을, (N, 3) 배열은 이미 계산된 평균으로 간주합니다.
+    평균은 프레임을 복사하지 않고 신호 경로 정밀도(get_dtype)로 바로 누적합니다.
+    """
+    frames = np.asarray(frames)
+    dtype = get_dtype()
+    if frames.ndim > 3:
+        return frames[:, :3].mean(axis=(2, 3), dtype=dtype).T
+    if frames.ndim == 3:
+        return frames[:, :3].mean(axis=2, dtype=dtype).T
+    return frames[:, :3].T.astype(dtype, copy=False)
+
+
+def normalize_traces(rgb):
+    """(..., 3, N) RGB 트레이스를 마지막 축 기준으로 디트렌딩 후 z-정규화합니다."""
+    detrended = get_backend().detrend(np.asarray(rgb, dtype=get_dtype()), axis=-1)
+    centered = detrended - detrended.mean(axis=-1, keepdims=True)
+    return _safe_divide(centered, centered.std(axis=-1, keepdims=True))
+
+
+def pos_signal(normalized):
+    """(..., 3, N) 정규화 트레이스에 POS 투영을 적용해 (..., N) 펄스 신호를 반환합니다."""
+    projected = np.einsum('pc,...cn->...pn', POS_PROJECTION.astype(normalized.dtype), normalized)
+    p0, p1 = projected[..., 0, :], projected[..., 1, :]
+    alpha = _safe_divide(p0.std(axis=-1, keepdims=True), p1.std(axis=-1, keepdims=True))
+    return p0 + alpha * p1
+
+
+def bandpass(x, fps, band=HR_BAND, order=3):
+    """마지막 축을 따라 영위상(filtfilt) 버터워스 대역 통과 필터를 적용합니다. 필터 설계는 캐시된 플랜을 사용합니다."""
+    return get_plan(fps, np.shape(x)[-1], band, order).filtfilt(x)
+
+
+def _vertex_offset(y0, y1, y2):
+    """세 점(-1, 0, +1)을 지나는 포물선 꼭짓점의 위치 (-0.5..0.5). 위로 볼록하지 않으면 0."""
+    y0, y1, y2 = (np.asarray(y, dtype=np.float64) for y in (y0, y1, y2))
+    curvature = y0 - 2 * y1 + y2
+    offset = np.divide(0.5 * (y0 - y2), curvature, out=np.zeros(np.shape(curvature)), where=curvature < 0)
+    return np.clip(offset, -0.5, 0.5)
+
+
+def band_power(x, fps, band=HR_BAND):
+    """
+    마지막 축의 심박 대역 세밀 스펙트럼을 계산해 (ZoomPlan, 파워 (..., F))를 반환합니다.
+    대역에 격자 주파수가 없으면 파워는 None입니다.
+    """
+    zoom = get_zoom_plan(fps, np.shape(x)[-1], band)
+    if not len(zoom.freqs):
+        return zoom, None
+    return zoom, zoom.power(x)
+
+
+def _peak_frequency(zoom, power):
+    """세밀 스펙트럼 파워에서 (보정된 최대 주파수, 신뢰도)를 구합니다."""
+    magnitude = np.sqrt(power)
+    idx = np.argmax(magnitude, axis=-1)
+    peak = np.take_along_axis(magnitude, idx[..., None], axis=-1)[..., 0]
+
+    # 최대 격자점과 이웃 두 점의 포물선 꼭짓점으로 격자 간격보다 세밀하게 보정 (대역 끝은 보정 없음)
+    inner = (idx > 0) & (idx < len(zoom.freqs) - 1)
+    at = np.clip(idx[..., None] + np.array([-1, 0, 1]), 0, len(zoom.freqs) - 1)
+    y0, y1, y2 = np.moveaxis(np.take_along_axis(magnitude, at, axis=-1), -1, 0)
+    freq = zoom.freqs[idx] + zoom.step * np.where(inner, _vertex_offset(y0, y1, y2), 0.0)
+
+    # 격자 위 합을 rFFT 빈 간격 기준 합으로 환산해 기존 신뢰도(최대/대역 합)와 같은 척도를 유지
+    confidence = _safe_divide(peak, magnitude.sum(axis=-1) * (zoom.step / zoom.bin_width))
+    return freq, np.minimum(confidence, 1.0)
+
+
+def dominant_frequency(x, fps, band=HR_BAND):
+    """
+    마지막 축의 심박 대역 세밀 스펙트럼에서 최대 성분의 주파수(Hz)와 신뢰도(최대/대역 합)를 반환합니다.
+    주파수는 ZOOM_STEP 격자에서 포물선 보간으로 보정되므로 짧은 녹화에서도 rFFT 빈 간격(fps/N)보다 세밀합니다.
+    대역에 주파수가 없으면 (None, None)을 반환합니다.
+    """
+    zoom, power = band_power(x, fps, band)
+    if power is None:
+        return None, None
+    return _peak_frequency(zoom, power)
+
+
+def refine_peaks(x, peaks):
+    """
+    정수 피크 위치를 이웃 세 샘플에 맞춘 포물선의 꼭짓점으로 보정한 소수 인덱스를 반환합니다.
+    샘플 간격보다 세밀한 피크 시각을 얻기 위한 것으로, 양 끝 샘플이나 볼록하지 않은 피크는 그대로 둡니다.
+    """
+    x = np.asarray(x)
+    peaks = np.asarray(peaks, dtype=np.intp)
+    positions = peaks.astype(np.float64)
+    inner = (peaks > 0) & (peaks < len(x) - 1)
+    k = peaks[inner]
+    positions[inner] += _vertex_offset(x[k - 1], x[k], x[k + 1])
+    return positions
+
+
+def band_snr(x, fps, band=HR_BAND, halfwidth=SNR_HALFWIDTH):
+    """
+    마지막 축의 대역 내 스펙트럼 SNR(dB)을 계산합니다 (de Haan & Jeanne, 2013).
+    최대 성분 주변 ±halfwidth Hz와 2차 고조파 주변 ±2·halfwidth Hz의 파워를 신호로, 대역의 나머지를 잡음으로 봅니다.
+    창이 짧아 주파수 해상도가 낮으면 폭을 1.5 빈 이상으로 넓힙니다. 대역에 주파수가 없으면 None을 반환합니다.
+    """
+    zoom, power = band_power(x, fps, band)
+    if power is None:
+        return None
+    return _snr_db(zoom, power, halfwidth)
+
+
+def _snr_db(zoom, power, halfwidth):
+    freqs = zoom.freqs
+    f0 = freqs[np.argmax(power, axis=-1)][..., None]
+    width = max(halfwidth, 1.5 * zoom.bin_width)
+    signal_mask = (np.abs(freqs - f0) <= width) | (np.abs(freqs - 2 * f0) <= 2 * width)
+
+    signal = np.where(signal_mask, power, 0.0).sum(axis=-1)
+    noise = np.where(signal_mask, 0.0, power).sum(axis=-1)
+    ratio = np.divide(signal, noise, out=np.full(np.shape(signal), np.inf), where=noise > 0)
+    with np.errstate(divide="ignore"):
+        return 10 * np.log10(ratio)
+
+
+def estimate_heart_rate_batch(rgb, fps, band=HR_BAND):
+    """
+    (K, 3, N) RGB 트레이스 묶음의 심박수를 한 번에 추정합니다.
+
+    반환값은 heartRate (K,), confidence (K,), 대역 SNR(dB) snr (K,), 그리고 이후 피크 검출에 쓸 pos (K, N) 배열을 담은 dict이며,
+    심박수는 대역 제한 세밀 스펙트럼의 보정된 최대값이며, 대역에 유효한 주파수가 없으면 heartRate가 None입니다.
+    """
+    metrics = current_metrics()
+    rgb = np.asarray(rgb, dtype=get_dtype())
+    with metrics.stage("pos"):
+        pulse = pos_signal(normalize_traces(rgb))
+    with metrics.stage("filter"):
+        filtered = bandpass(pulse, fps, band)
+    with metrics.stage("fft"):
+        zoom, power = band_power(filtered, fps, band)
+        if power is None:
+            freq = confidence = snr = None
+        else:
+            freq, confidence = _peak_frequency(zoom, power)
+            snr = _snr_db(zoom, power, SNR_HALFWIDTH)
+
+    return {
+        "heartRate": None if freq is None else freq * 60,
+        "confidence": confidence,
+        "snr": snr,
+        "pos": pulse,
+    }
+
+
+def estimate_heart_rate(rgb, fps, band=HR_BAND):
+    """(3, N) RGB 트레이스 하나의 심박수를 추정합니다. estimate_heart_rate_batch의 단일 세션 버전입니다."""
+    batch = estimate_heart_rate_batch(np.asarray(rgb)[None], fps, band)
+    return {
+        "heartRate": None if batch["heartRate"] is None else float(batch["heartRate"][0]),
+        "confidence": None if batch["confidence"] is None else float(batch["confidence"][0]),
+        "snr": None if batch["snr"] is None else float(batch["snr"][0]),
+        "pos": batch["pos"][0],
+    }
@@ -0,0 +1,121 @@
+"""
+Frequency-domain HRV directly on unevenly spaced RR series.
+Lomb-Scargle periodogram evaluated on a fixed LF/HF frequency grid, so there is no spline
+interpolation or resampling step. Sessions of different lengths are zero-padded and masked,
+which lets thousands of stored RR series be rescored in a few array operations.
+"""
+
+import numpy as np
+
+from .plan import HF_BAND, LF_BAND
+
+# LF(0.04-0.15 Hz)와 HF(0.15-0.4 Hz)를 덮는 등간격 고정 주파수 격자 (0.005 Hz 간격, 대역 경계 포함)
+LOMB_FREQS = np.linspace(LF_BAND[0], HF_BAND[1], 73)
+
+# 한 번에 처리할 세션 수 (세션 x 주파수 x 샘플 임시 배열 크기 제한)
+BATCH_CHUNK = 128
+
+MIN_INTERVALS = 4
+
+
+def pad_rr_series(rr_list_ms):
+    """
+    세션별 RR 간격(ms) 목록을 (K, M) 배열로 채우고 시각(초), 평균 제거 RR(초), 유효 마스크를 반환합니다.
+    시각은 각 RR 간격이 시작하는 박동 시점(첫 박동 = 0)입니다.
+    """
+    lengths = np.array([len(rr) for rr in rr_list_ms], dtype=np.intp)
+    width = max(1, int(lengths.max())) if len(lengths) else 1
+    mask = np.arange(width)[None, :] < lengths[:, None]
+
+    rr = np.zeros((len(rr_list_ms), width))
+    for k, series in enumerate(rr_list_ms):
+        rr[k, :len(series)] = np.asarray(series, dtype=np.float64) / 1000.0
+
+    t = np.cumsum(rr, axis=1) - rr
+    counts = np.maximum(lengths, 1)[:, None]
+    x = np.where(mask, rr - rr.sum(axis=1, keepdims=True) / counts, 0.0)
+    return t, x, mask
+
+
+def lomb_scargle_psd(t, x, mask, freqs=LOMB_FREQS):
+    """
+    (K, M) 시각/값/마스크에 대해 (K, F) 단측 PSD(s^2/Hz)를 계산합니다.
+    고전 Lomb-Scargle 파워를 2·P·T/N으로 스케일해 균일 샘플링에서 Welch/주기도 밀도와 같은 단위가 됩니다.
+    """
+    # 격자가 등간격이므로 e^{i w_f t} = e^{i w_0 t} (e^{i dw t})^f 를 누적곱으로 구해 삼각함수 호출을 줄이고,
+    # tau 이동과 제곱합은 삼각 항등식으로 (K, F) 합에서 구함
+    freqs = np.asarray(freqs, dtype=np.float64)
+    w = mask.astype(np.float64)
+    steps = np.empty((len(t), len(freqs), t.shape[1]), dtype=np.complex128)
+    steps[:, 0] = np.exp(2j * np.pi * freqs[0] * t) * w
+    if len(freqs) > 1:
+        steps[:, 1:] = np.exp(2j * np.pi * (freqs[1] - freqs[0]) * t)[:, None, :]
+    z = np.cumprod(steps, axis=1)
+
+    n = w.sum(axis=1)[:, None]
+    z2 = np.einsum('kfm,kfm->kf', z, z)          # sum e^{2iwt} = sum cos(2wt) + i sum sin(2wt)
+    xz = np.matmul(z, x[:, :, None].astype(np.complex128))[..., 0]
+    c2, s2 = z2.real, z2.imag
+    xc, xs = xz.real, xz.imag
+
+    # 시간 이동 tau: tan(2 w tau) = s2 / c2 (sin/cos 항이 직교하도록 선택)
+    two_wtau = np.arctan2(s2, c2)
+    ct, st = np.cos(two_wtau / 2), np.sin(two_wtau / 2)
+    cc_sum, ss_sum, cs_sum = (n + c2) / 2, (n - c2) / 2, s2 / 2
+
+    xc_tau = ct * xc + st * xs
+    xs_tau = ct * xs - st * xc
+    cc = ct ** 2 * cc_sum + 2 * ct * st * cs_sum + st ** 2 * ss_sum
+    ss = ct ** 2 * ss_sum - 2 * ct * st * cs_sum + st ** 2 * cc_sum
+    power = 0.5 * (np.divide(xc_tau ** 2, cc, out=np.zeros_like(cc), where=cc > 0)
+                   + np.divide(xs_tau ** 2, ss, out=np.zeros_like(ss), where=ss > 0))
+
+    n = n[:, 0]
+    duration = np.where(mask, t, 0).max(axis=1) - t[:, 0]
+    scale = np.divide(2 * duration, n, out=np.zeros(len(n)), where=n > 0)
+    return power * scale[:, None]
+
+
+def _band_power(psd, freqs, band_mask):
+    f = freqs[band_mask]
+    p = psd[:, band_mask]
+    return ((p[:, 1:] + p[:, :-1]) * np.diff(f) / 2).sum(axis=1)
+
+
+def frequency_domain_hrv_batch(rr_list_ms, freqs=LOMB_FREQS):
+    """
+    여러 세션의 RR 간격(ms)으로 LF, HF 파워와 LF/HF 비율을 한 번에 계산합니다.
+    반환값은 lf, hf, lfHfRatio (K,) 배열을 담은 dict이며, 간격이 MIN_INTERVALS개 미만이거나
+    HF 파워가 0 이하인 세션은 NaN입니다.
+    """
+    freqs = np.asarray(freqs)
+    lf_mask = (freqs >= LF_BAND[0]) & (freqs <= LF_BAND[1])
+    hf_mask = (freqs >= HF_BAND[0]) & (freqs <= HF_BAND[1])
+
+    lf = np.full(len(rr_list_ms), np.nan)
+    hf = np.full(len(rr_list_ms), np.nan)
+    for start in range(0, len(rr_list_ms), BATCH_CHUNK):
+        chunk = rr_list_ms[start:start + BATCH_CHUNK]
+        t, x, mask = pad_rr_series(chunk)
+        psd = lomb_scargle_psd(t, x, mask, freqs)
+        lf[start:start + len(chunk)] = _band_power(psd, freqs, lf_mask)
+        hf[start:start + len(chunk)] = _band_power(psd, freqs, hf_mask)
+
+    lengths = np.array([len(rr) for rr in rr_list_ms])
+    valid = (lengths >= MIN_INTERVALS) & (hf > 0)
+    lf[~valid] = np.nan
+    hf[~valid] = np.nan
+    ratio = np.divide(lf, hf, out=np.full(len(lf), np.nan), where=valid)
+    return {"lf": lf, "hf": hf, "lfHfRatio": ratio}
+
+
+def frequency_domain_hrv(rr_intervals_ms):
+    """RR 간격(ms) 한 세션의 (lf, hf, lf/hf)를 반환합니다. 계산할 수 없으면 예외를 발생시킵니다."""
+    if len(rr_intervals_ms) < MIN_INTERVALS:
+        raise ValueError(f"Not enough data points for HRV frequency analysis: {len(rr_intervals_ms)} points")
+
+    result = frequency_domain_hrv_batch([rr_intervals_ms])
+    hf_power = result["hf"][0]
+    if not hf_power > 0:
+        raise ValueError(f"Invalid HF power: {hf_power}")
+    return float(result["lf"][0]), float(hf_power), float(result["lfHfRatio"][0])
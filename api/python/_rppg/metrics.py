@@ -0,0 +1,145 @@
+"""
+Per-stage timing and counters for rPPG requests.
+
+Code marks stages with `current().stage(name)` and counters with `current().count(name, n)`.
+Outside a `collect()` block the active collector is a no-op whose stage() returns a shared
+null context, so instrumentation costs one attribute lookup per call when disabled.
+
+The active collector lives in a ContextVar, so overlapping requests on different threads
+(the threaded server, concurrent callers) each see their own. Executor threads do not
+inherit context; work submitted to a thread pool is wrapped with `bind()` so it reports
+into the request that started it.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+
+# 결과 JSON에 metrics 객체로 넣거나(result), stderr에 JSON-lines로 내보내거나(stderr), 둘 다(both)
+METRICS_MODES = ("result", "stderr", "both")
+
+
+class Metrics:
+    """단계별 wall/CPU 시간(스레드 CPU 합계)과 카운터를 모읍니다. 여러 스레드에서 동시에 기록해도 안전합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            with self._lock:
+                entry = self.stages.setdefault(name, [0.0, 0.0, 0])
+                entry[0] += wall
+                entry[1] += cpu
+                entry[2] += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        with self._lock:
+            return {
+                "stages": {
+                    name: {"wallMs": round(wall * 1000, 3), "cpuMs": round(cpu * 1000, 3), "calls": calls}
+                    for name, (wall, cpu, calls) in self.stages.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+
+class _NullMetrics:
+    """비활성 상태의 수집기. 모든 기록이 아무 일도 하지 않습니다."""
+
+    _context = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def count(self, name, n=1):
+        pass
+
+
+NULL_METRICS = _NullMetrics()
+_active = contextvars.ContextVar("rppg_metrics", default=NULL_METRICS)
+
+
+def current():
+    """현재 컨텍스트의 활성 수집기 (collect() 밖에서는 NULL_METRICS)."""
+    return _active.get()
+
+
+def bind(fn):
+    """
+    fn을 현재 수집기에 묶어 반환합니다. 스레드 풀 작업은 제출한 스레드의 컨텍스트를 물려받지 않으므로
+    submit/map 전에 감싸야 요청의 지표로 기록됩니다. 비활성이면 fn을 그대로 반환합니다.
+    """
+    collector = current()
+    if collector is NULL_METRICS:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _active.set(collector)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active.reset(token)
+
+    return run
+
+
+def metrics_mode(requested=None):
+    """
+    요청 값(True/"result"/"stderr"/"both") 또는 RPPG_METRICS 환경 변수로 출력 방식을 정합니다.
+    비활성이면 None을 반환합니다.
+    """
+    if requested is None or requested is False:
+        requested = os.environ.get("RPPG_METRICS") or None
+    if requested is True or requested == "1":
+        requested = "result"
+    if requested is None:
+        return None
+    if requested not in METRICS_MODES:
+        raise ValueError(f"Unknown metrics mode: {requested}")
+    return requested
+
+
+@contextlib.contextmanager
+def collect(mode):
+    """mode가 있으면 새 Metrics를 활성화하고 반환하며, 없으면 NULL_METRICS를 그대로 사용합니다."""
+    if mode is None:
+        yield NULL_METRICS
+        return
+
+    metrics = Metrics()
+    token = _active.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _active.reset(token)
+
+
+def publish(result, metrics, mode, **fields):
+    """수집한 지표를 결과 dict의 metrics 필드 및/또는 stderr JSON-lines 한 줄로 내보냅니다."""
+    if mode is None:
+        return result
+
+    report = metrics.report()
+    if mode in ("result", "both") and isinstance(result, dict):
+        result["metrics"] = report
+    if mode in ("stderr", "both"):
+        print(json.dumps(dict(event="rppg.metrics", **fields, **report)), file=sys.stderr, flush=True)
+    return result
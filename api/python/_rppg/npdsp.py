@@ -0,0 +1,319 @@
+"""
+Pure-NumPy implementations of the few scipy primitives the rPPG pipeline uses.
+detrend, Butterworth band-pass design, sosfilt/sosfilt_zi, Welch PSD, find_peaks,
+trapezoid and not-a-knot cubic interpolation, written to match scipy.signal,
+scipy.integrate and scipy.interpolate numerically so deployments can drop scipy.
+"""
+
+import functools
+
+import numpy as np
+
+
+def _as_float(x):
+    """float32는 그대로, 나머지는 float64 배열로 변환합니다 (scipy와 같은 출력 dtype)."""
+    x = np.asarray(x)
+    return x if x.dtype == np.float32 else x.astype(np.float64, copy=False)
+
+
+def detrend(x, axis=-1):
+    """마지막 축(axis)을 따라 최소제곱 직선을 뺍니다 (scipy.signal.detrend type='linear')."""
+    x = np.moveaxis(_as_float(x), axis, -1)
+    n = x.shape[-1]
+    if n < 2:
+        return np.moveaxis(x - x.mean(axis=-1, keepdims=True), -1, axis)
+
+    t = np.arange(n, dtype=x.dtype)
+    t -= t.mean()
+    mean = x.mean(axis=-1, keepdims=True)
+    slope = (x @ t)[..., None] / (t @ t)
+    return np.moveaxis(x - mean - slope * t, -1, axis)
+
+
+def butter_bandpass(order, band, fs):
+    """
+    버터워스 대역 통과 필터를 2차 섹션(SOS) 계수로 설계합니다.
+    scipy.signal.butter(order, band, btype='band', output='sos', fs=fs)와 같은 전달 함수입니다.
+    """
+    # 아날로그 원형 극점 (단위 차단 주파수)
+    k = np.arange(-order + 1, order, 2)
+    p_lp = -np.exp(1j * np.pi * k / (2 * order))
+
+    # 양선형 변환 전 주파수 사전 왜곡 (정규화 fs=2 기준)
+    wn = np.asarray(band, dtype=np.float64) / (fs / 2)
+    warped = 4.0 * np.tan(np.pi * wn / 2.0)
+    bw = warped[1] - warped[0]
+    wo = np.sqrt(warped[0] * warped[1])
+
+    # 저역 -> 대역 통과 변환: 극점 2N개, 원점 영점 N개
+    half = p_lp * bw / 2
+    root = np.sqrt(half ** 2 - wo ** 2 + 0j)
+    p_bp = np.concatenate([half + root, half - root])
+    gain = bw ** order
+
+    # 양선형 변환 (fs2 = 4): 원점 영점 -> z=1, 무한대 영점 -> z=-1
+    fs2 = 4.0
+    p_z = (fs2 + p_bp) / (fs2 - p_bp)
+    gain = gain * np.real(fs2 ** order / np.prod(fs2 - p_bp))
+
+    # 켤레 복소 극점 쌍, 남은 실수 극점은 둘씩 묶어 섹션 구성 (영점은 섹션마다 +1, -1)
+    complex_poles = p_z[np.imag(p_z) > 1e-12]
+    real_poles = np.sort(np.real(p_z[np.abs(np.imag(p_z)) <= 1e-12]))
+    pairs = [(p, np.conj(p)) for p in complex_poles]
+    pairs += [(real_poles[i], real_poles[i + 1]) for i in range(0, len(real_poles), 2)]
+
+    sos = np.zeros((order, 6))
+    for s, (p1, p2) in enumerate(pairs):
+        sos[s, :3] = [1.0, 0.0, -1.0]
+        sos[s, 3:] = np.real(np.poly([p1, p2]))
+    sos[0, :3] *= gain
+    return sos
+
+
+def _lfilter_zi(b, a):
+    """2차 섹션 하나의 단위 스텝 정상 상태 (scipy.signal.lfilter_zi)."""
+    b = b / a[0]
+    a = a / a[0]
+    companion = np.array([[-a[1], -a[2]], [1.0, 0.0]])
+    return np.linalg.solve(np.eye(2) - companion.T, b[1:] - a[1:] * b[0])
+
+
+def sosfilt_zi(sos):
+    """단위 스텝 입력에 대한 섹션별 정상 상태 (n_sections, 2)를 반환합니다 (scipy.signal.sosfilt_zi)."""
+    zi = np.empty((len(sos), 2))
+    scale = 1.0
+    for s, section in enumerate(sos):
+        b, a = section[:3], section[3:]
+        zi[s] = scale * _lfilter_zi(b, a)
+        scale *= b.sum() / a.sum()
+    return zi
+
+
+# 블록 필터링의 블록 길이 (샘플). 블록마다 행렬곱 두 번으로 모든 행을 처리
+SOSFILT_BLOCK = 128
+
+
+def _state_space(sos):
+    """
+    SOS 직렬 연결을 하나의 상태 공간 (A, B, C, D)로 합칩니다.
+    상태 벡터는 섹션별 직접형 II 전치 상태 (z0, z1)를 이어 붙인 것이라 scipy의 zi/zf와 같은 배치입니다.
+    """
+    a_mat, b_vec, c_vec, d = np.zeros((0, 0)), np.zeros(0), np.zeros(0), 1.0
+    for section in np.asarray(sos, dtype=np.float64):
+        b0, b1, b2, a0, a1, a2 = section / section[3]
+        a_s = np.array([[-a1, 1.0], [-a2, 0.0]])
+        b_s = np.array([b1 - a1 * b0, b2 - a2 * b0])
+        c_s = np.array([1.0, 0.0])
+        n = len(b_vec)
+        a_new = np.zeros((n + 2, n + 2))
+        a_new[:n, :n] = a_mat
+        a_new[n:, :n] = np.outer(b_s, c_vec)
+        a_new[n:, n:] = a_s
+        a_mat, b_vec = a_new, np.concatenate([b_vec, b_s * d])
+        c_vec, d = np.concatenate([b0 * c_vec, c_s]), b0 * d
+    return a_mat, b_vec, c_vec, d
+
+
+@functools.lru_cache(maxsize=32)
+def _block_matrices(sos_bytes, n_sections, length):
+    """
+    길이 length 블록의 (입력→출력, 상태→출력, 입력→다음 상태, 상태→다음 상태) 행렬.
+    y = x @ h.T + z @ obs.T, z' = x @ ctrl.T + z @ a_len.T (행마다 한 줄).
+    """
+    sos = np.frombuffer(sos_bytes, dtype=np.float64).reshape(n_sections, 6)
+    a_mat, b_vec, c_vec, d = _state_space(sos)
+
+    # obs[k] = C A^k, impulse[k] = C A^(k-1) B (k >= 1), ctrl[:, j] = A^(length-1-j) B
+    obs = np.empty((length, len(b_vec)))
+    powers_b = np.empty((length, len(b_vec)))
+    row, col = c_vec.copy(), b_vec.copy()
+    for k in range(length):
+        obs[k] = row
+        powers_b[k] = col
+        row, col = row @ a_mat, a_mat @ col
+    impulse = np.concatenate([[d], obs[:-1] @ b_vec])
+
+    lags = np.arange(length)[:, None] - np.arange(length)[None, :]
+    h = np.where(lags >= 0, impulse[np.clip(lags, 0, None)], 0.0)
+    ctrl = powers_b[::-1].T
+    a_len = np.linalg.matrix_power(a_mat, length)
+    return h, obs, ctrl, a_len
+
+
+def sosfilt(sos, x, zi=None):
+    """
+    마지막 축을 따라 SOS 필터를 적용합니다 (직접형 II 전치와 같은 상태).
+    zi는 (n_sections, ..., 2) 형태이며, 주어지면 (y, zf)를 반환합니다 (scipy.signal.sosfilt와 동일).
+    섹션 직렬 연결을 상태 공간으로 합쳐 SOSFILT_BLOCK 샘플 블록마다 모든 행을 행렬곱으로 처리하므로
+    파이썬 반복은 블록 수(N / SOSFILT_BLOCK)만큼입니다.
+    """
+    x = _as_float(x)
+    shape = x.shape
+    rows = x.reshape(-1, shape[-1]).astype(np.float64, copy=False)
+    sos = np.ascontiguousarray(sos, dtype=np.float64)
+    n_sections, n, key = len(sos), shape[-1], sos.tobytes()
+
+    if zi is None:
+        state = np.zeros((len(rows), 2 * n_sections))
+    else:
+        zi = np.array(zi, dtype=np.float64).reshape(n_sections, len(rows), 2)
+        state = zi.transpose(1, 0, 2).reshape(len(rows), 2 * n_sections)
+
+    y = np.empty(rows.shape, dtype=x.dtype)
+    for start in range(0, n, SOSFILT_BLOCK):
+        block = rows[:, start:start + SOSFILT_BLOCK]
+        h, obs, ctrl, a_len = _block_matrices(key, n_sections, block.shape[1])
+        y[:, start:start + block.shape[1]] = block @ h.T + state @ obs.T
+        state = block @ ctrl.T + state @ a_len.T
+
+    y = y.reshape(shape)
+    if zi is None:
+        return y
+    zf = state.reshape(len(rows), n_sections, 2).transpose(1, 0, 2)
+    return y, zf.reshape((n_sections,) + shape[:-1] + (2,))
+
+
+def hann(n):
+    """주기(periodic) 한 창 (scipy.signal.get_window('hann', n))."""
+    return 0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(n) / n)
+
+
+def welch(x, fs, window, nperseg):
+    """
+    50% 겹침, 구간 평균 제거, 밀도 스케일의 단측 Welch PSD를 계산해 (freqs, pxx)를 반환합니다.
+    scipy.signal.welch(x, fs, window, nperseg, detrend='constant')와 같은 결과입니다.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    window = np.asarray(window, dtype=np.float64)
+    step = nperseg - nperseg // 2
+
+    n_segments = (x.shape[-1] - nperseg // 2) // step
+    segments = np.lib.stride_tricks.sliding_window_view(x, nperseg, axis=-1)[..., ::step, :][..., :n_segments, :]
+    segments = segments - segments.mean(axis=-1, keepdims=True)
+
+    spectrum = np.abs(np.fft.rfft(segments * window, axis=-1)) ** 2 / (fs * np.sum(window ** 2))
+    if nperseg % 2:
+        spectrum[..., 1:] *= 2
+    else:
+        spectrum[..., 1:-1] *= 2
+    return np.fft.rfftfreq(nperseg, d=1.0 / fs), spectrum.mean(axis=-2)
+
+
+def trapezoid(y, x=None, dx=1.0):
+    """사다리꼴 적분 (scipy.integrate.trapezoid)."""
+    y = np.asarray(y, dtype=np.float64)
+    d = np.diff(x) if x is not None else dx
+    return float(np.sum(d * (y[1:] + y[:-1]) / 2.0))
+
+
+def _local_maxima(x):
+    """평탄한 꼭대기는 가운데 인덱스를 택하는 국소 최댓값 인덱스 (scipy._local_maxima_1d)."""
+    peaks = []
+    i, last = 1, len(x) - 1
+    while i < last:
+        if x[i - 1] < x[i]:
+            ahead = i + 1
+            while ahead < last and x[ahead] == x[i]:
+                ahead += 1
+            if x[ahead] < x[i]:
+                peaks.append((i + ahead - 1) // 2)
+                i = ahead
+        i += 1
+    return np.array(peaks, dtype=np.intp)
+
+
+def _select_by_distance(x, peaks, distance):
+    """높은 피크부터 남기면서 distance 안쪽의 낮은 피크를 제거합니다."""
+    keep = np.ones(len(peaks), dtype=bool)
+    order = np.argsort(x[peaks])[::-1]
+    for idx in order:
+        if not keep[idx]:
+            continue
+        j = idx - 1
+        while j >= 0 and peaks[idx] - peaks[j] < distance:
+            keep[j] = False
+            j -= 1
+        j = idx + 1
+        while j < len(peaks) and peaks[j] - peaks[idx] < distance:
+            keep[j] = False
+            j += 1
+    return keep
+
+
+def _prominences(x, peaks):
+    """각 피크에서 더 높은 표본을 만날 때까지 양쪽 최솟값을 찾아 돌출도를 계산합니다."""
+    prominences = np.empty(len(peaks))
+    for n, peak in enumerate(peaks):
+        height = x[peak]
+
+        i, left_min = peak, height
+        while i >= 0 and x[i] <= height:
+            left_min = min(left_min, x[i])
+            i -= 1
+
+        i, right_min = peak, height
+        while i < len(x) and x[i] <= height:
+            right_min = min(right_min, x[i])
+            i += 1
+
+        prominences[n] = height - max(left_min, right_min)
+    return prominences
+
+
+def find_peaks(x, height=None, distance=None, prominence=None):
+    """
+    1차원 신호의 피크를 찾습니다. scipy.signal.find_peaks의 height(하한), distance, prominence(하한)
+    조건만 지원하며, 같은 순서(높이 -> 거리 -> 돌출도)로 적용해 (peaks, properties)를 반환합니다.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    peaks = _local_maxima(x)
+    properties = {}
+
+    if height is not None:
+        peaks = peaks[x[peaks] >= height]
+    if distance is not None and len(peaks) > 1:
+        peaks = peaks[_select_by_distance(x, peaks, max(1, np.ceil(distance)))]
+    if prominence is not None:
+        prominences = _prominences(x, peaks)
+        keep = prominences >= prominence
+        peaks = peaks[keep]
+        properties["prominences"] = prominences[keep]
+    return peaks, properties
+
+
+def cubic_interp(x, y, x_new):
+    """
+    not-a-knot 3차 스플라인으로 x_new 위치의 값을 계산합니다 (범위 밖은 끝 다항식으로 외삽).
+    scipy.interpolate.interp1d(x, y, kind='cubic', fill_value='extrapolate')와 같은 결과입니다.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n < 4:
+        raise ValueError("cubic interpolation requires at least 4 points")
+
+    h = np.diff(x)
+    delta = np.diff(y) / h
+
+    # 각 매듭점의 1차 도함수 s에 대한 연립방정식 (양 끝은 not-a-knot 조건)
+    A = np.zeros((n, n))
+    rhs = np.zeros(n)
+    for i in range(1, n - 1):
+        A[i, i - 1] = h[i]
+        A[i, i] = 2 * (h[i - 1] + h[i])
+        A[i, i + 1] = h[i - 1]
+        rhs[i] = 3 * (h[i] * delta[i - 1] + h[i - 1] * delta[i])
+
+    A[0, 0], A[0, 1] = h[1], h[0] + h[1]
+    rhs[0] = ((h[0] + 2 * (h[0] + h[1])) * h[1] * delta[0] + h[0] ** 2 * delta[1]) / (h[0] + h[1])
+    A[-1, -2], A[-1, -1] = h[-1] + h[-2], h[-2]
+    rhs[-1] = (h[-1] ** 2 * delta[-2] + (2 * (h[-1] + h[-2]) + h[-1]) * h[-2] * delta[-1]) / (h[-1] + h[-2])
+    s = np.linalg.solve(A, rhs)
+
+    # 구간별 에르미트 3차 다항식 평가
+    x_new = np.asarray(x_new, dtype=np.float64)
+    k = np.clip(np.searchsorted(x, x_new, side='right') - 1, 0, n - 2)
+    t = x_new - x[k]
+    c2 = (3 * delta[k] - 2 * s[k] - s[k + 1]) / h[k]
+    c3 = (s[k] + s[k + 1] - 2 * delta[k]) / h[k] ** 2
+    return y[k] + t * (s[k] + t * (c2 + t * c3))
@@ -0,0 +1,182 @@
+"""
+Precomputed DSP plans shared by every rPPG entry point.
+A plan holds everything that only depends on (fps, n_samples, band): SOS coefficients,
+the filtfilt edge-padding state, rFFT frequency bins and band masks, and the band-limited
+DFT kernel for the fine heart-rate spectrum. Plans live in an LRU cache, so repeat traffic
+at the same fps pays the filter design cost once.
+"""
+
+import functools
+
+import numpy as np
+
+from .backend import get_backend
+
+# 심박수 대역 (42-240 BPM)
+HR_BAND = (0.7, 4.0)
+
+# HRV 주파수 대역 (Hz)
+LF_BAND = (0.04, 0.15)
+HF_BAND = (0.15, 0.4)
+
+# 심박 대역 세밀 스펙트럼의 격자 간격 (Hz, 1.2 BPM). 최대값은 포물선 보간으로 격자보다 세밀하게 보정
+ZOOM_STEP = 0.02
+
+
+class DSPPlan:
+    """(fps, n_samples, band, order)에 대해 미리 계산된 필터/스펙트럼 설정입니다."""
+
+    def __init__(self, fps, n_samples, band=HR_BAND, order=3):
+        self.fps = float(fps)
+        self.n_samples = int(n_samples)
+        # 저속 캡처(예: 5 fps)에서는 대역 상한을 나이퀴스트 주파수의 90%로 제한
+        self.band = (band[0], min(band[1], 0.45 * self.fps))
+        self.order = order
+
+        dsp = get_backend()
+        self.sos = dsp.butter_bandpass(order, self.band, self.fps)
+        # filtfilt 가장자리 패딩 길이와 단위 스텝 초기 상태 (scipy.signal.sosfiltfilt와 동일한 기본값)
+        n_zeros = min((self.sos[:, 2] == 0).sum(), (self.sos[:, 5] == 0).sum())
+        self.padlen = min(3 * (2 * len(self.sos) + 1 - n_zeros), max(0, self.n_samples - 1))
+        self.zi = dsp.sosfilt_zi(self.sos)
+        self._coefficients = {np.dtype(np.float64): (self.sos, self.zi)}
+
+        self.freqs = np.fft.rfftfreq(self.n_samples, d=1.0 / self.fps)
+        self.band_mask = (self.freqs >= self.band[0]) & (self.freqs <= self.band[1])
+        self.band_freqs = self.freqs[self.band_mask]
+
+    def coefficients(self, dtype):
+        """dtype으로 변환한 (sos, zi). 필터가 입력 정밀도 그대로 실행되도록 dtype별로 한 번만 변환합니다."""
+        dtype = np.dtype(dtype)
+        if dtype not in self._coefficients:
+            self._coefficients[dtype] = (self.sos.astype(dtype), self.zi.astype(dtype))
+        return self._coefficients[dtype]
+
+    def filtfilt(self, x):
+        """마지막 축을 따라 영위상 SOS 필터를 적용합니다 (홀수 확장 패딩). float32 입력은 float32로 계산합니다."""
+        x = np.asarray(x)
+        if x.dtype != np.float32:
+            x = x.astype(np.float64, copy=False)
+        sos, zi = self.coefficients(x.dtype)
+        shape = x.shape
+        x2 = x.reshape(-1, shape[-1])
+        p = self.padlen
+
+        if p > 0:
+            left = 2 * x2[:, :1] - x2[:, p:0:-1]
+            right = 2 * x2[:, -1:] - x2[:, -2:-p - 2:-1]
+            ext = np.concatenate([left, x2, right], axis=1)
+        else:
+            ext = x2
+
+        sosfilt = get_backend().sosfilt
+        zi = zi[:, None, :]
+        y, _ = sosfilt(sos, ext, zi=zi * ext[:, 0][None, :, None])
+        y = y[:, ::-1]
+        y, _ = sosfilt(sos, y, zi=zi * y[:, 0][None, :, None])
+        y = y[:, ::-1]
+
+        if p > 0:
+            y = y[:, p:-p]
+        return y.reshape(shape)
+
+
+class WelchPlan:
+    """(fs, nperseg)에 대해 미리 계산된 Welch 창과 LF/HF 대역 마스크입니다."""
+
+    def __init__(self, fs, nperseg):
+        self.fs = float(fs)
+        self.nperseg = int(nperseg)
+        self.window = get_backend().hann(self.nperseg)
+        self.freqs = np.fft.rfftfreq(self.nperseg, d=1.0 / self.fs)
+        self.lf_mask = (self.freqs >= LF_BAND[0]) & (self.freqs <= LF_BAND[1])
+        self.hf_mask = (self.freqs >= HF_BAND[0]) & (self.freqs <= HF_BAND[1])
+
+    def psd(self, x):
+        """미리 만든 창으로 Welch PSD를 계산해 (freqs, pxx)를 반환합니다."""
+        return get_backend().welch(x, self.fs, self.window, self.nperseg)
+
+
+def _fast_len(n):
+    """n 이상인 가장 작은 5-smooth 정수 (FFT가 빠른 길이)."""
+    best = 1 << max(n - 1, 0).bit_length()
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            m = p35
+            while m < n:
+                m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+class ZoomPlan:
+    """
+    (fps, n_samples, band, step)에 대해 미리 계산된 대역 제한 스펙트럼 (chirp-z 변환, Bluestein)입니다.
+    대역 안의 step 간격 주파수에서만 DFT를 계산하므로 해상도가 rFFT 빈 간격(fps/N)에 묶이지 않습니다.
+    격자 F점의 DFT를 길이 L ≥ N+F-1의 FFT 합성곱으로 계산하므로 비용은 O(L log L), 보관하는 계수는 O(N+L)입니다.
+    """
+
+    def __init__(self, fps, n_samples, band=HR_BAND, step=ZOOM_STEP):
+        self.fps = float(fps)
+        self.n_samples = int(n_samples)
+        self.band = (band[0], min(band[1], 0.45 * self.fps))
+        self.step = float(step)
+        # rFFT 빈 간격. 격자 위 합을 빈 단위 합으로 환산할 때 사용
+        self.bin_width = self.fps / max(self.n_samples, 1)
+
+        n_freqs = int(np.floor((self.band[1] - self.band[0]) / self.step + 1e-9)) + 1
+        self.freqs = self.band[0] + self.step * np.arange(max(n_freqs, 0))
+
+        # X_k = Σ x_n e^{-j(a + b·k)n} = e^{-j·b·k²/2} Σ y_n h_{k-n},
+        # y_n = x_n e^{-j(a·n + b·n²/2)}, h_m = e^{j·b·m²/2}. 파워만 필요하므로 앞의 위상 인자는 생략
+        n, m = self.n_samples, len(self.freqs)
+        a = 2 * np.pi * self.band[0] / self.fps
+        b = 2 * np.pi * self.step / self.fps
+        self._fft_len = _fast_len(max(n + m - 1, 1))
+        samples = np.arange(n, dtype=np.float64)
+        pre = np.exp(-1j * (a * samples + 0.5 * b * samples * samples))
+        chirp = np.zeros(self._fft_len, dtype=np.complex128)
+        lags = np.arange(max(n, m), dtype=np.float64)
+        chirp[:m] = np.exp(0.5j * b * lags[:m] ** 2)
+        if n > 1:
+            chirp[-(n - 1):] = np.exp(0.5j * b * lags[1:n][::-1] ** 2)
+        self._tables = {np.dtype(np.complex128): (pre, np.fft.fft(chirp))}
+
+    def tables(self, dtype):
+        """복소 dtype으로 변환한 (선행 chirp, 합성곱 필터의 FFT) (dtype별로 한 번만 변환)."""
+        dtype = np.dtype(dtype)
+        if dtype not in self._tables:
+            pre, chirp_fft = self._tables[np.dtype(np.complex128)]
+            self._tables[dtype] = (pre.astype(dtype), chirp_fft.astype(dtype))
+        return self._tables[dtype]
+
+    def power(self, x):
+        """마지막 축의 대역 내 격자 주파수별 파워 |X(f)|^2 (..., F)를 계산합니다. float32 입력은 float32로 계산합니다."""
+        x = np.asarray(x)
+        real = np.float32 if x.dtype == np.float32 else np.float64
+        pre, chirp_fft = self.tables(np.complex64 if real == np.float32 else np.complex128)
+        spectrum = np.fft.fft(x.astype(real, copy=False) * pre, self._fft_len, axis=-1)
+        band = np.fft.ifft(spectrum * chirp_fft, axis=-1)[..., :len(self.freqs)]
+        return (band.real * band.real + band.imag * band.imag).astype(real, copy=False)
+
+
+@functools.lru_cache(maxsize=64)
+def get_plan(fps, n_samples, band=HR_BAND, order=3):
+    """(fps, n_samples, band, order)별 DSPPlan을 LRU 캐시에서 가져옵니다."""
+    return DSPPlan(fps, n_samples, band, order)
+
+
+@functools.lru_cache(maxsize=16)
+def get_welch_plan(fs, nperseg):
+    """(fs, nperseg)별 WelchPlan을 LRU 캐시에서 가져옵니다."""
+    return WelchPlan(fs, nperseg)
+
+
+@functools.lru_cache(maxsize=16)
+def get_zoom_plan(fps, n_samples, band=HR_BAND, step=ZOOM_STEP):
+    """(fps, n_samples, band, step)별 ZoomPlan을 LRU 캐시에서 가져옵니다."""
+    return ZoomPlan(fps, n_samples, band, step)
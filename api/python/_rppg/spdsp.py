@@ -0,0 +1,43 @@
+"""
+scipy-backed implementations with the same signatures as _rppg.npdsp.
+scipy submodules are imported when this backend is first selected, not at package import.
+"""
+
+from scipy import integrate, interpolate, signal
+
+
+def detrend(x, axis=-1):
+    return signal.detrend(x, axis=axis)
+
+
+def butter_bandpass(order, band, fs):
+    nyquist = fs / 2
+    return signal.butter(order, [band[0] / nyquist, band[1] / nyquist], btype='band', output='sos')
+
+
+def sosfilt_zi(sos):
+    return signal.sosfilt_zi(sos)
+
+
+def sosfilt(sos, x, zi=None):
+    return signal.sosfilt(sos, x, axis=-1, zi=zi)
+
+
+def hann(n):
+    return signal.get_window('hann', n)
+
+
+def welch(x, fs, window, nperseg):
+    return signal.welch(x, fs=fs, window=window, nperseg=nperseg, detrend='constant')
+
+
+def trapezoid(y, x=None, dx=1.0):
+    return integrate.trapezoid(y, x, dx=dx)
+
+
+def find_peaks(x, height=None, distance=None, prominence=None):
+    return signal.find_peaks(x, height=height, distance=distance, prominence=prominence)
+
+
+def cubic_interp(x, y, x_new):
+    return interpolate.interp1d(x, y, kind='cubic', bounds_error=False, fill_value="extrapolate")(x_new)
@@ -0,0 +1,144 @@
+"""
+Streaming heart-rate estimation.
+Keeps a ring buffer of RGB means, runs sliding-window POS with overlap-add and a causal
+SOS band-pass filter whose state carries over between chunks, so each chunk costs
+O(window) work instead of reprocessing the whole recording. Each update reads the heart rate
+from the band-limited fine spectrum of the window (see _rppg.plan.ZoomPlan).
+"""
+
+import numpy as np
+
+from .backend import get_backend
+from .dsp import POS_PROJECTION, dominant_frequency
+from .plan import HR_BAND, get_plan
+
+
+def pos_windows(windows):
+    """
+    (n_windows, window_len, 3) RGB 창 묶음에 POS를 적용해 (n_windows, window_len) 펄스 조각을 반환합니다.
+    """
+    mean = windows.mean(axis=1, keepdims=True)
+    mean[mean == 0] = 1.0
+    normalized = windows / mean
+    projected = normalized @ POS_PROJECTION.T  # (n_windows, window_len, 2)
+    s0, s1 = projected[..., 0], projected[..., 1]
+
+    std1 = s1.std(axis=1, keepdims=True)
+    alpha = np.divide(s0.std(axis=1, keepdims=True), std1, out=np.zeros_like(std1), where=std1 > 0)
+    h = s0 + alpha * s1
+    return h - h.mean(axis=1, keepdims=True)
+
+
+class StreamingHeartRateEstimator:
+    """
+    청크 단위로 RGB 평균을 받아 1초(update_seconds)마다 심박수와 신뢰도를 갱신합니다.
+
+    - POS는 pos_seconds 길이의 슬라이딩 창으로 계산되어 overlap-add로 이어 붙습니다.
+    - 대역 통과 필터는 인과(causal) SOS 필터이며 상태(zi)가 청크 사이에 유지됩니다.
+    - 스펙트럼은 최근 window_seconds 구간의 필터링된 신호에서만 계산합니다.
+    """
+
+    def __init__(self, fps, window_seconds=10.0, pos_seconds=1.6, update_seconds=1.0,
+                 min_seconds=5.0, band=HR_BAND, order=3):
+        self.fps = float(fps)
+        self.band = tuple(band)
+        self.window = max(2, int(round(window_seconds * self.fps)))
+        self.pos_len = max(2, int(round(pos_seconds * self.fps)))
+        self.update_every = max(1, int(round(update_seconds * self.fps)))
+        self.min_samples = min(self.window, max(self.pos_len, int(round(min_seconds * self.fps))))
+
+        plan = get_plan(self.fps, self.window, tuple(band), order)
+        self.sos, self._unit_zi = plan.sos, plan.zi
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros((0, 3))     # 다음 POS 창에 필요한 최근 원시 RGB (최대 pos_len - 1)
+        self._overlap = np.zeros(0)          # history 샘플에 누적된 overlap-add 부분합
+        self._zi = None
+        self._filtered = np.zeros(self.window)  # 필터링된 신호의 링 버퍼
+        self._write = 0
+        self.samples_in = 0
+        self.samples_out = 0
+        self.heart_rate = None
+        self.confidence = 0.0
+
+    def push(self, rgb):
+        """
+        (n, 3) RGB 평균 청크를 추가하고, 이 청크에서 발생한 갱신 목록을 반환합니다.
+        각 갱신은 {"time", "heartRate", "confidence"} 형태입니다.
+        """
+        rgb = np.asarray(rgb, dtype=np.float64).reshape(-1, 3)
+        self.samples_in += len(rgb)
+
+        pulse = self._pos(rgb)
+        if len(pulse) == 0:
+            return []
+
+        if self._zi is None:
+            self._zi = self._unit_zi * pulse[0]
+        filtered, self._zi = get_backend().sosfilt(self.sos, pulse, zi=self._zi)
+
+        updates = []
+        start = 0
+        while start < len(filtered):
+            # 다음 갱신 시점까지만 링 버퍼에 기록
+            until_update = self.update_every - (self.samples_out % self.update_every)
+            piece = filtered[start:start + until_update]
+            self._append(piece)
+            start += len(piece)
+
+            if self.samples_out % self.update_every == 0 and self.samples_out >= self.min_samples:
+                updates.append(self._estimate())
+        return updates
+
+    def snapshot(self):
+        """가장 최근 추정값을 반환합니다."""
+        return {
+            "heartRate": float(self.heart_rate) if self.heart_rate is not None else None,
+            "confidence": float(self.confidence),
+            "samples": self.samples_in,
+        }
+
+    def _pos(self, rgb):
+        """새 샘플을 POS 창에 넣고, 더 이상 기여할 창이 없는 확정 샘플을 반환합니다."""
+        x = np.concatenate([self._history, rgb])
+        overlap = np.concatenate([self._overlap, np.zeros(len(rgb))])
+
+        n_windows = len(x) - self.pos_len + 1
+        if n_windows <= 0:
+            self._history, self._overlap = x, overlap
+            return np.zeros(0)
+
+        windows = np.lib.stride_tricks.sliding_window_view(x, self.pos_len, axis=0)  # (n, 3, l)
+        h = pos_windows(np.swapaxes(windows, 1, 2))
+        for k in range(self.pos_len):
+            overlap[k:k + n_windows] += h[:, k]
+
+        self._history, self._overlap = x[n_windows:], overlap[n_windows:]
+        return overlap[:n_windows]
+
+    def _append(self, values):
+        n = len(values)
+        if n == 0:
+            return
+        idx = (self._write + np.arange(n)) % self.window
+        self._filtered[idx] = values
+        self._write = (self._write + n) % self.window
+        self.samples_out += n
+
+    def _estimate(self):
+        n = min(self.samples_out, self.window)
+        # 링 버퍼를 시간 순서로 펼침
+        recent = np.roll(self._filtered, -self._write)[-n:]
+
+        # 창 길이별 chirp-z 테이블(ZoomPlan)이 캐시되므로 창이 찬 뒤에는 FFT/역FFT 한 쌍(Bluestein 합성곱)으로 대역 스펙트럼 계산
+        freq, confidence = dominant_frequency(recent, self.fps, self.band)
+        if freq is not None:
+            self.heart_rate = freq * 60
+            self.confidence = confidence
+
+        return {
+            "time": self.samples_out / self.fps,
+            "heartRate": float(self.heart_rate) if self.heart_rate is not None else None,
+            "confidence": float(self.confidence),
+        }
@@ -24,8 +24,14 @@ if [ -n "$PYTHON_CMD" ]; then
   # 주요 패키지 직접 설치 (버전 고정, 의존성 최소화)
   $PYTHON_CMD -m pip install $PIP_OPTIONS --target . werkzeug==1.0.1
   $PYTHON_CMD -m pip install $PIP_OPTIONS --target . numpy==1.21.0
-  $PYTHON_CMD -m pip install $PIP_OPTIONS --target . opencv-python-headless==4.5.0
-  $PYTHON_CMD -m pip install $PIP_OPTIONS --target . scipy==1.7.0
+  # OpenCV도 선택 사항 (heartrate.py는 GET 상태 응답의 버전 표시에만 사용, 없으면 null)
+  if [ "$RPPG_WITH_OPENCV" = "1" ]; then
+    $PYTHON_CMD -m pip install $PIP_OPTIONS --target . opencv-python-headless==4.5.0
+  fi
+  # scipy는 선택 사항 (없으면 _rppg가 순수 NumPy DSP 백엔드를 사용)
+  if [ "$RPPG_DSP_BACKEND" = "scipy" ]; then
+    $PYTHON_CMD -m pip install $PIP_OPTIONS --target . scipy==1.7.0
+  fi
   
   # 설치 패키지 크기 확인
   echo "📊 설치된 패키지 크기 확인:"
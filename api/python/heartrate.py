@@ -5,114 +5,230 @@ import sys
 import base64
 import time
 
-# Vercel 무료 티어의 패키지 크기 제한 대응을 위해 최적화된 임포트
-try:
-    import numpy as np
-except ImportError:
-    print("WARNING: numpy import failed, falling back to minimal mode")
-    np = None
-
-try:
-    import cv2
-except ImportError:
-    print("WARNING: cv2 import failed, falling back to minimal mode")
-    cv2 = None
-
-try:
-    from scipy import signal
-    from scipy.signal import detrend
-except ImportError:
-    print("WARNING: scipy import failed, falling back to minimal mode")
-    signal = None
-    detrend = None
+import numpy as np
+from urllib.parse import parse_qs, urlparse
+
+from _rppg.backend import get_backend, get_dtype
+from _rppg.cache import cache_stats, get_result_cache, payload_key
+from _rppg.codec import decode_frame_payload, is_binary_payload
+from _rppg.dsp import estimate_heart_rate, estimate_heart_rate_batch, rgb_from_frames
+from _rppg.hrv import frequency_domain_hrv_batch
+from _rppg.metrics import collect, current as current_metrics, metrics_mode, publish
+
+MIN_FRAMES = 10
+
+
+def opencv_version():
+    """
+    상태 응답용 OpenCV 버전. POST 분석 경로는 cv2를 쓰지 않으므로 콜드 스타트 시간을 줄이기 위해
+    GET 요청에서만 지연 임포트합니다.
+    """
+    try:
+        import cv2
+    except ImportError:
+        return None
+    return cv2.__version__
+
+
+def build_result(heart_rate, confidence):
+    """심박수 추정값을 API 응답 형식으로 변환합니다."""
+    if heart_rate is None:
+        return {
+            "error": "No valid frequency components found",
+            "heartRate": 0,
+            "confidence": 0,
+            "processed": False
+        }
+    return {
+        "heartRate": float(heart_rate),
+        "confidence": float(confidence),
+        "processed": True
+    }
+
+
+def analyze_frames_array(frames, fps):
+    """(N, 3, H, W) 프레임 또는 (N, 3) RGB 평균 배열을 분석합니다."""
+    if len(frames) < MIN_FRAMES:
+        raise ValueError(f"Not enough frames for analysis (minimum {MIN_FRAMES})")
+
+    # RGB 신호 추출 후 디트렌딩 → 정규화 → POS → 대역 통과 필터 → FFT
+    metrics = current_metrics()
+    metrics.count("frames", len(frames))
+    if frames.ndim > 2:
+        metrics.count("pixelsProcessed", frames[:, 0].size)
+    with metrics.stage("reduce"):
+        rgb = rgb_from_frames(frames)
+    estimate = estimate_heart_rate(rgb, fps)
+    return build_result(estimate["heartRate"], estimate["confidence"])
+
+
+def analyze_frames_payload(data):
+    """단일 세션 요청({"frames": [...], "fps": 30})을 분석합니다."""
+    # 프레임 데이터 처리 (예시: 배열 형태의 RGB 값 가정)
+    with current_metrics().stage("decode"):
+        frames = np.array(data['frames'], dtype=get_dtype())
+    fps = data.get('fps', 30)  # 기본 FPS = 30
+    return analyze_frames_array(frames, fps)
+
+
+def analyze_binary_payload(body, fps=None):
+    """
+    바이너리 요청(RPPG 헤더 또는 .npy)을 분석합니다.
+    프레임은 np.frombuffer로 본문을 그대로 참조하므로 JSON 파싱과 float64 변환 비용이 없습니다.
+    """
+    with current_metrics().stage("decode"):
+        frames, fps = decode_frame_payload(body, fps)
+    return analyze_frames_array(frames, fps)
+
+
+def analyze_batch_payload(data):
+    """
+    여러 세션을 한 번에 분석합니다.
+
+    {"traces": [[r[], g[], b[]], ...], "fps": 30} 형태의 (K, 3, N) 배열은 한 번의 벡터 연산으로,
+    {"sessions": [{"frames": [...], "fps": 30}, ...]} 형태는 (fps, 길이)가 같은 세션끼리 묶어 처리합니다.
+    결과는 입력 순서대로 {"results": [...]}에 담깁니다.
+    """
+    if 'traces' in data:
+        traces = np.asarray(data['traces'], dtype=get_dtype())
+        if traces.ndim != 3 or traces.shape[1] != 3:
+            raise ValueError("traces must have shape (sessions, 3, samples)")
+        groups = {(data.get('fps', 30), traces.shape[2]): list(range(len(traces)))}
+        rgb_list = list(traces)
+    else:
+        rgb_list = []
+        groups = {}
+        for i, session in enumerate(data['sessions']):
+            rgb_list.append(rgb_from_frames(np.array(session['frames'], dtype=get_dtype())))
+            key = (session.get('fps', 30), rgb_list[-1].shape[1])
+            groups.setdefault(key, []).append(i)
+
+    results = [None] * len(rgb_list)
+    for (fps, n_samples), indices in groups.items():
+        if n_samples < MIN_FRAMES:
+            for i in indices:
+                results[i] = {"error": f"Not enough frames for analysis (minimum {MIN_FRAMES})", "processed": False}
+            continue
+
+        batch = estimate_heart_rate_batch(np.stack([rgb_list[i] for i in indices]), fps)
+        for k, i in enumerate(indices):
+            if batch["heartRate"] is None:
+                results[i] = build_result(None, None)
+            else:
+                results[i] = build_result(batch["heartRate"][k], batch["confidence"][k])
+
+    return {"results": results, "processed": True}
+
+
+def analyze_rr_payload(data):
+    """
+    저장된 RR 간격으로 주파수 영역 HRV를 일괄 재계산합니다.
+
+    {"rrIntervals": [[ms, ...], ...]} 형태이며, 보간 없이 Lomb-Scargle로 모든 세션을 한 번에 처리합니다.
+    계산할 수 없는 세션은 값이 null입니다.
+    """
+    rr_list = [np.asarray(rr, dtype=np.float64) for rr in data['rrIntervals']]
+    with current_metrics().stage("hrv"):
+        batch = frequency_domain_hrv_batch(rr_list)
+
+    def value(x):
+        return None if np.isnan(x) else float(x)
+
+    results = [
+        {"lf": value(lf), "hf": value(hf), "lfHfRatio": value(ratio)}
+        for lf, hf, ratio in zip(batch["lf"], batch["hf"], batch["lfHfRatio"])
+    ]
+    return {"results": results, "processed": True}
+
+
+def analyze_payload(data):
+    """요청 본문 형식에 따라 단일/배치 분석을 수행합니다."""
+    if 'rrIntervals' in data:
+        return analyze_rr_payload(data)
+    if 'traces' in data or 'sessions' in data:
+        return analyze_batch_payload(data)
+    if 'frames' not in data:
+        raise ValueError("No frames data provided")
+    return analyze_frames_payload(data)
+
+
+def analyze_body(post_data, fps=None):
+    """요청 본문(JSON 또는 바이너리 프레임 페이로드)을 분석합니다. 잘못된 입력은 ValueError."""
+    # 바이너리 프레임 페이로드 (application/octet-stream, .npy)
+    if is_binary_payload(post_data):
+        return analyze_binary_payload(post_data, fps)
+
+    with current_metrics().stage("parse"):
+        data = json.loads(post_data)
+
+    # 입력 데이터 검증
+    if not any(key in data for key in ('frames', 'sessions', 'traces', 'rrIntervals')):
+        raise ValueError("No frames data provided")
+
+    return analyze_payload(data)
+
+
+def request_cache_key(post_data, fps=None):
+    """본문, fps, 신호 경로 정밀도와 DSP 백엔드로 결과 캐시 키를 만듭니다."""
+    with current_metrics().stage("hash"):
+        return payload_key([post_data], {"fps": fps, "precision": get_dtype().name,
+                                         "backend": get_backend().__name__.rsplit(".", 1)[-1]})
+
+
+def analyze_body_cached(post_data, fps=None):
+    """
+    본문과 fps의 해시로 결과 캐시를 조회합니다. 재시도로 같은 프레임이 다시 오면 재계산하지 않습니다.
+    처리에 성공한 결과만 저장하며, 응답에는 cached 플래그가 붙습니다.
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return analyze_body(post_data, fps)
+
+    key = request_cache_key(post_data, fps)
+    result = cache.get(key)
+    if result is None:
+        result = analyze_body(post_data, fps)
+        if result.get("processed"):
+            cache.put(key, result)
+        result["cached"] = False
+    else:
+        result["cached"] = True
+    return result
+
+
+def handle_request(post_data, fps=None, metrics=None, use_cache=True):
+    """
+    POST 요청 하나를 처리합니다. handler와 독립 서버(scripts/rppg_server.py)의 작업 프로세스가 공유합니다.
+    metrics(?metrics= 값 또는 RPPG_METRICS)가 있으면 단계별 시간/카운터를 함께 보고합니다.
+    """
+    mode = metrics_mode(metrics)
+    with collect(mode) as collector:
+        result = analyze_body_cached(post_data, fps) if use_cache else analyze_body(post_data, fps)
+    return publish(result, collector, mode, source="heartrate")
+
 
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
         content_length = int(self.headers['Content-Length'])
         post_data = self.rfile.read(content_length)
-        data = json.loads(post_data)
-        
-        # 입력 데이터 검증
-        if 'frames' not in data:
-            self.send_error_response("No frames data provided")
-            return
-            
+        query = parse_qs(urlparse(self.path).query)
+
+        # ?metrics=1|result|stderr|both 또는 RPPG_METRICS로 단계별 시간/카운터 보고
         try:
-            # 프레임 데이터 처리 (예시: 배열 형태의 RGB 값 가정)
-            frames = np.array(data['frames'])
-            
-            if len(frames) < 10:
-                self.send_error_response("Not enough frames for analysis (minimum 10)")
-                return
-            
-            # RGB 신호 추출
-            r_values = frames[:, 0].mean(axis=(1, 2)) if frames.ndim > 3 else frames[:, 0].mean()
-            g_values = frames[:, 1].mean(axis=(1, 2)) if frames.ndim > 3 else frames[:, 1].mean()
-            b_values = frames[:, 2].mean(axis=(1, 2)) if frames.ndim > 3 else frames[:, 2].mean()
-            
-            # 신호 전처리
-            r_detrended = detrend(r_values)
-            g_detrended = detrend(g_values)
-            b_detrended = detrend(b_values)
-            
-            # 정규화
-            r_normalized = (r_detrended - np.mean(r_detrended)) / np.std(r_detrended)
-            g_normalized = (g_detrended - np.mean(g_detrended)) / np.std(g_detrended)
-            b_normalized = (b_detrended - np.mean(b_detrended)) / np.std(b_detrended)
-            
-            # POS 알고리즘 적용 (간소화)
-            X = np.vstack([r_normalized, g_normalized, b_normalized])
-            S = np.array([[0, 1, -1], [-2, 1, 1]])
-            P = np.dot(S, X)
-            pos_signal = P[0, :] + ((np.std(P[0, :]) / np.std(P[1, :])) * P[1, :])
-            
-            # 심박수 계산
-            fps = data.get('fps', 30)  # 기본 FPS = 30
-            low_cutoff = 0.7  # 42 BPM
-            high_cutoff = 4.0  # 240 BPM
-            nyquist = fps / 2
-            b, a = signal.butter(3, [low_cutoff/nyquist, high_cutoff/nyquist], btype='band')
-            filtered_signal = signal.filtfilt(b, a, pos_signal)
-            
-            # FFT로 주파수 분석
-            fft_size = len(filtered_signal)
-            fft_result = np.abs(np.fft.rfft(filtered_signal))
-            freqs = np.fft.rfftfreq(fft_size, d=1.0/fps)
-            
-            # 심박수 추출
-            mask = (freqs >= 0.7) & (freqs <= 4.0)
-            if np.any(mask):
-                idx = np.argmax(fft_result[mask])
-                dominant_freq = freqs[mask][idx]
-                heart_rate = dominant_freq * 60  # BPM으로 변환
-                
-                # 신뢰도 계산
-                max_amplitude = fft_result[mask][idx]
-                total_power = np.sum(fft_result[mask])
-                confidence = float(max_amplitude / total_power if total_power > 0 else 0)
-                
-                # 결과 반환
-                result = {
-                    "heartRate": float(heart_rate),
-                    "confidence": confidence,
-                    "processed": True
-                }
-            else:
-                result = {
-                    "error": "No valid frequency components found",
-                    "heartRate": 0,
-                    "confidence": 0,
-                    "processed": False
-                }
-                
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(result).encode())
-            
+            result = handle_request(post_data, self.requested_fps(query), query.get('metrics', [None])[0])
+        except ValueError as e:
+            self.send_error_response(str(e))
+            return
         except Exception as e:
             self.send_error_response(f"Error processing frames: {str(e)}")
-            
+            return
+
+        self.send_json_response(result)
+
+    def requested_fps(self, query):
+        fps = query.get('fps', [self.headers.get('X-Fps')])[0]
+        return float(fps) if fps else None
+
     def do_GET(self):
         # 간단한 서버 상태 확인용 GET 엔드포인트
         self.send_response(200)
@@ -123,8 +239,9 @@ class handler(BaseHTTPRequestHandler):
             "status": "online",
             "version": "1.0",
             "python_version": sys.version,
-            "opencv_version": cv2.__version__,
+            "opencv_version": opencv_version(),
             "numpy_version": np.__version__,
+            "cache": cache_stats(),
             "environment": {
                 "vercel": os.environ.get("VERCEL") == "1"
             }
@@ -132,6 +249,12 @@ class handler(BaseHTTPRequestHandler):
         
         self.wfile.write(json.dumps(response).encode())
         
+    def send_json_response(self, payload):
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
+
     def send_error_response(self, message):
         self.send_response(400)
         self.send_header('Content-type', 'application/json')
@@ -140,56 +263,17 @@ class handler(BaseHTTPRequestHandler):
 
 if __name__ == "__main__":
     try:
-        input_data = sys.stdin.read()
-        data = json.loads(input_data)
-        # 기존 분석 코드 복사 (frames 처리, 심박수 계산 등)
-        frames = np.array(data['frames'])
-        if len(frames) < 10:
-            print(json.dumps({"error": "Not enough frames for analysis (minimum 10)", "processed": False}))
-            sys.exit(0)
-        r_values = frames[:, 0].mean(axis=(1, 2)) if frames.ndim > 3 else frames[:, 0].mean()
-        g_values = frames[:, 1].mean(axis=(1, 2)) if frames.ndim > 3 else frames[:, 1].mean()
-        b_values = frames[:, 2].mean(axis=(1, 2)) if frames.ndim > 3 else frames[:, 2].mean()
-        r_detrended = detrend(r_values)
-        g_detrended = detrend(g_values)
-        b_detrended = detrend(b_values)
-        r_normalized = (r_detrended - np.mean(r_detrended)) / np.std(r_detrended)
-        g_normalized = (g_detrended - np.mean(g_detrended)) / np.std(g_detrended)
-        b_normalized = (b_detrended - np.mean(b_detrended)) / np.std(b_detrended)
-        X = np.vstack([r_normalized, g_normalized, b_normalized])
-        S = np.array([[0, 1, -1], [-2, 1, 1]])
-        P = np.dot(S, X)
-        pos_signal = P[0, :] + ((np.std(P[0, :]) / np.std(P[1, :])) * P[1, :])
-        fps = data.get('fps', 30)
-        low_cutoff = 0.7
-        high_cutoff = 4.0
-        nyquist = fps / 2
-        b, a = signal.butter(3, [low_cutoff/nyquist, high_cutoff/nyquist], btype='band')
-        filtered_signal = signal.filtfilt(b, a, pos_signal)
-        fft_size = len(filtered_signal)
-        fft_result = np.abs(np.fft.rfft(filtered_signal))
-        freqs = np.fft.rfftfreq(fft_size, d=1.0/fps)
-        mask = (freqs >= 0.7) & (freqs <= 4.0)
-        if np.any(mask):
-            idx = np.argmax(fft_result[mask])
-            dominant_freq = freqs[mask][idx]
-            heart_rate = dominant_freq * 60
-            max_amplitude = fft_result[mask][idx]
-            total_power = np.sum(fft_result[mask])
-            confidence = float(max_amplitude / total_power if total_power > 0 else 0)
-            result = {
-                "heartRate": float(heart_rate),
-                "confidence": confidence,
-                "processed": True
-            }
-        else:
-            result = {
-                "error": "No valid frequency components found",
-                "heartRate": 0,
-                "confidence": 0,
-                "processed": False
-            }
-        print(json.dumps(result))
+        input_data = sys.stdin.buffer.read()
+        mode = metrics_mode()
+        with collect(mode) as collector:
+            try:
+                if is_binary_payload(input_data):
+                    result = analyze_binary_payload(input_data)
+                else:
+                    result = analyze_payload(json.loads(input_data))
+            except ValueError as e:
+                result = {"error": str(e), "processed": False}
+        print(json.dumps(publish(result, collector, mode, source="heartrate")))
     except Exception as e:
         print(json.dumps({"error": str(e), "processed": False}))
         sys.exit(1)
@@ -1,8 +1,5 @@
-import { spawn } from 'child_process';
-import fs from 'fs/promises';
 import { NextResponse } from 'next/server';
-import path from 'path';
-import { v4 as uuidv4 } from 'uuid';
+import { getRppgPool } from '@/lib/rppg-python';
 
 // Edge API 구성 - 서버리스 함수의 타임아웃을 늘리기 위한 설정
 export const runtime = 'nodejs';
@@ -11,7 +8,7 @@ export const maxDuration = 60; // 최대 실행 시간 (초)
 // This is a server-side route handler that will process the frames using pyVHR
 export async function POST(request: Request) {
   try {
-    const { frames } = await request.json();
+    const { frames, fps } = await request.json();
 
     if (!frames || !Array.isArray(frames) || frames.length === 0) {
       return NextResponse.json({ error: 'Invalid or missing frames data' }, { status: 400 });
@@ -19,43 +16,15 @@ export async function POST(request: Request) {
 
     console.log(`Received ${frames.length} frames for processing`);
 
-    // Create a temporary directory to store frames
-    const sessionId = uuidv4();
-    // Vercel 환경에서는 /tmp 디렉토리를 사용
-    const tempDir =
-      process.env.VERCEL === '1'
-        ? path.join('/tmp', sessionId)
-        : path.join(process.cwd(), 'tmp', sessionId);
-
     try {
-      await fs.mkdir(tempDir, { recursive: true });
-
-      // Save frames as images
-      for (let i = 0; i < frames.length; i++) {
-        const base64Data = frames[i].replace(/^data:image\/jpeg;base64,/, '');
-        const filePath = path.join(tempDir, `frame_${i.toString().padStart(5, '0')}.jpg`);
-        await fs.writeFile(filePath, base64Data, 'base64');
-      }
-
-      // 항상 실제 pyVHR 처리 시도
-      const result = await runPyVHR(tempDir);
-
-      // Clean up temporary files
-      await fs.rm(tempDir, { recursive: true, force: true }).catch(err => {
-        console.warn('Failed to clean up temp directory:', err);
-      });
+      // 프레임을 임시 디렉토리에 저장하지 않고 base64 그대로 워커에 전달 (메모리에서 디코딩)
+      const job = { frames, fps: typeof fps === 'number' && fps > 0 ? fps : undefined };
+      const result = await runPyVHR(job);
 
       return NextResponse.json(result);
     } catch (error) {
       console.error('Error processing frames:', error);
 
-      // Clean up on error
-      try {
-        await fs.rm(tempDir, { recursive: true, force: true });
-      } catch (cleanupError) {
-        console.error('Error cleaning up temp files:', cleanupError);
-      }
-
       // 에러 발생 시에도 시뮬레이션 결과 제공
       console.log('Error occurred, returning simulated result');
       return NextResponse.json(createSimulatedResult(`처리 오류: ${error}`));
@@ -68,126 +37,35 @@ export async function POST(request: Request) {
   }
 }
 
+// 처리 요청: base64 JPEG 프레임과 캡처 속도 (없으면 워커 기본값 20 fps)
+type RppgJob = { frames: string[]; fps?: number };
+
 /**
- * Runs the pyVHR processing on the saved frames
+ * Runs the pyVHR processing on the in-memory frames through a warm Python worker from the pool
  */
 async function runPyVHR(
-  framesDir: string
+  job: RppgJob
 ): Promise<{ heartRate: number; confidence: number; hrv?: any }> {
-  // Vercel 환경 감지 로직 변경 - 실행 시도
-  if (process.env.VERCEL === '1') {
-    console.log('runPyVHR: Vercel 환경에서 Python 스크립트 실행 시도');
-    // Vercel 환경에서는 /tmp 디렉토리의 python3을 시도
-    const pythonPaths = [
-      '/var/task/python/bin/python3', // Vercel의 Python 런타임 경로 (lambda layers)
-      '/var/lang/bin/python3', // AWS Lambda Python 3
-      '/opt/python/bin/python3', // 다른 가능한 경로
-      '/tmp/python/bin/python3', // 사용자 정의 설치 경로
-      'python3', // 환경 변수 PATH에 있는 python3
-      'python', // 환경 변수 PATH에 있는 python
-    ];
-
-    return new Promise((resolve, reject) => {
-      // Path to Python script that uses pyVHR
-      // Vercel 환경에서는 경로가 다를 수 있으므로 다중 경로 확인
-      const possibleScriptPaths = [
-        path.join(process.cwd(), 'scripts', 'process_rppg.py'),
-        path.join('/var', 'task', 'scripts', 'process_rppg.py'),
-        path.join('/var', 'task', 'process_rppg.py'),
-        path.join(process.cwd(), 'process_rppg.py'),
-      ];
-
-      console.log('실행 경로:', process.cwd());
-      console.log('가능한 스크립트 경로:', possibleScriptPaths);
-
-      // 15초 타임아웃 설정 (Vercel에서는 조금 더 길게)
-      const timeout = setTimeout(() => {
-        console.error('Python 스크립트 실행 시간 초과 (Vercel)');
-        resolve(createSimulatedResult('스크립트 실행 시간 초과 (Vercel)'));
-      }, 15000);
-
-      // 모든 가능한 경로 확인 및 첫 번째 찾은 스크립트 사용
-      findScriptPath(possibleScriptPaths, 0)
-        .then(foundScriptPath => {
-          // 먼저 Vercel 환경에서 Python 실행 가능한지 로그 출력
-          console.log(`Python 스크립트 경로: ${foundScriptPath}`);
-          console.log(`프레임 디렉토리 경로: ${framesDir}`);
-
-          // Vercel 환경에 맞춘 Python 경로 시도
-          findWorkingPython(
-            pythonPaths,
-            0,
-            foundScriptPath,
-            framesDir,
-            result => {
-              clearTimeout(timeout);
-              resolve(result);
-            },
-            error => {
-              clearTimeout(timeout);
-              console.error('Vercel에서 Python 처리 실패, 시뮬레이션 결과 사용:', error.message);
-              resolve(createSimulatedResult(error.message));
-            }
-          );
-        })
-        .catch(err => {
-          clearTimeout(timeout);
-          console.error(`Python script not found. Error: ${err.message}`);
-          resolve(createSimulatedResult(`스크립트를 찾을 수 없음: ${err.message}`));
-        });
-    });
-  }
-
-  // 로컬 환경 처리 (기존 코드 유지)
-  return new Promise((resolve, reject) => {
-    // Path to Python script that uses pyVHR
-    const pythonScript = path.join(process.cwd(), 'scripts', 'process_rppg.py');
-
-    // 10초 타임아웃 설정
-    const timeout = setTimeout(() => {
+  // Vercel에서는 콜드 스타트를 고려해 조금 더 길게
+  const timeoutMs = process.env.VERCEL === '1' ? 15000 : 10000;
+  let timeout: NodeJS.Timeout | undefined;
+  const timedOut = new Promise<ReturnType<typeof createSimulatedResult>>(resolve => {
+    timeout = setTimeout(() => {
       console.error('Python 스크립트 실행 시간 초과');
       resolve(createSimulatedResult('스크립트 실행 시간 초과'));
-    }, 10000);
-
-    // 스크립트 존재 여부 먼저 확인
-    fs.access(pythonScript)
-      .then(() => {
-        // Path to Python executable options - try multiple paths for Vercel compatibility
-        const pythonPaths = [
-          path.join(process.cwd(), 'venv', 'bin', 'python3'), // Local venv python3 (Mac/Linux)
-          path.join(process.cwd(), 'venv', 'bin', 'python'), // Local venv python (Mac/Linux)
-          path.join(process.cwd(), 'venv', 'Scripts', 'python.exe'), // Local venv (Windows)
-          '/usr/local/bin/python3', // Homebrew Python3 (Mac)
-          '/usr/bin/python3', // Standard Python3 path
-          'python3', // System Python3
-          '/usr/bin/python', // Standard Linux path
-          'python', // System Python
-          '/var/lang/bin/python', // AWS Lambda Python
-        ];
-
-        // 첫 번째 실행 가능한 Python을 찾아서 사용
-        findWorkingPython(
-          pythonPaths,
-          0,
-          pythonScript,
-          framesDir,
-          result => {
-            clearTimeout(timeout);
-            resolve(result);
-          },
-          error => {
-            clearTimeout(timeout);
-            console.error('Python 처리 실패, 시뮬레이션 결과 사용:', error.message);
-            resolve(createSimulatedResult(error.message));
-          }
-        );
-      })
-      .catch(err => {
-        clearTimeout(timeout);
-        console.error(`Python script not found at ${pythonScript}. Error: ${err.message}`);
-        resolve(createSimulatedResult(`스크립트를 찾을 수 없음: ${err.message}`));
-      });
+    }, timeoutMs);
   });
+
+  try {
+    console.log(`처리할 프레임 수: ${job.frames.length}`);
+    const processing = getRppgPool().then(pool => pool.run(job));
+    return await Promise.race([processing, timedOut]);
+  } catch (error: any) {
+    console.error('Python 처리 실패, 시뮬레이션 결과 사용:', error.message);
+    return createSimulatedResult(error.message);
+  } finally {
+    clearTimeout(timeout);
+  }
 }
 
 /**
@@ -232,116 +110,3 @@ function createSimulatedResult(errorReason?: string): {
     error: errorReason,
   };
 }
-
-/**
- * 모든 가능한 스크립트 경로를 확인하고 첫 번째 존재하는 스크립트를 찾음
- */
-async function findScriptPath(scriptPaths: string[], index: number): Promise<string> {
-  if (index >= scriptPaths.length) {
-    throw new Error('사용 가능한 Python 스크립트를 찾을 수 없습니다');
-  }
-
-  const scriptPath = scriptPaths[index];
-  try {
-    await fs.access(scriptPath);
-    console.log(`스크립트를 찾았습니다: ${scriptPath}`);
-    return scriptPath;
-  } catch (error) {
-    console.log(`스크립트가 존재하지 않습니다: ${scriptPath}`);
-    return findScriptPath(scriptPaths, index + 1);
-  }
-}
-
-/**
- * Recursively try Python paths until a working one is found
- */
-function findWorkingPython(
-  pythonPaths: string[],
-  index: number,
-  scriptPath: string,
-  framesDir: string,
-  resolve: (value: any) => void,
-  reject: (reason: Error) => void
-) {
-  if (index >= pythonPaths.length) {
-    console.error('No working Python interpreter found');
-    reject(new Error('No working Python interpreter found'));
-    return;
-  }
-
-  const pythonPath = pythonPaths[index];
-
-  try {
-    // 파일 시스템에 Python이 있는지 먼저 확인한 다음 실행
-    if (pythonPath.includes(process.cwd())) {
-      fs.access(pythonPath)
-        .then(() => {
-          executePython(pythonPath, scriptPath, framesDir, resolve, reject);
-        })
-        .catch(() => {
-          findWorkingPython(pythonPaths, index + 1, scriptPath, framesDir, resolve, reject);
-        });
-    } else {
-      // 시스템 경로의 Python인 경우 바로 실행 시도
-      const testProcess = spawn(pythonPath, ['--version']);
-
-      testProcess.on('error', err => {
-        findWorkingPython(pythonPaths, index + 1, scriptPath, framesDir, resolve, reject);
-      });
-
-      testProcess.on('close', code => {
-        if (code === 0) {
-          executePython(pythonPath, scriptPath, framesDir, resolve, reject);
-        } else {
-          findWorkingPython(pythonPaths, index + 1, scriptPath, framesDir, resolve, reject);
-        }
-      });
-    }
-  } catch (error) {
-    console.error(`Error checking Python at ${pythonPath}: ${error}`);
-    findWorkingPython(pythonPaths, index + 1, scriptPath, framesDir, resolve, reject);
-  }
-}
-
-/**
- * Execute the Python script with the specified Python interpreter
- */
-function executePython(
-  pythonCommand: string,
-  scriptPath: string,
-  framesDir: string,
-  resolve: (value: { heartRate: number; confidence: number; hrv?: any }) => void,
-  reject: (reason: Error) => void
-) {
-  // Spawn Python process
-  const pythonProcess = spawn(pythonCommand, [scriptPath, framesDir]);
-
-  let resultData = '';
-  let errorData = '';
-
-  pythonProcess.stdout.on('data', data => {
-    resultData += data.toString();
-  });
-
-  pythonProcess.stderr.on('data', data => {
-    errorData += data.toString();
-    console.error(`Python stderr: ${data.toString()}`);
-  });
-
-  pythonProcess.on('close', code => {
-    if (code !== 0) {
-      console.error(`Python process exited with code ${code}`);
-      console.error(`Python stderr: ${errorData}`);
-      reject(new Error(`Python process failed with code ${code}: ${errorData}`));
-      return;
-    }
-
-    try {
-      const result = JSON.parse(resultData);
-      resolve(result);
-    } catch (error) {
-      console.error(`Failed to parse Python output: ${resultData}`);
-      reject(new Error(`Failed to parse Python output: ${resultData}`));
-    }
-  });
-}
@@ -0,0 +1,61 @@
+import { NextResponse } from 'next/server';
+import { createId } from '@paralleldrive/cuid2';
+import { getRppgPool } from '@/lib/rppg-python';
+import { UploadSessionOp } from '@/lib/rppg-worker-pool';
+
+export const runtime = 'nodejs';
+export const maxDuration = 60; // 최대 실행 시간 (초)
+
+const OPS: UploadSessionOp[] = ['open', 'chunk', 'finalize', 'abort'];
+const MIN_FPS = 1;
+const MAX_FPS = 120;
+
+/**
+ * 청크 업로드 세션
+ *
+ * { op: 'open', fps? }                           → { sessionId, frames: 0 } (fps는 1–120, 기본 20)
+ * { op: 'chunk', sessionId, frames, timestamps? } → { frames, validFrames } (프레임은 즉시 RGB 평균으로 축약)
+ * { op: 'finalize', sessionId }                   → 심박수/HRV 결과
+ * { op: 'abort', sessionId }
+ *
+ * 녹화하는 동안 청크를 보내면 서버는 프레임당 스칼라 몇 개만 보관하고,
+ * 측정 종료 시에는 신호 분석만 남으므로 결과가 바로 반환됩니다.
+ */
+export async function POST(request: Request) {
+  let body: any;
+  try {
+    body = await request.json();
+  } catch (error) {
+    return NextResponse.json({ error: '입력 데이터가 올바른 JSON이 아닙니다.' }, { status: 400 });
+  }
+
+  const op = body.op as UploadSessionOp;
+  if (!OPS.includes(op)) {
+    return NextResponse.json({ error: `Unknown session op: ${body.op}` }, { status: 400 });
+  }
+  if (op === 'open' && body.fps !== undefined &&
+      !(typeof body.fps === 'number' && Number.isFinite(body.fps) && body.fps >= MIN_FPS && body.fps <= MAX_FPS)) {
+    return NextResponse.json({ error: `fps must be a number between ${MIN_FPS} and ${MAX_FPS}` }, { status: 400 });
+  }
+  if (op === 'chunk' && !Array.isArray(body.frames)) {
+    return NextResponse.json({ error: 'Invalid or missing frames data' }, { status: 400 });
+  }
+
+  const sessionId: string = op === 'open' ? createId() : body.sessionId;
+  if (!sessionId) {
+    return NextResponse.json({ error: 'Missing sessionId' }, { status: 400 });
+  }
+
+  try {
+    const pool = await getRppgPool();
+    const result = await pool.session(sessionId, op, {
+      frames: body.frames,
+      timestamps: body.timestamps,
+      fps: op === 'open' ? body.fps : undefined,
+    });
+    return NextResponse.json({ ...result, sessionId });
+  } catch (error: any) {
+    const status = String(error?.message).startsWith('Unknown upload session') ? 404 : 500;
+    return NextResponse.json({ error: error?.message ?? String(error) }, { status });
+  }
+}
@@ -0,0 +1,42 @@
+import { NextResponse } from 'next/server';
+import { createId } from '@paralleldrive/cuid2';
+import { getRppgPool } from '@/lib/rppg-python';
+
+export const runtime = 'nodejs';
+export const maxDuration = 60; // 최대 실행 시간 (초)
+
+/**
+ * 측정 중 실시간 심박수
+ *
+ * { frames, fps?, streamId?, end? } → { heartRate, confidence, samples, updates, streamId }
+ *
+ * 첫 청크는 streamId 없이 보내고, 응답의 streamId로 이후 청크를 보냅니다.
+ * 마지막 청크에 end: true를 지정하면 서버의 스트림 상태가 해제되며,
+ * 끊긴 스트림은 1분 동안 청크가 없으면 폐기됩니다.
+ */
+export async function POST(request: Request) {
+  let body: any;
+  try {
+    body = await request.json();
+  } catch (error) {
+    return NextResponse.json({ error: '입력 데이터가 올바른 JSON이 아닙니다.' }, { status: 400 });
+  }
+
+  if (!Array.isArray(body.frames)) {
+    return NextResponse.json({ error: 'Invalid or missing frames data' }, { status: 400 });
+  }
+
+  const streamId: string = body.streamId || createId();
+
+  try {
+    const pool = await getRppgPool();
+    const result = await pool.stream(streamId, {
+      frames: body.frames,
+      fps: typeof body.fps === 'number' && body.fps > 0 ? body.fps : undefined,
+      end: Boolean(body.end),
+    });
+    return NextResponse.json({ ...result, streamId });
+  } catch (error: any) {
+    return NextResponse.json({ error: error?.message ?? String(error) }, { status: 500 });
+  }
+}
@@ -4,18 +4,26 @@ import { db } from '@/lib/db';
 import { measurementResults } from '@/lib/db/schema';
 import { createId } from '@paralleldrive/cuid2';
 
-export async function POST(req: NextRequest) {
-  const body = await req.text();
-  let parsedInput: any = {};
-  try {
-    parsedInput = JSON.parse(body);
-  } catch (e) {
-    console.error('JSON parsing error:', e);
-    return NextResponse.json({ error: '입력 데이터가 올바른 JSON이 아닙니다.' }, { status: 400 });
-  }
+// 바이너리 프레임 페이로드(RPPG 헤더 또는 .npy)는 JSON 변환 없이 그대로 Python에 전달
+const BINARY_CONTENT_TYPES = ['application/octet-stream', 'application/x-npy'];
+
+// 설정되면 요청마다 python3를 띄우는 대신 상주 서버(scripts/rppg_server.py)로 전달
+const SIDECAR_URL = process.env.RPPG_SIDECAR_URL;
 
-  // Promise 래핑 대신 await로 동기화
-  const data = await new Promise<string>((resolve, reject) => {
+async function callSidecar(req: NextRequest, body: string | Buffer, contentType: string) {
+  const url = new URL(SIDECAR_URL!);
+  req.nextUrl.searchParams.forEach((value, key) => {
+    if (key === 'fps' || key === 'metrics') url.searchParams.set(key, value);
+  });
+  return fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': contentType || 'application/json' },
+    body,
+  });
+}
+
+function runPython(body: string | Buffer): Promise<string> {
+  return new Promise<string>((resolve, reject) => {
     const py = spawn('python3', ['api/python/heartrate.py'], {
       env: process.env,
       stdio: ['pipe', 'pipe', 'pipe'],
@@ -44,6 +52,52 @@ export async function POST(req: NextRequest) {
   }).catch(err => {
     return JSON.stringify({ error: err.message });
   });
+}
+
+export async function POST(req: NextRequest) {
+  const contentType = req.headers.get('content-type') ?? '';
+  const isBinary = BINARY_CONTENT_TYPES.some(type => contentType.startsWith(type));
+
+  let body: string | Buffer;
+  let parsedInput: any = {};
+  if (isBinary) {
+    body = Buffer.from(await req.arrayBuffer());
+    parsedInput = {
+      userId: req.nextUrl.searchParams.get('userId'),
+      email: req.nextUrl.searchParams.get('email'),
+    };
+  } else {
+    body = await req.text();
+    try {
+      parsedInput = JSON.parse(body);
+    } catch (e) {
+      console.error('JSON parsing error:', e);
+      return NextResponse.json({ error: '입력 데이터가 올바른 JSON이 아닙니다.' }, { status: 400 });
+    }
+  }
+
+  let data: string;
+  if (SIDECAR_URL) {
+    let response: Response;
+    try {
+      response = await callSidecar(req, body, contentType);
+    } catch (e) {
+      return NextResponse.json(
+        { error: `rPPG 서버에 연결할 수 없습니다: ${e instanceof Error ? e.message : String(e)}` },
+        { status: 502 }
+      );
+    }
+    // 과부하(429)와 시간 초과(504)는 재시도할 수 있도록 상태 코드와 Retry-After를 그대로 전달
+    if (response.status === 429 || response.status === 504) {
+      const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+      const retryAfter = response.headers.get('Retry-After');
+      if (retryAfter) headers['Retry-After'] = retryAfter;
+      return new NextResponse(await response.text(), { status: response.status, headers });
+    }
+    data = await response.text();
+  } else {
+    data = await runPython(body);
+  }
 
   let result: any = {};
   try {
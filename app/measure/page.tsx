@@ -217,7 +217,7 @@ export default function MeasurePage() {
   }, [selectedMood, isAnalyzingExpression]);
 
   // 프레임 처리 함수
-  const handleFramesCapture = async (frames: string[]) => {
+  const handleFramesCapture = async (frames: string[], fps?: number) => {
     try {
       setIsProcessing(true);
       setError(null);
@@ -229,7 +229,7 @@ export default function MeasurePage() {
       }
 
       // 서버에 프레임 전송 및 처리 요청
-      const result = await processWithPyVHR(frames);
+      const result = await processWithPyVHR(frames, fps);
 
       if (!result || !result.heartRate) {
         throw new Error(
@@ -19,7 +19,7 @@ import { useEffect, useRef, useState } from 'react';
 
 // 측정 결과 콜백 타입 정의
 export interface RPPGCameraProps {
-  onFramesCapture?: (frames: string[]) => void;
+  onFramesCapture?: (frames: string[], fps: number) => void;
   onFrameCaptured?: (imageData: ImageData) => void; // 단일 프레임 캡처 콜백 추가
   active?: boolean; // 외부에서 활성화 여부 제어
   canvasRef?: React.RefObject<HTMLCanvasElement>; // 외부 캔버스 참조 추가
@@ -422,14 +422,17 @@ export const RPPGCamera = ({
     // 외부 프레임 처리 콜백 호출
     if (onFramesCapture) {
       let framesToProcess = [...framesRef.current];
+      // 실제 캡처 속도 (캡처 간격 모바일 200ms, 데스크톱 100ms). 서버는 이 값으로 심박/RR 간격을 계산
+      let fps = 1000 / (isMobile ? 200 : 100);
 
       // 모바일에서는 프레임 수를 줄여 메모리 사용량 감소
       if (isMobile && framesToProcess.length > 150) {
         const stride = Math.ceil(framesToProcess.length / 150);
         framesToProcess = framesToProcess.filter((_, i) => i % stride === 0);
+        fps /= stride;
       }
 
-      onFramesCapture(framesToProcess);
+      onFramesCapture(framesToProcess, fps);
 
       // 메모리 해제
       framesRef.current = [];
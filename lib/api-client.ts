@@ -43,7 +43,7 @@ function generateFallbackResult(errorMessage: string): RPPGResult {
 /**
  * Sends frames to the server for processing with pyVHR
  */
-export async function processWithPyVHR(frames: string[]): Promise<RPPGResult> {
+export async function processWithPyVHR(frames: string[], fps?: number): Promise<RPPGResult> {
   try {
     // 요청 시작 시간
     const requestStartTime = Date.now();
@@ -67,7 +67,7 @@ export async function processWithPyVHR(frames: string[]): Promise<RPPGResult> {
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ frames }),
+      body: JSON.stringify({ frames, fps }),
     });
 
     // 서버 응답 처리
@@ -170,13 +170,13 @@ export async function fetchMeasurementDetail(id: string): Promise<MeasurementRes
 /**
  * rPPG 프레임 처리 API
  */
-export async function processRPPGFrames(frames: string[]): Promise<any> {
+export async function processRPPGFrames(frames: string[], fps?: number): Promise<any> {
   const response = await fetch('/api/process-rppg', {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
     },
-    body: JSON.stringify({ frames }),
+    body: JSON.stringify({ frames, fps }),
   });
 
   if (!response.ok) {
@@ -187,6 +187,73 @@ export async function processRPPGFrames(frames: string[]): Promise<any> {
   return response.json();
 }
 
+async function postRPPGSession(body: Record<string, unknown>): Promise<any> {
+  const response = await fetch('/api/process-rppg/session', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(body),
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.error || 'rPPG 세션 처리 중 오류가 발생했습니다');
+  }
+
+  return response.json();
+}
+
+/**
+ * rPPG 청크 업로드 세션
+ * 녹화 중에 appendFrames로 프레임 청크를 보내면 서버가 바로 RGB 평균으로 축약하고,
+ * finalize는 누적된 신호로 심박수/HRV 결과를 반환합니다.
+ */
+export async function openRPPGSession(fps = 20) {
+  const { sessionId } = await postRPPGSession({ op: 'open', fps });
+
+  return {
+    sessionId: sessionId as string,
+    appendFrames: (frames: string[], timestamps?: number[]) =>
+      postRPPGSession({ op: 'chunk', sessionId, frames, timestamps }),
+    finalize: () => postRPPGSession({ op: 'finalize', sessionId }),
+    abort: () => postRPPGSession({ op: 'abort', sessionId }),
+  };
+}
+
+/**
+ * rPPG 실시간 스트림
+ * 측정 중에 pushFrames로 프레임 청크를 보내면 그때까지의 심박수 추정값과 1초 단위 갱신(updates)을 반환합니다.
+ * 측정이 끝나면 end로 서버의 스트림 상태를 해제합니다.
+ */
+export function openRPPGStream(fps = 20) {
+  let streamId: string | undefined;
+
+  const post = async (frames: string[], end: boolean) => {
+    const response = await fetch('/api/process-rppg/stream', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ streamId, frames, fps, end }),
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.error || 'rPPG 실시간 처리 중 오류가 발생했습니다');
+    }
+
+    const result = await response.json();
+    streamId = result.streamId;
+    return result;
+  };
+
+  return {
+    pushFrames: (frames: string[]) => post(frames, false),
+    end: (frames: string[] = []) => post(frames, true),
+  };
+}
+
 /**
  * 캐리커처 생성 API
  */
@@ -0,0 +1,119 @@
+import { spawn } from 'child_process';
+import fs from 'fs/promises';
+import path from 'path';
+import { getRppgWorkerPool, RppgWorkerPool } from '@/lib/rppg-worker-pool';
+
+/**
+ * rPPG 처리에 쓸 Python 인터프리터와 scripts/process_rppg.py 경로를 찾습니다.
+ *
+ * 모든 process-rppg 라우트가 이 모듈을 통해 같은 인터프리터/스크립트 조합(따라서 같은 워커 풀)을 사용합니다.
+ * RPPG_PYTHON 환경 변수가 있으면 그 인터프리터를 먼저 시도합니다.
+ */
+
+export type RppgRuntime = { pythonCommand: string; scriptPath: string };
+
+// 한 번 찾은 조합은 재사용 (요청마다 --version 탐색을 반복하지 않음)
+let runtime: Promise<RppgRuntime> | null = null;
+
+function isVercel(): boolean {
+  return process.env.VERCEL === '1';
+}
+
+function scriptCandidates(): string[] {
+  const local = path.join(process.cwd(), 'scripts', 'process_rppg.py');
+  if (!isVercel()) return [local];
+
+  // Vercel 환경에서는 경로가 다를 수 있으므로 다중 경로 확인
+  return [
+    local,
+    path.join('/var', 'task', 'scripts', 'process_rppg.py'),
+    path.join('/var', 'task', 'process_rppg.py'),
+    path.join(process.cwd(), 'process_rppg.py'),
+  ];
+}
+
+function pythonCandidates(): string[] {
+  const candidates = isVercel()
+    ? [
+        '/var/task/python/bin/python3', // Vercel의 Python 런타임 경로 (lambda layers)
+        '/var/lang/bin/python3', // AWS Lambda Python 3
+        '/opt/python/bin/python3', // 다른 가능한 경로
+        '/tmp/python/bin/python3', // 사용자 정의 설치 경로
+        'python3', // 환경 변수 PATH에 있는 python3
+        'python', // 환경 변수 PATH에 있는 python
+      ]
+    : [
+        path.join(process.cwd(), 'venv', 'bin', 'python3'), // Local venv python3 (Mac/Linux)
+        path.join(process.cwd(), 'venv', 'bin', 'python'), // Local venv python (Mac/Linux)
+        path.join(process.cwd(), 'venv', 'Scripts', 'python.exe'), // Local venv (Windows)
+        '/usr/local/bin/python3', // Homebrew Python3 (Mac)
+        '/usr/bin/python3', // Standard Python3 path
+        'python3', // System Python3
+        '/usr/bin/python', // Standard Linux path
+        'python', // System Python
+        '/var/lang/bin/python', // AWS Lambda Python
+      ];
+  return process.env.RPPG_PYTHON ? [process.env.RPPG_PYTHON, ...candidates] : candidates;
+}
+
+async function exists(filePath: string): Promise<boolean> {
+  return fs.access(filePath).then(
+    () => true,
+    () => false
+  );
+}
+
+/**
+ * 프로젝트 안의 인터프리터(venv)는 파일 존재만 확인하고, 시스템 경로의 인터프리터는 --version을 실행해 봄
+ */
+async function canRun(pythonPath: string): Promise<boolean> {
+  if (pythonPath.includes(process.cwd())) return exists(pythonPath);
+
+  return new Promise(resolve => {
+    const testProcess = spawn(pythonPath, ['--version']);
+    testProcess.on('error', () => resolve(false));
+    testProcess.on('close', code => resolve(code === 0));
+  });
+}
+
+async function findRuntime(): Promise<RppgRuntime> {
+  let scriptPath: string | undefined;
+  for (const candidate of scriptCandidates()) {
+    if (await exists(candidate)) {
+      scriptPath = candidate;
+      break;
+    }
+  }
+  if (!scriptPath) {
+    throw new Error('사용 가능한 Python 스크립트를 찾을 수 없습니다');
+  }
+
+  for (const pythonCommand of pythonCandidates()) {
+    if (await canRun(pythonCommand)) {
+      console.log(`rPPG Python: ${pythonCommand}, 스크립트: ${scriptPath}`);
+      return { pythonCommand, scriptPath };
+    }
+  }
+  throw new Error('No working Python interpreter found');
+}
+
+/**
+ * 사용할 인터프리터와 스크립트 경로. 찾지 못하면 다음 요청에서 다시 탐색합니다.
+ */
+export function resolveRppgRuntime(): Promise<RppgRuntime> {
+  if (!runtime) {
+    runtime = findRuntime().catch(error => {
+      runtime = null;
+      throw error;
+    });
+  }
+  return runtime;
+}
+
+/**
+ * 찾은 인터프리터/스크립트 조합의 워커 풀
+ */
+export async function getRppgPool(): Promise<RppgWorkerPool> {
+  const { pythonCommand, scriptPath } = await resolveRppgRuntime();
+  return getRppgWorkerPool(pythonCommand, scriptPath);
+}
@@ -0,0 +1,286 @@
+import { ChildProcessWithoutNullStreams, spawn } from 'child_process';
+import os from 'os';
+import readline from 'readline';
+
+/**
+ * scripts/process_rppg.py --worker 프로세스를 상주시켜 요청마다 Python을 새로 띄우지 않도록 하는 풀
+ *
+ * 각 워커는 JSON-lines 프로토콜로 통신합니다.
+ * 요청: {"id": string, "framesDir": string} 또는 {"id": string, "frames": string[]} (base64 JPEG)
+ *       선택적으로 "budget": number (처리 시간 예산, 초), "fps": number (캡처 속도, 기본 20)
+ * 업로드 세션: {"id", "session": string, "op": "open"|"chunk"|"finalize"|"abort", "frames"?, "timestamps"?}
+ *       세션 상태는 워커 프로세스 안에 있으므로 같은 세션의 요청은 항상 같은 워커로 보냄
+ * 실시간 스트림: {"id", "stream": string, "frames": string[], "fps"?, "end"?}
+ *       스트림 상태도 워커 안에 있으므로 같은 스트림의 청크는 같은 워커로 보냄
+ * 응답: {"id": string, "result": {...}} 또는 {"id": string, "error": string}
+ */
+
+// 처리 예산을 타임아웃보다 짧게 잡아 IPC/직렬화 시간을 남겨둠
+const BUDGET_MARGIN_MS = 1500;
+
+// 워커의 STREAM_TTL_SECONDS와 같음. 이보다 오래 청크가 없던 스트림의 워커 매핑은 해제
+const STREAM_TTL_MS = 60000;
+
+type Job = {
+  payload: Record<string, unknown>;
+  timeoutMs: number;
+  resolve: (value: any) => void;
+  reject: (reason: Error) => void;
+};
+
+type RunningJob = Job & { id: string; timer: NodeJS.Timeout };
+
+class RppgWorker {
+  private proc: ChildProcessWithoutNullStreams;
+  // 워커는 요청을 하나씩 처리하므로 stdin에는 한 번에 하나만 쓰고 나머지는 여기서 대기
+  private queue: Job[] = [];
+  private current: RunningJob | null = null;
+  private nextId = 0;
+  alive = true;
+
+  constructor(
+    pythonCommand: string,
+    scriptPath: string,
+    private onExit: (worker: RppgWorker) => void,
+    private onIdle: (worker: RppgWorker) => void
+  ) {
+    this.proc = spawn(pythonCommand, [scriptPath, '--worker'], {
+      env: { ...process.env, PYTHONUNBUFFERED: '1' },
+      stdio: ['pipe', 'pipe', 'pipe'],
+    });
+
+    readline.createInterface({ input: this.proc.stdout }).on('line', line => this.handleLine(line));
+
+    this.proc.stderr.on('data', data => {
+      console.error(`Python worker stderr: ${data.toString()}`);
+    });
+
+    this.proc.on('error', err => this.shutdown(err));
+    this.proc.on('close', code => this.shutdown(new Error(`Python worker exited with code ${code}`)));
+  }
+
+  get load(): number {
+    return this.queue.length + (this.current ? 1 : 0);
+  }
+
+  run(payload: Record<string, unknown>, timeoutMs: number): Promise<any> {
+    return new Promise((resolve, reject) => {
+      if (!this.alive) {
+        reject(new Error('Python worker is not running'));
+        return;
+      }
+      this.queue.push({ payload, timeoutMs, resolve, reject });
+      this.pump();
+    });
+  }
+
+  private pump() {
+    if (this.current || !this.alive) return;
+    const job = this.queue.shift();
+    if (!job) {
+      this.onIdle(this);
+      return;
+    }
+
+    const id = String(this.nextId++);
+    // 타임아웃은 워커에 보낸 시점부터 측정. 시간 초과된 워커는 계산 중이므로 종료하고 풀에서 새로 생성되도록 함
+    const timer = setTimeout(() => {
+      this.shutdown(new Error(`Python worker timed out after ${job.timeoutMs}ms`));
+      this.proc.kill();
+    }, job.timeoutMs);
+
+    this.current = { ...job, id, timer };
+    this.proc.stdin.write(JSON.stringify({ id, ...job.payload }) + '\n');
+  }
+
+  private handleLine(line: string) {
+    let message: any;
+    try {
+      message = JSON.parse(line);
+    } catch (error) {
+      console.error(`Failed to parse Python worker output: ${line}`);
+      return;
+    }
+
+    const job = this.current;
+    if (!job || job.id !== String(message.id)) return;
+
+    this.current = null;
+    clearTimeout(job.timer);
+
+    if (message.error) {
+      job.reject(new Error(message.error));
+    } else {
+      job.resolve(message.result);
+    }
+    this.pump();
+  }
+
+  private shutdown(reason: Error) {
+    if (!this.alive) return;
+    this.alive = false;
+
+    if (this.current) {
+      clearTimeout(this.current.timer);
+      this.current.reject(reason);
+      this.current = null;
+    }
+    // 아직 보내지 않은 작업은 워커 상태(업로드 세션)에 묶여 있으므로 함께 실패 처리
+    this.queue.forEach(job => job.reject(new Error('Python worker restarted before the request ran')));
+    this.queue = [];
+    this.onExit(this);
+  }
+}
+
+export type UploadSessionOp = 'open' | 'chunk' | 'finalize' | 'abort';
+
+export class RppgWorkerPool {
+  private workers: RppgWorker[] = [];
+  private sessions = new Map<string, RppgWorker>();
+  private streams = new Map<string, { worker: RppgWorker; touched: number }>();
+  // 세션에 묶이지 않은 작업은 풀에서 대기하다가 한가한 워커에만 배정됨
+  // (다른 작업의 타임아웃으로 워커가 종료되어도 대기 중인 작업은 영향받지 않음)
+  private queue: Job[] = [];
+
+  constructor(
+    private pythonCommand: string,
+    private scriptPath: string,
+    private size: number
+  ) {}
+
+  /**
+   * 한가한 워커에 작업을 배정하며, 모두 바쁘고 풀이 가득 차지 않았다면 새 워커를 띄움.
+   * 그래도 없으면 풀 큐에서 기다리며, 타임아웃은 워커에 배정된 시점부터 측정.
+   * budget(초)이 없으면 타임아웃에서 여유분을 뺀 값을 처리 예산으로 전달해
+   * 워커가 타임아웃 전에 품질을 낮춰서라도 결과를 반환하도록 함
+   */
+  run(
+    payload: { framesDir?: string; frames?: string[]; fps?: number; budget?: number },
+    timeoutMs = 10000
+  ): Promise<any> {
+    const budget = payload.budget ?? Math.max(1, (timeoutMs - BUDGET_MARGIN_MS) / 1000);
+    return new Promise((resolve, reject) => {
+      this.queue.push({ payload: { ...payload, budget }, timeoutMs, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  /**
+   * 청크 업로드 세션 요청을 세션이 열린 워커로 보냄.
+   * 워커가 종료되었거나 모르는 세션이면 실패하며, finalize/abort 후에는 세션 매핑을 해제
+   */
+  session(
+    sessionId: string,
+    op: UploadSessionOp,
+    payload: { frames?: string[]; timestamps?: number[]; fps?: number; budget?: number } = {},
+    timeoutMs = 10000
+  ): Promise<any> {
+    let worker = this.sessions.get(sessionId);
+    if (op === 'open') {
+      worker = this.acquire();
+      this.sessions.set(sessionId, worker);
+    } else if (!worker || !worker.alive) {
+      this.sessions.delete(sessionId);
+      return Promise.reject(new Error(`Unknown upload session: ${sessionId}`));
+    }
+
+    if (op === 'finalize' || op === 'abort') {
+      this.sessions.delete(sessionId);
+    }
+    const budget =
+      op === 'finalize' ? (payload.budget ?? Math.max(1, (timeoutMs - BUDGET_MARGIN_MS) / 1000)) : undefined;
+    return worker.run({ ...payload, session: sessionId, op, budget }, timeoutMs);
+  }
+
+  /**
+   * 실시간 스트림 청크를 스트림이 시작된 워커로 보냄.
+   * 워커가 종료되었거나 매핑이 만료되었으면 다른 워커에서 추정을 처음부터 다시 시작하며, end 후에는 매핑을 해제
+   */
+  stream(
+    streamId: string,
+    payload: { frames: string[]; fps?: number; end?: boolean },
+    timeoutMs = 10000
+  ): Promise<any> {
+    const now = Date.now();
+    this.streams.forEach((entry, id) => {
+      if (now - entry.touched > STREAM_TTL_MS) this.streams.delete(id);
+    });
+
+    let worker = this.streams.get(streamId)?.worker;
+    if (!worker || !worker.alive) {
+      worker = this.acquire();
+    }
+    if (payload.end) {
+      this.streams.delete(streamId);
+    } else {
+      this.streams.set(streamId, { worker, touched: now });
+    }
+    return worker.run({ ...payload, stream: streamId }, timeoutMs);
+  }
+
+  private dispatch() {
+    while (this.queue.length > 0) {
+      const worker = this.idleWorker() ?? this.spawnWorker();
+      if (!worker) return;
+      const job = this.queue.shift()!;
+      worker.run(job.payload, job.timeoutMs).then(job.resolve, job.reject);
+    }
+  }
+
+  /**
+   * 세션/스트림을 배정할 워커: 한가한 워커, 새 워커, 가장 부하가 적은 워커 순
+   */
+  private acquire(): RppgWorker {
+    return (
+      this.idleWorker() ??
+      this.spawnWorker() ??
+      this.workers.reduce((least, worker) => (worker.load < least.load ? worker : least))
+    );
+  }
+
+  private idleWorker(): RppgWorker | undefined {
+    return this.workers.find(worker => worker.alive && worker.load === 0);
+  }
+
+  private spawnWorker(): RppgWorker | undefined {
+    if (this.workers.length >= this.size) return undefined;
+
+    const worker = new RppgWorker(
+      this.pythonCommand,
+      this.scriptPath,
+      exited => {
+        this.workers = this.workers.filter(w => w !== exited);
+        this.sessions.forEach((owner, id) => {
+          if (owner === exited) this.sessions.delete(id);
+        });
+        this.streams.forEach((entry, id) => {
+          if (entry.worker === exited) this.streams.delete(id);
+        });
+        this.dispatch();
+      },
+      () => this.dispatch()
+    );
+    this.workers.push(worker);
+    return worker;
+  }
+}
+
+// 개발 서버의 HMR 재로딩 시에도 워커를 유지하기 위해 globalThis에 보관
+const globalForPool = globalThis as unknown as { rppgWorkerPools?: Map<string, RppgWorkerPool> };
+
+/**
+ * 인터프리터/스크립트 조합별로 하나의 풀을 재사용합니다.
+ * 풀 크기는 RPPG_WORKERS 환경 변수로 조정할 수 있습니다 (기본값: CPU 코어 수, 최대 4).
+ */
+export function getRppgWorkerPool(pythonCommand: string, scriptPath: string): RppgWorkerPool {
+  const pools = (globalForPool.rppgWorkerPools ??= new Map());
+  const key = `${pythonCommand}:${scriptPath}`;
+
+  let pool = pools.get(key);
+  if (!pool) {
+    const size = Number(process.env.RPPG_WORKERS) || Math.max(1, Math.min(os.cpus().length, 4));
+    pool = new RppgWorkerPool(pythonCommand, scriptPath, size);
+    pools.set(key, pool);
+  }
+  return pool;
+}
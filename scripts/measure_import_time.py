@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Measure cold-start import time of the rPPG entry points.
+
+Each target is imported in a fresh interpreter with `python -X importtime`, once per DSP backend
+(RPPG_DSP_BACKEND=scipy / numpy), and the total import time, the time of the first analysis call
+and the slowest top-level modules are reported.
+
+Usage: python scripts/measure_import_time.py [--repeat N] [--top N] [--json]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# (이름, 작업 디렉토리, 임포트 문, 첫 호출 문)
+TARGETS = [
+    ("heartrate", os.path.join(ROOT, 'api', 'python'),
+     "import heartrate",
+     "import numpy as np; heartrate.analyze_frames_array(np.random.rand(300, 3), 30)"),
+    ("process_rppg", os.path.join(ROOT, 'scripts'),
+     "import process_rppg",
+     "import numpy as np; process_rppg.estimate_heart_rate(np.random.rand(3, 300), 20)"),
+]
+
+BACKENDS = ["scipy", "numpy"]
+
+_PROBE = """
+import time
+_t0 = time.perf_counter()
+{import_stmt}
+_t1 = time.perf_counter()
+{call_stmt}
+_t2 = time.perf_counter()
+print("RPPG_TIMING", _t1 - _t0, _t2 - _t1)
+"""
+
+
+def parse_importtime(stderr):
+    """-X importtime 출력에서 최상위 모듈별 누적 시간(us)을 추출합니다."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue
+        # 들여쓰기 깊이가 0인 항목만 최상위 임포트
+        if len(name) - len(name.lstrip()) == 1:
+            modules[name.strip()] = int(cumulative_us)
+    return modules
+
+
+def measure(target, backend):
+    name, cwd, import_stmt, call_stmt = target
+    env = dict(os.environ, RPPG_DSP_BACKEND=backend)
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(import_stmt=import_stmt, call_stmt=call_stmt)],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        return {"target": name, "backend": backend, "error": proc.stderr.strip().splitlines()[-1]}
+
+    timing = next(line for line in proc.stdout.splitlines() if line.startswith("RPPG_TIMING"))
+    import_s, call_s = (float(v) for v in timing.split()[1:])
+    modules = parse_importtime(proc.stderr)
+    return {
+        "target": name,
+        "backend": backend,
+        "importSeconds": import_s,
+        "firstCallSeconds": call_s,
+        "processSeconds": wall,
+        "scipyLoaded": any(module.split(".")[0] == "scipy" for module in modules),
+        "modules": modules,
+    }
+
+
+def summarize(runs, top):
+    best = min(runs, key=lambda run: run.get("importSeconds", float("inf")))
+    if "error" in best:
+        return best
+    slowest = sorted(best["modules"].items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "target": best["target"],
+        "backend": best["backend"],
+        "importMs": round(best["importSeconds"] * 1000, 1),
+        "firstCallMs": round(best["firstCallSeconds"] * 1000, 1),
+        "processMs": round(best["processSeconds"] * 1000, 1),
+        "scipyLoaded": best["scipyLoaded"],
+        "slowestModulesMs": {module: round(us / 1000, 1) for module, us in slowest},
+    }
+
+
+def main(argv):
+    repeat = int(argv[argv.index("--repeat") + 1]) if "--repeat" in argv else 3
+    top = int(argv[argv.index("--top") + 1]) if "--top" in argv else 5
+
+    results = []
+    for target in TARGETS:
+        for backend in BACKENDS:
+            # 파일 시스템 캐시 영향을 줄이기 위해 여러 번 실행해 가장 빠른 값을 사용
+            results.append(summarize([measure(target, backend) for _ in range(repeat)], top))
+
+    if "--json" in argv:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        if "error" in result:
+            print(f"{result['target']:<14} {result['backend']:<6} error: {result['error']}")
+            continue
+        print(f"{result['target']:<14} {result['backend']:<6} import {result['importMs']:>8.1f} ms  "
+              f"first call {result['firstCallMs']:>7.1f} ms  scipy loaded: {result['scipyLoaded']}")
+        for module, ms in result["slowestModulesMs"].items():
+            print(f"{'':<22}{module:<30} {ms:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
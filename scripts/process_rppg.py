@@ -3,25 +3,79 @@
 This script processes a sequence of frames using simplified rPPG extraction for Mac M1.
 Additional HRV metrics calculation is implemented.
 Vercel deployment considerations added.
+Run with --worker to keep a warm JSON-lines worker process alive across requests,
+or with --stdin to read length-prefixed encoded frames without a temp directory.
+Pass --fps N when frames were captured at a rate other than 20 fps.
 """
 
 import sys
 import os
 import json
 import glob
+import base64
+import struct
+import functools
+import contextlib
+import threading
+import time
+import collections
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import numpy as np
 import cv2
-from scipy import signal
-from scipy import interpolate
-from scipy.signal import detrend
-from scipy.integrate import trapezoid  # trapz 대신 trapezoid 함수 import
-
-# Vercel 환경에서 디버그 정보 출력
-print(f"Python 버전: {sys.version}", file=sys.stderr)
-print(f"실행 경로: {os.getcwd()}", file=sys.stderr)
-print(f"스크립트 경로: {__file__}", file=sys.stderr)
-print(f"시스템 경로: {sys.path}", file=sys.stderr)
-print(f"명령행 인수: {sys.argv}", file=sys.stderr)
+from rppg_tracking import FaceTracker
+from rppg_skin import SkinSignalExtractor, combine_roi_traces
+from rppg_budget import ProcessingBudget, plan_extraction
+from rppg_container import SessionContainer, is_container
+from rppg_quality import QualityAbort, QualityGate
+
+# heartrate.py와 공유하는 신호 처리 패키지(api/python/_rppg) 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api', 'python'))
+from _rppg.backend import get_backend, get_dtype
+from _rppg.cache import get_result_cache, payload_key
+from _rppg.dsp import estimate_heart_rate, refine_peaks
+from _rppg.hrv import frequency_domain_hrv as lomb_frequency_domain_hrv
+from _rppg.metrics import bind as bind_metrics, collect, current as current_metrics, metrics_mode, publish
+from _rppg.plan import HR_BAND, get_plan, get_welch_plan
+from _rppg.stream import StreamingHeartRateEstimator
+
+# 워커 모드에서 재사용되는 상태 (프로세스/스레드당 한 번만 로드)
+_thread_state = threading.local()
+_extraction_pools = {}
+_streams = {}
+_upload_sessions = {}
+
+# 예산 모드: 비용 측정용 선행 프레임 수, 주파수 영역 HRV에 필요한 최소 잔여 시간(초)
+PROBE_FRAMES = 10
+HRV_RESERVE_SECONDS = 0.25
+
+# 마지막 청크 이후 이 시간(초)이 지나도록 마무리되지 않은 업로드 세션은 폐기
+UPLOAD_SESSION_TTL_SECONDS = 300
+
+# 마지막 청크 이후 이 시간(초)이 지난 실시간 스트림은 폐기, 동시에 유지하는 스트림 수 상한
+STREAM_TTL_SECONDS = 60
+MAX_STREAMS = int(os.environ.get("RPPG_MAX_STREAMS", 16))
+
+
+def print_environment_info():
+    """Vercel 환경 디버깅을 위해 실행 환경 정보를 stderr에 출력합니다."""
+    print(f"Python 버전: {sys.version}", file=sys.stderr)
+    print(f"실행 경로: {os.getcwd()}", file=sys.stderr)
+    print(f"스크립트 경로: {__file__}", file=sys.stderr)
+    print(f"시스템 경로: {sys.path}", file=sys.stderr)
+    print(f"명령행 인수: {sys.argv}", file=sys.stderr)
+
+
+def get_face_cascade():
+    """
+    하르 캐스케이드를 한 번만 로드하고 이후 요청에서 재사용합니다.
+    CascadeClassifier는 스레드 간 공유가 안전하지 않으므로 스레드마다 별도 인스턴스를 둡니다.
+    """
+    face_cascade = getattr(_thread_state, "face_cascade", None)
+    if face_cascade is None:
+        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        _thread_state.face_cascade = face_cascade
+    return face_cascade
+
 
 # 시뮬레이션된 결과 생성 함수 추가 - 오류 발생 시 대체 데이터로 사용
 def generate_simulated_results(error_message):
@@ -51,7 +105,21 @@ def generate_simulated_results(error_message):
     }
 
 # 주파수 영역 HRV 지표를 계산하는 개선된 함수
-def calculate_frequency_domain_hrv(rr_intervals_ms):
+def calculate_frequency_domain_hrv(rr_intervals_ms, method=None):
+    """
+    RR 간격(ms)에서 (LF, HF, LF/HF)를 계산합니다.
+    method(RPPG_HRV_METHOD)가 "lomb"이면 보간 없이 불균일 RR 시계열에 Lomb-Scargle을 직접 적용하고,
+    기본값 "welch"는 4 Hz 3차 스플라인 보간 후 Welch PSD를 사용합니다.
+    """
+    if method is None:
+        method = os.environ.get("RPPG_HRV_METHOD", "welch")
+    if method == "lomb":
+        try:
+            return lomb_frequency_domain_hrv(rr_intervals_ms)
+        except Exception as e:
+            print(f"Error in HRV frequency domain calculation: {str(e)}", file=sys.stderr)
+            raise e
+
     try:
         # RR 간격을 초 단위로 변환
         rr_intervals_sec = rr_intervals_ms / 1000.0
@@ -73,25 +141,27 @@ def calculate_frequency_domain_hrv(rr_intervals_ms):
         t_interp = np.arange(0, t_rr[-1], 1.0/fs_interp)
             
         # 큐빅 스플라인 보간 (좀더 부드러운 결과)
-        f_interp = interpolate.interp1d(t_rr, rr_diff, kind='cubic', bounds_error=False, fill_value="extrapolate")
-        rr_interp = f_interp(t_interp)
+        dsp = get_backend()
+        rr_interp = dsp.cubic_interp(t_rr, rr_diff, t_interp)
         
         # 웰치 방법을 사용한 PSD 계산
         # nperseg 값 최적화: 주파수 해상도 vs 분산 트레이드오프
         nperseg = min(len(rr_interp), 256)  # 신호 길이보다는 작게, 하지만 충분한 해상도를 위해
         
-        fxx, pxx = signal.welch(rr_interp, fs=fs_interp, nperseg=nperseg, detrend='constant')
+        # 창 함수와 대역 마스크는 (fs, nperseg)별로 캐시된 플랜을 재사용
+        welch_plan = get_welch_plan(fs_interp, nperseg)
+        fxx, pxx = welch_plan.psd(rr_interp)
         
         # 관련 주파수 대역 필터링
-        lf_indices = np.logical_and(fxx >= 0.04, fxx <= 0.15)  # LF: 0.04-0.15 Hz
-        hf_indices = np.logical_and(fxx >= 0.15, fxx <= 0.4)   # HF: 0.15-0.4 Hz
+        lf_indices = welch_plan.lf_mask  # LF: 0.04-0.15 Hz
+        hf_indices = welch_plan.hf_mask  # HF: 0.15-0.4 Hz
         
         if not np.any(lf_indices) or not np.any(hf_indices):
             raise Exception("No valid frequency bands found for HRV analysis")
         
         # 파워 계산 (면적) - trapz 대신 trapezoid 사용
-        lf_power = trapezoid(pxx[lf_indices], fxx[lf_indices])
-        hf_power = trapezoid(pxx[hf_indices], fxx[hf_indices])
+        lf_power = dsp.trapezoid(pxx[lf_indices], fxx[lf_indices])
+        hf_power = dsp.trapezoid(pxx[hf_indices], fxx[hf_indices])
         
         # LF/HF 비율 계산
         if hf_power <= 0:
@@ -105,222 +175,896 @@ def calculate_frequency_domain_hrv(rr_intervals_ms):
         print(f"Error in HRV frequency domain calculation: {str(e)}", file=sys.stderr)
         raise e
 
+def processing_params():
+    """
+    결과에 영향을 주는 처리 설정. 캐시 키에 포함됩니다.
+    DSP 백엔드와 정밀도는 환경 변수 값이 아니라 실제로 선택된 값을 사용합니다 (auto 포함).
+    """
+    params = {name: os.environ.get(name) for name in
+              ("RPPG_FACE_MODE", "RPPG_DETECT_INTERVAL", "RPPG_DETECT_SCALE", "RPPG_HRV_METHOD")}
+    params.update({name: value for name, value in os.environ.items() if name.startswith("RPPG_QUALITY_")})
+    params["backend"] = get_backend().__name__.rsplit(".", 1)[-1]
+    params["precision"] = get_dtype().name
+    return params
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def analyze_frames_cached(items, load_frame, payload, budget=None, fps=20, frame_times=None):
+    """
+    프레임 내용(payload: 바이트/문자열 조각)과 처리 설정의 해시로 결과 캐시를 조회하고,
+    없으면 analyze_frames를 실행해 저장합니다. 결과에는 cached 플래그가 붙습니다.
+    실패(예외)나 예산 때문에 품질을 낮춘 결과는 저장하지 않습니다.
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return analyze_frames(items, load_frame, budget, fps, frame_times)
+
+    metrics = current_metrics()
+    with metrics.stage("hash"):
+        key = payload_key(payload, dict(processing_params(), fps=fps))
+
+    result = cache.get(key)
+    if result is not None:
+        metrics.count("cacheHits")
+        if budget is not None:
+            result["processing"] = budget.report()
+        result["cached"] = True
+        return result
+
+    metrics.count("cacheMisses")
+    result = analyze_frames(items, load_frame, budget, fps, frame_times)
+    if budget is None or not budget.degradations:
+        cache.put(key, {k: v for k, v in result.items() if k != "processing"})
+    result["cached"] = False
+    return result
+
+
+def quality_abort_result(error):
+    """품질 판정으로 중단된 세션의 결과. 기존 오류 경로처럼 시뮬레이션 값을 쓰되 사유 코드를 quality에 담습니다."""
+    print(f"Quality gate aborted processing ({error.reason}): {error}", file=sys.stderr)
+    current_metrics().count("qualityAborts")
+    return dict(generate_simulated_results(str(error)), quality=error.report())
+
+
+def decode_frame_buffer(buffer):
+    """JPEG 등으로 인코딩된 프레임 바이트를 파일을 거치지 않고 메모리에서 디코딩합니다."""
+    if isinstance(buffer, str):
+        # data URL 접두사가 붙은 base64 문자열도 허용
+        buffer = base64.b64decode(buffer.split(",", 1)[-1])
+    return cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def read_length_prefixed_frames(stream):
+    """
+    길이 접두사 스트림에서 인코딩된 프레임을 읽습니다.
+
+    각 프레임은 4바이트 빅엔디언 길이 + 프레임 바이트로 구성되며,
+    길이 0 또는 스트림 끝에서 종료합니다.
+    """
+    buffers = []
+    while True:
+        header = stream.read(4)
+        if len(header) < 4:
+            break
+        (length,) = struct.unpack(">I", header)
+        if length == 0:
+            break
+        buffer = stream.read(length)
+        if len(buffer) < length:
+            raise Exception(f"Truncated frame stream: expected {length} bytes, got {len(buffer)}")
+        buffers.append(buffer)
+    return buffers
+
+
 # Apple M1 호환성을 위해 pyVHR 의존성 우회
-def process_frames(frames_dir):
-    """Process frames using CPU-based rPPG and return heart rate and HRV metrics."""
-    try:
-        # Get all frame files and sort them
-        frame_files = sorted(glob.glob(os.path.join(frames_dir, "frame_*.jpg")))
-        
-        if not frame_files:
-            raise Exception("No frames found")
-        
-        print(f"Found {len(frame_files)} frames for processing", file=sys.stderr)
-        
-        # 얼굴 감지를 위한 OpenCV 하르 캐스케이드 사용 (CUDA 없이도 작동)
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
-        # 시간 경과에 따른 RGB 값을 저장할 리스트
-        r_values = []
-        g_values = []
-        b_values = []
-        timestamps = []  # 각 프레임의 시간(초) 추적
-        
-        fps = 20  # 20 fps로 설정 (50ms 간격으로 캡처)
-        frame_time = 1.0 / fps
-        
-        # 얼굴이 감지된 프레임 수를 카운트
-        face_detected_frames = 0
-        
-        for i, frame_file in enumerate(frame_files):
-            frame = cv2.imread(frame_file)
-            if frame is None:
-                continue
-                
-            # 현재 프레임의 타임스탬프 추가
-            timestamps.append(i * frame_time)
-            
-            # 그레이스케일로 변환하여 얼굴 감지
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-            
-            if len(faces) > 0:
-                # 가장 큰 얼굴 영역 선택
-                max_face = max(faces, key=lambda rect: rect[2] * rect[3])
-                (x, y, w, h) = max_face
-                
-                # 얼굴이 감지되었으므로 카운트 증가
-                face_detected_frames += 1
-                
-                # 얼굴 영역 추출
-                face_roi = frame[y:y+h, x:x+w]
-                
-                # 피부색 마스킹
-                # YCrCb 색상 공간에서 피부색 필터링
-                ycrcb = cv2.cvtColor(face_roi, cv2.COLOR_BGR2YCrCb)
-                lower = np.array([0, 133, 77], dtype=np.uint8)
-                upper = np.array([255, 173, 127], dtype=np.uint8)
-                mask = cv2.inRange(ycrcb, lower, upper)
-                
-                # 마스크를 적용하여 얼굴 ROI에서 피부 영역만 추출
-                skin = cv2.bitwise_and(face_roi, face_roi, mask=mask)
-                
-                # 피부 픽셀 수가 충분한 경우에만 처리
-                if np.sum(mask) > 1000:  # 마스크된 픽셀이 최소 1000개 이상
-                    # 각 채널별 평균 값 계산
-                    b, g, r = cv2.split(skin)
-                    r_values.append(np.sum(r) / np.sum(mask))
-                    g_values.append(np.sum(g) / np.sum(mask))
-                    b_values.append(np.sum(b) / np.sum(mask))
+def process_frames(frames_dir, budget_seconds=None, metrics=None, fps=None):
+    """
+    Process frames using CPU-based rPPG and return heart rate and HRV metrics.
+    frames_dir is a directory of frame_*.jpg files or a single-file session container (.rppg),
+    which is memory-mapped and read lazily with its own fps and timestamps.
+    fps is the capture rate; by default 20 for directories and the recorded rate for containers.
+    With budget_seconds (or RPPG_TIME_BUDGET) the work is degraded to finish within the budget.
+    With metrics (or RPPG_METRICS) per-stage timings and counters are reported.
+    """
+    budget = make_budget(budget_seconds)
+    mode = metrics_mode(metrics)
+    with collect(mode) as collector:
+        try:
+            if is_container(frames_dir):
+                container = SessionContainer(frames_dir)
+                if not len(container):
+                    raise Exception("No frames found")
+                print(f"Found {len(container)} frames in session container", file=sys.stderr)
+
+                result = analyze_frames_cached(
+                    list(range(len(container))), container.frame, container.key_chunks(), budget,
+                    fps=fps or container.fps, frame_times=container.timestamps)
+            else:
+                # Get all frame files and sort them
+                frame_files = sorted(glob.glob(os.path.join(frames_dir, "frame_*.jpg")))
+
+                if not frame_files:
+                    raise Exception("No frames found")
+
+                print(f"Found {len(frame_files)} frames for processing", file=sys.stderr)
+
+                if get_result_cache() is None:
+                    result = analyze_frames(frame_files, cv2.imread, budget, fps or 20)
                 else:
-                    # 얼굴이나 피부가 충분히 감지되지 않은 경우 타임스탬프 제거
-                    timestamps.pop()
-                    face_detected_frames -= 1  # 피부가 충분하지 않으므로, 카운트 다시 감소
-        
-        # 총 프레임 중 얼굴 감지 비율 계산
-        detection_ratio = face_detected_frames / len(frame_files) if frame_files else 0
-        print(f"Face detection ratio: {detection_ratio:.2f} ({face_detected_frames}/{len(frame_files)})", file=sys.stderr)
-        
-        # 충분한 프레임이 처리되었는지 확인
-        if len(r_values) < 10:
-            raise Exception(f"Not enough valid frames with face detected: {len(r_values)} frames")
-        
-        # timestamps 배열도 동일한 길이로 조정
-        timestamps = timestamps[:len(r_values)]
-        
-        # 신호 전처리 (정규화)
-        r_values = np.array(r_values)
-        g_values = np.array(g_values)
-        b_values = np.array(b_values)
-        timestamps = np.array(timestamps)
-        
-        # 신호 디트렌딩 (추세 제거)
-        r_detrended = detrend(r_values)
-        g_detrended = detrend(g_values)
-        b_detrended = detrend(b_values)
-        
-        # 정규화
-        r_normalized = (r_detrended - np.mean(r_detrended)) / np.std(r_detrended)
-        g_normalized = (g_detrended - np.mean(g_detrended)) / np.std(g_detrended)
-        b_normalized = (b_detrended - np.mean(b_detrended)) / np.std(b_detrended)
-        
-        # POS 알고리즘 구현
-        # Wang et al., "Algorithmic Principles of Remote PPG," 2017
-        h, w = 3, len(r_normalized)
-        X = np.vstack([r_normalized, g_normalized, b_normalized])
-        mean_color = np.mean(X, axis=1, keepdims=True)
-        
-        # 3x3 projection matrix - POS 알고리즘
-        S = np.array([[0, 1, -1], [-2, 1, 1]])
-        P = np.dot(S, X)
+                    # 파일을 한 번만 읽어 같은 바이트로 캐시 키를 만들고 프레임을 디코딩
+                    buffers = [_read_bytes(path) for path in frame_files]
+                    result = analyze_frames_cached(buffers, decode_frame_buffer, buffers, budget, fps=fps or 20)
+
+        except QualityAbort as e:
+            result = quality_abort_result(e)
+        except Exception as e:
+            # 오류 발생 시 시뮬레이션 데이터 반환 (백업)
+            print(f"Error processing frames: {str(e)}", file=sys.stderr)
+            result = generate_simulated_results(str(e))
+
+    return publish(result, collector, mode, source="framesDir")
+
+
+def process_encoded_frames(buffers, budget_seconds=None, metrics=None, fps=20):
+    """
+    Process in-memory encoded frames (bytes or base64 strings) captured at fps without a temp directory.
+    """
+    budget = make_budget(budget_seconds)
+    mode = metrics_mode(metrics)
+    with collect(mode) as collector:
+        try:
+            if not buffers:
+                raise Exception("No frames found")
+
+            print(f"Received {len(buffers)} in-memory frames for processing", file=sys.stderr)
+
+            buffers = list(buffers)
+            result = analyze_frames_cached(buffers, decode_frame_buffer, buffers, budget, fps=fps)
+
+        except QualityAbort as e:
+            result = quality_abort_result(e)
+        except Exception as e:
+            # 오류 발생 시 시뮬레이션 데이터 반환 (백업)
+            print(f"Error processing frames: {str(e)}", file=sys.stderr)
+            result = generate_simulated_results(str(e))
+
+    return publish(result, collector, mode, source="frames")
+
+
+def detect_face_roi(frame, scale=1.0):
+    """
+    하르 캐스케이드로 가장 큰 얼굴 영역 (x, y, w, h)를 찾고, 없으면 None을 반환합니다.
+    scale < 1이면 축소된 영상에서 감지한 뒤 원본 좌표로 되돌립니다.
+    """
+    # 그레이스케일로 변환하여 얼굴 감지
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    with current_metrics().stage("faceDetect"):
+        faces = get_face_cascade().detectMultiScale(gray, 1.3, 5)
+
+    if len(faces) == 0:
+        return None
+
+    # 가장 큰 얼굴 영역 선택
+    x, y, w, h = max(faces, key=lambda rect: rect[2] * rect[3])
+    if scale != 1.0:
+        return (int(x / scale), int(y / scale), int(w / scale), int(h / scale))
+    return (x, y, w, h)
+
+
+def get_skin_extractor():
+    """버퍼를 재사용하는 피부 신호 추출기를 스레드마다 하나씩 유지합니다."""
+    extractor = getattr(_thread_state, "skin_extractor", None)
+    if extractor is None:
+        extractor = SkinSignalExtractor()
+        _thread_state.skin_extractor = extractor
+    return extractor
+
+
+def extract_frame_signal(frame, detect_scale=1.0):
+    """
+    단일 BGR 프레임에서 얼굴 하위 영역별 피부 평균 RGB, 피부 픽셀 수, 하위 영역 면적 (means, counts, area)를 반환합니다.
+    얼굴이 감지되지 않거나 피부 픽셀이 부족하면 None을 반환합니다.
+    """
+    if frame is None:
+        return None
+
+    roi = detect_face_roi(frame, detect_scale)
+    if roi is None:
+        return None
+
+    with current_metrics().stage("skinMask"):
+        return get_skin_extractor().extract(frame, roi)
+
+
+def _load_frame(load_frame, item):
+    """프레임 하나를 디코딩하고 디코딩 시간과 처리한 픽셀 수를 기록합니다."""
+    metrics = current_metrics()
+    with metrics.stage("decode"):
+        frame = load_frame(item)
+    if frame is not None:
+        metrics.count("pixelsProcessed", frame.shape[0] * frame.shape[1])
+    return frame
+
+
+def _extract_item(load_frame, item, detect_scale=1.0):
+    """프레임 로드(디코딩)와 RGB 추출을 한 작업 단위로 묶어 풀에서 실행합니다."""
+    return extract_frame_signal(_load_frame(load_frame, item), detect_scale)
+
+
+def get_extraction_pool(workers, pool_kind="thread"):
+    """추출 단계용 스레드/프로세스 풀을 워커 수명 동안 재사용합니다."""
+    key = (pool_kind, workers)
+    if key not in _extraction_pools:
+        if pool_kind == "process":
+            _extraction_pools[key] = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _extraction_pools[key] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rppg-extract")
+    return _extraction_pools[key]
+
+
+def _iter_ordered(pool, fn, items, window):
+    """입력 순서대로 결과를 내보내되 동시에 진행 중인 작업을 window개로 제한합니다."""
+    pending = collections.deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def make_face_tracker(detect_scale):
+    return FaceTracker(
+        get_face_cascade(),
+        detect_interval=int(os.environ.get("RPPG_DETECT_INTERVAL", 10)),
+        detect_scale=detect_scale,
+    )
+
+
+def _extract_tracked(items, load_frame, workers, detect_scale, tracker=None):
+    """
+    추적 모드: 디코딩은 풀에서 미리 진행하고, 얼굴 ROI는 FaceTracker로 순차 추적합니다.
+    추적은 이전 프레임에 의존하므로 감지/추적 자체는 한 스레드에서 실행됩니다.
+    tracker를 넘기면 (업로드 세션처럼) 호출 사이에 추적 상태를 이어갑니다.
+    """
+    if tracker is None:
+        tracker = make_face_tracker(detect_scale)
+
+    load = functools.partial(_load_frame, load_frame)
+    if workers <= 1:
+        frames = (load(item) for item in items)
+    else:
+        frames = _iter_ordered(get_extraction_pool(workers), bind_metrics(load), items, window=workers * 2)
+
+    metrics = current_metrics()
+    extractor = get_skin_extractor()
+    results = []
+    for frame in frames:
+        if frame is None:
+            results.append(None)
+            continue
+        with metrics.stage("faceDetect"):
+            roi = tracker.update(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        if roi is None:
+            results.append(None)
+            continue
+        with metrics.stage("skinMask"):
+            results.append(extractor.extract(frame, roi))
+
+    return results, dict(mode="track", **tracker.stats())
+
+
+def _extract_results(items, load_frame, workers, pool_kind, face_mode, detect_scale):
+    """선택된 얼굴 모드로 항목별 (means, counts, area) 또는 None 목록과 감지 통계를 반환합니다."""
+    if face_mode == "track":
+        return _extract_tracked(items, load_frame, workers, detect_scale)
+
+    extract = functools.partial(_extract_item, load_frame, detect_scale=detect_scale)
+    if workers <= 1:
+        results = [extract(item) for item in items]
+    else:
+        # executor.map은 입력 순서대로 결과를 반환
+        # 스레드 풀 작업은 요청의 수집기에 묶음 (프로세스 풀은 별도 프로세스라 지표가 모이지 않음)
+        if pool_kind == "process":
+            chunksize = max(1, len(items) // (workers * 4))
+        else:
+            chunksize, extract = 1, bind_metrics(extract)
+        results = list(get_extraction_pool(workers, pool_kind).map(extract, items, chunksize=chunksize))
+
+    return results, {"mode": "detect", "frames": len(items), "detections": len(items)}
+
+
+def _merge_face_stats(a, b):
+    merged = dict(a)
+    for key, value in b.items():
+        if key != "mode" and key in merged:
+            merged[key] = merged[key] + value
+    if "detectRate" in merged:
+        merged["detectRate"] = merged["detections"] / merged["frames"] if merged["frames"] else 0.0
+    return merged
+
+
+def _extract_with_budget(items, load_frame, fps, budget, workers, pool_kind, face_mode, detect_scale,
+                         probe=None):
+    """
+    처음 몇 프레임으로 프레임당 비용을 측정한 뒤, 예산 안에 끝나도록 감지 해상도 저하/프레임 솎아내기/
+    뒷부분 절단을 결정하고 나머지를 처리합니다. (원래 인덱스, 결과) 목록, 감지 통계, 실효 fps를 반환합니다.
+    probe((결과, 감지 통계))가 주어지면 이미 추출된 선행 구간(품질 판정용)으로 비용을 측정합니다.
+    """
+    if probe is None:
+        with budget.stage("probe"):
+            probe = _extract_results(
+                items[:PROBE_FRAMES], load_frame, workers, pool_kind, face_mode, detect_scale)
+    probe_results, face_stats = probe
+    probe_n = len(probe_results)
+    per_frame = budget.stages["probe"] / probe_n if probe_n else 0.0
+
+    # 솎아낸 뒤에도 fps가 심박수 대역 상한의 나이퀴스트 조건(여유 10%)을 만족해야 함
+    max_stride = max(1, int(fps / (2 * HR_BAND[1] * 1.1)))
+    downscale, stride, n_rest = plan_extraction(budget, per_frame, len(items) - probe_n, max_stride)
+
+    if downscale:
+        detect_scale *= 0.5
+        budget.degrade("detectScale", scale=detect_scale)
+    if stride > 1:
+        budget.degrade("decimate", stride=stride, fps=fps / stride)
+    if n_rest < len(items) - probe_n:
+        budget.degrade("truncate", frames=probe_n + n_rest, of=len(items))
+
+    indexed = [(i, r) for i, r in enumerate(probe_results) if i % stride == 0]
+    rest_idx = [i for i in range(probe_n, probe_n + n_rest) if i % stride == 0]
+    if rest_idx:
+        with budget.stage("extract"):
+            rest_results, rest_stats = _extract_results(
+                [items[i] for i in rest_idx], load_frame, workers, pool_kind, face_mode, detect_scale)
+        indexed += list(zip(rest_idx, rest_results))
+        face_stats = _merge_face_stats(face_stats, rest_stats)
+
+    return indexed, face_stats, fps / stride
+
+
+def extract_skin_signals(items, load_frame, fps=20, workers=None, pool_kind=None, face_mode=None, budget=None,
+                         gate=None, frame_times=None):
+    """
+    프레임별 디코딩/얼굴 감지/피부 마스킹/채널 평균을 병렬로 수행합니다.
+
+    items는 load_frame에 전달될 프레임 소스(파일 경로, 인코딩된 바이트 등)입니다.
+    OpenCV 호출 대부분이 GIL을 해제하므로 기본은 스레드 풀을 사용하며,
+    RPPG_EXTRACT_WORKERS / RPPG_EXTRACT_POOL(thread|process) 환경 변수로 조정할 수 있습니다.
+    face_mode(RPPG_FACE_MODE)가 "track"이면 K 프레임마다만 감지하고 그 사이는 추적하며,
+    "detect"이면 모든 프레임에서 하르 감지를 수행합니다.
+    budget(ProcessingBudget)이 주어지면 예산 안에 끝나도록 품질을 단계적으로 낮춥니다.
+    gate(QualityGate)가 주어지면 선행 구간을 먼저 추출해 검사하고, 얼굴이나 피부가 부족한 세션은
+    나머지 프레임을 처리하기 전에 QualityAbort로 중단합니다.
+    결과는 원래 프레임 순서를 유지하며, 유효한 프레임에 대해 (frames, n_rois, 3) RGB 평균,
+    (frames, n_rois) 피부 픽셀 수, 타임스탬프, 얼굴 감지 통계와 실효 fps를 반환합니다.
+    frame_times(항목별 캡처 시각, 초)가 없으면 타임스탬프는 프레임 번호 / fps입니다.
+    """
+    if workers is None:
+        workers = int(os.environ.get("RPPG_EXTRACT_WORKERS", os.cpu_count() or 1))
+    if pool_kind is None:
+        pool_kind = os.environ.get("RPPG_EXTRACT_POOL", "thread")
+    if face_mode is None:
+        face_mode = os.environ.get("RPPG_FACE_MODE", "track")
+
+    detect_scale = float(os.environ.get("RPPG_DETECT_SCALE", 0.5)) if face_mode == "track" else 1.0
+
+    head = None
+    if gate is not None and gate.applies_to(len(items)):
+        with budget.stage("probe") if budget is not None else contextlib.nullcontext():
+            head = _extract_results(
+                items[:gate.head_frames], load_frame, workers, pool_kind, face_mode, detect_scale)
+        with current_metrics().stage("quality"):
+            gate.check_head(head[0], lambda rgb, fps_: estimate_heart_rate(rgb, fps_)["snr"])
+
+    if budget is None:
+        if head is None:
+            results, face_stats = _extract_results(items, load_frame, workers, pool_kind, face_mode, detect_scale)
+        else:
+            rest, rest_stats = _extract_results(
+                items[len(head[0]):], load_frame, workers, pool_kind, face_mode, detect_scale)
+            results, face_stats = list(head[0]) + list(rest), _merge_face_stats(head[1], rest_stats)
+        indexed = list(enumerate(results))
+        effective_fps = fps
+    else:
+        indexed, face_stats, effective_fps = _extract_with_budget(
+            items, load_frame, fps, budget, workers, pool_kind, face_mode, detect_scale, probe=head)
+
+    if face_mode == "track":
+        print(f"Face tracking: {face_stats['detections']} detections "
+              f"({face_stats['redetections']} re-detections) over {face_stats['frames']} frames", file=sys.stderr)
+
+    frame_time = 1.0 / fps
+    n_rois = len(get_skin_extractor().names)
+    valid = [(i, signal_) for i, signal_ in indexed if signal_ is not None]
+
+    metrics = current_metrics()
+    metrics.count("frames", len(items))
+    metrics.count("framesDropped", len(items) - len(valid))
+    metrics.count("faceDetections", face_stats["detections"])
+    metrics.count("redetections", face_stats.get("redetections", 0))
+    if frame_times is None:
+        timestamps = np.array([i * frame_time for i, _ in valid])
+    else:
+        timestamps = np.array([frame_times[i] for i, _ in valid], dtype=np.float64)
+    roi_means = np.array([signal_[0] for _, signal_ in valid]).reshape(-1, n_rois, 3)
+    roi_counts = np.array([signal_[1] for _, signal_ in valid]).reshape(-1, n_rois)
+
+    return roi_means, roi_counts, timestamps, face_stats, effective_fps
+
+
+def analyze_frames(items, load_frame, budget=None, fps=20, frame_times=None):
+    """
+    프레임 소스 목록에서 심박수와 HRV 지표를 계산합니다.
+
+    프레임 입력 방식(디렉토리/메모리)과 무관한 공통 처리 단계이며, 실패 시 예외를 발생시킵니다.
+    load_frame은 항목 하나를 BGR 프레임으로 디코딩하며, 실패 시 None을 반환할 수 있습니다.
+    budget(ProcessingBudget)이 주어지면 시간 예산에 맞춰 품질을 낮추고 결과에 processing 요약을 포함합니다.
+    fps는 캡처 속도(기본 20 fps, 50ms 간격)이며, frame_times가 있으면 RR 간격은 실제 캡처 시각으로 계산합니다.
+    """
+
+    # 하위 ROI별 RGB 평균 (frames x ROIs x 3)과 각 프레임의 시간(초)
+    # 예산이 부족해 프레임을 솎아낸 경우 이후 단계는 실효 fps를 사용
+    gate = QualityGate.from_env(fps)
+    roi_means, roi_counts, timestamps, face_stats, fps = extract_skin_signals(
+        items, load_frame, fps=fps, budget=budget, gate=gate, frame_times=frame_times)
+
+    return analyze_signals(roi_means, roi_counts, timestamps, len(items), face_stats, fps, budget, gate)
+
+
+def analyze_signals(roi_means, roi_counts, timestamps, total_frames, face_stats, fps, budget=None, gate=None):
+    """
+    프레임별로 축약된 피부 신호(ROI별 RGB 평균, 피부 픽셀 수, 타임스탬프)에서 심박수와 HRV 지표를 계산합니다.
+    analyze_frames와 업로드 세션의 마무리 단계가 공유합니다.
+    gate(QualityGate)가 주어지면 대역 SNR이 낮을 때 피크/HRV 단계를 생략하고 심박수만 반환합니다 (hrv는 None).
+    """
+    # 피부 픽셀 수로 가중 평균하여 POS 입력용 RGB 트레이스 생성
+    rgb = combine_roi_traces(roi_means, roi_counts)
+    r_values, g_values, b_values = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+
+    # 얼굴과 충분한 피부가 감지된 프레임 수
+    face_detected_frames = len(r_values)
+
+    # 총 프레임 중 얼굴 감지 비율 계산
+    detection_ratio = face_detected_frames / total_frames if total_frames else 0
+    print(f"Face detection ratio: {detection_ratio:.2f} ({face_detected_frames}/{total_frames})", file=sys.stderr)
+    
+    # 충분한 프레임이 처리되었는지 확인
+    if len(r_values) < 10:
+        raise Exception(f"Not enough valid frames with face detected: {len(r_values)} frames")
+    
+    # 디트렌딩 → 정규화 → POS → 버터워스 대역 통과 필터 → FFT (heartrate.py와 공유)
+    estimate = estimate_heart_rate(np.vstack([r_values, g_values, b_values]), fps)
+    pos_signal = estimate["pos"]
+    heart_rate = estimate["heartRate"]
+    confidence = estimate["confidence"]
+
+    # 심박수 범위 내 주파수 성분이 있는 경우에만 진행
+    if heart_rate is not None:
+        print(f"Estimated heart rate: {heart_rate:.1f} BPM (confidence: {confidence:.2f}, "
+              f"SNR: {estimate['snr']:.1f} dB)", file=sys.stderr)
+        if gate is not None and not gate.check_snr(estimate["snr"]):
+            # 맥박 SNR이 낮으면 개별 박동(RR 간격)을 믿을 수 없으므로 HRV 없이 심박수만 반환
+            print("Low pulse SNR; skipping peaks and HRV", file=sys.stderr)
+            current_metrics().count("qualityLowSnr")
+            result = {
+                "heartRate": float(heart_rate),
+                "confidence": float(confidence),
+                "hrv": None,
+                "faceTracking": face_stats,
+                "quality": gate.report(),
+            }
+            if budget is not None:
+                result["processing"] = budget.report()
+            return result
         
-        # POS 신호 계산
-        pos_signal = P[0, :] + ((np.std(P[0, :]) / np.std(P[1, :])) * P[1, :])
+        # 피크 감지를 통한 R-R interval 추출
+        # 필터링된 신호에서 심박 피크 찾기 (세밀한 피크 감지를 위해 필터 변경)
+        with current_metrics().stage("peaks"):
+            filtered_for_peaks = get_plan(fps, len(pos_signal), (0.8, 3.5)).filtfilt(pos_signal)
+            
+            # 피크 감지 - 더 민감하게 설정
+            prominence = np.std(filtered_for_peaks) * 0.3  # 표준 편차 기반 임계값
+            distance = int(fps * 60 / heart_rate * 0.65)  # 예상되는 심박 간격의 65%를 최소 거리로 설정
+            peaks, props = get_backend().find_peaks(filtered_for_peaks, distance=distance, prominence=prominence)
         
-        # 버터워스 밴드패스 필터 적용
-        low_cutoff = 0.7  # 42 BPM
-        high_cutoff = 4.0  # 240 BPM
-        nyquist = fps / 2
-        b, a = signal.butter(3, [low_cutoff/nyquist, high_cutoff/nyquist], btype='band')
-        filtered_signal = signal.filtfilt(b, a, pos_signal)
+            # 포물선 보간으로 피크를 샘플 사이 위치까지 보정하고 캡처 시각을 보간
+            # (정수 인덱스면 RR 분해능이 1/fps로 제한되어 10-15 fps에서는 pNN50 임계값(50 ms)보다 거칢)
+            peak_times = np.interp(refine_peaks(filtered_for_peaks, peaks), np.arange(len(timestamps)), timestamps)
         
-        # FFT로 주파수 분석
-        fft_size = len(filtered_signal)
-        fft_result = np.abs(np.fft.rfft(filtered_signal))
-        freqs = np.fft.rfftfreq(fft_size, d=1.0/fps)
+        print(f"Detected {len(peaks)} peaks", file=sys.stderr)
         
-        # 심박수 범위 내 주파수로 제한
-        mask = (freqs >= 0.7) & (freqs <= 4.0)
-        if np.any(mask):
-            idx = np.argmax(fft_result[mask])
-            dominant_freq = freqs[mask][idx]
-            heart_rate = dominant_freq * 60  # BPM으로 변환
+        # 피크 간격을 밀리초 단위로 변환 (RR 간격)
+        if len(peaks) > 1:
+            rr_intervals_sec = np.diff(peak_times)
+            rr_intervals_ms = rr_intervals_sec * 1000  # 밀리초 단위로 변환
             
-            # 신호 강도 기반으로 신뢰도 계산
-            max_amplitude = fft_result[mask][idx]
-            total_power = np.sum(fft_result[mask])
-            confidence = max_amplitude / total_power if total_power > 0 else 0
+            # HRV 지표 계산을 위해 이상치 제거
+            # 45-155% 범위를 벗어나는 RR 간격 제거 (범위를 더 완화)
+            rr_mean = np.mean(rr_intervals_ms)
+            valid_rr = rr_intervals_ms[(rr_intervals_ms > 0.45 * rr_mean) & (rr_intervals_ms < 1.55 * rr_mean)]
             
-            print(f"Estimated heart rate: {heart_rate:.1f} BPM (confidence: {confidence:.2f})", file=sys.stderr)
+            print(f"Valid RR intervals: {len(valid_rr)} out of {len(rr_intervals_ms)}", file=sys.stderr)
             
-            # 피크 감지를 통한 R-R interval 추출
-            # 필터링된 신호에서 심박 피크 찾기 (세밀한 피크 감지를 위해 필터 변경)
-            b_rpeaks, a_rpeaks = signal.butter(3, [0.8/nyquist, 3.5/nyquist], btype='band')
-            filtered_for_peaks = signal.filtfilt(b_rpeaks, a_rpeaks, pos_signal)
+            # RR 간격이 부족하면 오류 발생
+            if len(valid_rr) < 3:
+                raise Exception(f"Not enough valid RR intervals detected: {len(valid_rr)} intervals")
             
-            # 피크 감지 - 더 민감하게 설정
-            prominence = np.std(filtered_for_peaks) * 0.3  # 표준 편차 기반 임계값
-            distance = int(fps * 60 / heart_rate * 0.65)  # 예상되는 심박 간격의 65%를 최소 거리로 설정
-            peaks, props = signal.find_peaks(filtered_for_peaks, distance=distance, prominence=prominence)
+            # 시간 영역 HRV 지표 계산
+            # 1. SDNN (Standard Deviation of NN intervals)
+            sdnn = np.std(valid_rr, ddof=1)
+            
+            # 2. RMSSD (Root Mean Square of Successive Differences)
+            rmssd = np.sqrt(np.mean(np.square(np.diff(valid_rr)))) if len(valid_rr) > 1 else 0
             
-            print(f"Detected {len(peaks)} peaks", file=sys.stderr)
+            # 3. pNN50 (Percentage of successive RR intervals that differ by more than 50 ms)
+            diff_rr = np.abs(np.diff(valid_rr)) if len(valid_rr) > 1 else []
+            nn50 = sum(diff_rr > 50) if len(diff_rr) > 0 else 0
+            pnn50 = (nn50 / len(diff_rr)) * 100 if len(diff_rr) > 0 else 0
             
-            # 피크 간격을 밀리초 단위로 변환 (RR 간격)
-            if len(peaks) > 1:
-                rr_intervals_sec = np.diff(timestamps[peaks])
-                rr_intervals_ms = rr_intervals_sec * 1000  # 밀리초 단위로 변환
-                
-                # HRV 지표 계산을 위해 이상치 제거
-                # 45-155% 범위를 벗어나는 RR 간격 제거 (범위를 더 완화)
-                rr_mean = np.mean(rr_intervals_ms)
-                valid_rr = rr_intervals_ms[(rr_intervals_ms > 0.45 * rr_mean) & (rr_intervals_ms < 1.55 * rr_mean)]
-                
-                print(f"Valid RR intervals: {len(valid_rr)} out of {len(rr_intervals_ms)}", file=sys.stderr)
-                
-                # RR 간격이 부족하면 오류 발생
-                if len(valid_rr) < 3:
-                    raise Exception(f"Not enough valid RR intervals detected: {len(valid_rr)} intervals")
-                
-                # 시간 영역 HRV 지표 계산
-                # 1. SDNN (Standard Deviation of NN intervals)
-                sdnn = np.std(valid_rr, ddof=1)
-                
-                # 2. RMSSD (Root Mean Square of Successive Differences)
-                rmssd = np.sqrt(np.mean(np.square(np.diff(valid_rr)))) if len(valid_rr) > 1 else 0
-                
-                # 3. pNN50 (Percentage of successive RR intervals that differ by more than 50 ms)
-                diff_rr = np.abs(np.diff(valid_rr)) if len(valid_rr) > 1 else []
-                nn50 = sum(diff_rr > 50) if len(diff_rr) > 0 else 0
-                pnn50 = (nn50 / len(diff_rr)) * 100 if len(diff_rr) > 0 else 0
-                
-                # 주파수 영역 HRV 지표 계산
-                lf_power, hf_power, lf_hf_ratio = calculate_frequency_domain_hrv(valid_rr)
-                
-                # 최종 결과 반환
-                return {
-                    "heartRate": float(heart_rate),
-                    "confidence": float(confidence),
-                    "hrv": {
-                        "sdnn": float(sdnn),
-                        "rmssd": float(rmssd),
-                        "pnn50": float(pnn50),
-                        "lf": float(lf_power),
-                        "hf": float(hf_power),
-                        "lfHfRatio": float(lf_hf_ratio)
-                    }
-                }
+            # 주파수 영역 HRV 지표 계산 (예산이 거의 남지 않았으면 생략)
+            if budget is not None and budget.remaining() < HRV_RESERVE_SECONDS:
+                budget.degrade("skipFrequencyHrv")
+                lf_power = hf_power = lf_hf_ratio = None
             else:
-                # 피크가 충분하지 않은 경우
-                raise Exception("Not enough peaks detected for HRV calculation")
+                with current_metrics().stage("hrv"):
+                    lf_power, hf_power, lf_hf_ratio = calculate_frequency_domain_hrv(valid_rr)
+            
+            # 최종 결과 반환
+            result = {
+                "heartRate": float(heart_rate),
+                "confidence": float(confidence),
+                "hrv": {
+                    "sdnn": float(sdnn),
+                    "rmssd": float(rmssd),
+                    "pnn50": float(pnn50),
+                    "lf": _optional_float(lf_power),
+                    "hf": _optional_float(hf_power),
+                    "lfHfRatio": _optional_float(lf_hf_ratio)
+                },
+                "faceTracking": face_stats
+            }
+            if gate is not None:
+                result["quality"] = gate.report()
+            if budget is not None:
+                result["processing"] = budget.report()
+            return result
         else:
-            # 유효한 주파수 대역폭이 없는 경우
-            raise Exception("No valid frequency components found in the expected heart rate range")
-    
-    except Exception as e:
-        # 오류 발생 시 시뮬레이션 데이터 반환 (백업)
-        print(f"Error processing frames: {str(e)}", file=sys.stderr)
-        return generate_simulated_results(str(e))
+            # 피크가 충분하지 않은 경우
+            raise Exception("Not enough peaks detected for HRV calculation")
+    else:
+        # 유효한 주파수 대역폭이 없는 경우
+        raise Exception("No valid frequency components found in the expected heart rate range")
+
+
+def _optional_float(value):
+    return None if value is None else float(value)
+
+
+def make_budget(budget_seconds=None):
+    """요청의 예산(초) 또는 RPPG_TIME_BUDGET 환경 변수로 ProcessingBudget을 만듭니다. 둘 다 없으면 None."""
+    if budget_seconds is None:
+        budget_seconds = os.environ.get("RPPG_TIME_BUDGET")
+    return ProcessingBudget(float(budget_seconds)) if budget_seconds else None
+
+
+def process_stream_chunk(stream_id, buffers, fps=20, end=False):
+    """
+    스트리밍 측정의 프레임 청크 하나를 처리하고 그동안 갱신된 심박수를 반환합니다.
+
+    스트림별로 얼굴 추적기, 피부 추출기, StreamingHeartRateEstimator 상태를 유지하므로
+    청크마다 해당 청크의 프레임만 처리합니다. end가 참이면 상태를 해제합니다.
+    end 없이 끊긴 스트림은 STREAM_TTL_SECONDS 뒤에 폐기되며, 스트림이 MAX_STREAMS개를 넘으면
+    가장 오래 청크가 없던 스트림부터 폐기합니다.
+    """
+    _expire_streams()
+    state = _streams.get(stream_id)
+    if state is None:
+        while len(_streams) >= MAX_STREAMS:
+            oldest = min(_streams, key=lambda key: _streams[key]["touched"])
+            print(f"Stream {oldest} evicted (more than {MAX_STREAMS} open streams)", file=sys.stderr)
+            _streams.pop(oldest)
+        state = {
+            "tracker": FaceTracker(get_face_cascade()),
+            "extractor": SkinSignalExtractor(),
+            "estimator": StreamingHeartRateEstimator(fps),
+            "last_rgb": None,
+        }
+        _streams[stream_id] = state
+    state["touched"] = time.monotonic()
+
+    rgb = []
+    for buffer in buffers:
+        frame = decode_frame_buffer(buffer)
+        signal_ = None
+        if frame is not None:
+            roi = state["tracker"].update(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            if roi is not None:
+                signal_ = state["extractor"].extract(frame, roi)
+
+        if signal_ is not None:
+            means, counts, _ = signal_
+            state["last_rgb"] = combine_roi_traces(means[None], counts[None])[0]
+        # 얼굴을 놓친 프레임은 직전 값으로 채워 시간축을 유지
+        if state["last_rgb"] is not None:
+            rgb.append(state["last_rgb"])
+
+    estimator = state["estimator"]
+    updates = estimator.push(np.array(rgb)) if rgb else []
+    result = dict(estimator.snapshot(), updates=updates)
+
+    if end:
+        _streams.pop(stream_id, None)
+    return result
+
+
+def _expire_streams():
+    now = time.monotonic()
+    for stream_id, state in list(_streams.items()):
+        if now - state["touched"] > STREAM_TTL_SECONDS:
+            print(f"Stream {stream_id} expired", file=sys.stderr)
+            _streams.pop(stream_id, None)
+
+
+class UploadSession:
+    """
+    녹화 중 청크로 도착하는 프레임을 즉시 ROI별 RGB 평균, 피부 픽셀 수, 타임스탬프로 축약하고 픽셀은 버립니다.
+    세션이 보관하는 것은 프레임당 스칼라 몇 개뿐이므로 메모리는 프레임 수에만 비례하며,
+    얼굴 추적 상태가 청크 사이에 이어지므로 마무리 시에는 심박수/HRV 계산만 남습니다.
+    선행 구간이 품질 판정을 통과하지 못하면 이후 청크는 추출하지 않고 진행 응답에 사유를 담습니다.
+    """
+
+    def __init__(self, fps=20):
+        try:
+            self.fps = float(fps)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid fps: {fps!r}") from None
+        if not np.isfinite(self.fps) or self.fps <= 0:
+            raise ValueError(f"fps must be a positive number, got {fps!r}")
+        self.tracker = make_face_tracker(float(os.environ.get("RPPG_DETECT_SCALE", 0.5)))
+        self.n_rois = len(get_skin_extractor().names)
+        self._means = []       # 청크별 (valid, n_rois, 3)
+        self._counts = []      # 청크별 (valid, n_rois)
+        self._timestamps = []  # 청크별 (valid,) 초
+        self.frames = 0
+        self.valid_frames = 0
+        self.touched = time.monotonic()
+        self.gate = QualityGate.from_env(fps)
+        self._head = [] if self.gate is not None else None  # 판정 전까지 보관하는 선행 구간 결과
+        self.quality_error = None
+
+    def append(self, buffers, timestamps_ms=None):
+        """
+        인코딩된 프레임 청크를 축약해 추가합니다. timestamps_ms(세션 시작 기준 캡처 시각, ms)가 없으면
+        프레임 번호 / fps를 사용합니다.
+        """
+        if timestamps_ms is not None and len(timestamps_ms) != len(buffers):
+            raise ValueError(f"Expected {len(buffers)} timestamps, got {len(timestamps_ms)}")
+
+        if self.quality_error is not None:
+            self.frames += len(buffers)
+            self.touched = time.monotonic()
+            return self._progress()
+
+        workers = int(os.environ.get("RPPG_EXTRACT_WORKERS", os.cpu_count() or 1))
+        results, _ = _extract_tracked(buffers, decode_frame_buffer, workers, self.tracker.detect_scale,
+                                      tracker=self.tracker)
+        self._check_head(results)
+        if timestamps_ms is None:
+            times = (self.frames + np.arange(len(buffers))) / self.fps
+        else:
+            times = np.asarray(timestamps_ms, dtype=np.float64) / 1000.0
+
+        valid = [k for k, signal_ in enumerate(results) if signal_ is not None]
+        if valid:
+            self._means.append(np.array([results[k][0] for k in valid]).reshape(-1, self.n_rois, 3))
+            self._counts.append(np.array([results[k][1] for k in valid]).reshape(-1, self.n_rois))
+            self._timestamps.append(times[valid])
+
+        metrics = current_metrics()
+        metrics.count("frames", len(buffers))
+        metrics.count("framesDropped", len(buffers) - len(valid))
+
+        self.frames += len(buffers)
+        self.valid_frames += len(valid)
+        self.touched = time.monotonic()
+        return self._progress()
+
+    def _check_head(self, results):
+        if self._head is None:
+            return
+        self._head.extend(results)
+        if len(self._head) < self.gate.head_frames:
+            return
+        try:
+            with current_metrics().stage("quality"):
+                self.gate.check_head(self._head[:self.gate.head_frames],
+                                     lambda rgb, fps_: estimate_heart_rate(rgb, fps_)["snr"])
+        except QualityAbort as e:
+            self.quality_error = e
+        self._head = None
+
+    def _progress(self):
+        progress = {"frames": self.frames, "validFrames": self.valid_frames}
+        if self.quality_error is not None:
+            progress["quality"] = self.quality_error.report()
+        return progress
+
+    def finalize(self, budget=None):
+        """누적된 피부 신호로 심박수와 HRV 지표를 계산합니다. 품질 판정에 실패한 세션은 QualityAbort."""
+        if self.quality_error is not None:
+            raise self.quality_error
+        face_stats = dict(mode="track", **self.tracker.stats())
+        metrics = current_metrics()
+        metrics.count("faceDetections", face_stats["detections"])
+        metrics.count("redetections", face_stats["redetections"])
+
+        roi_means = np.concatenate(self._means) if self._means else np.zeros((0, self.n_rois, 3))
+        roi_counts = np.concatenate(self._counts) if self._counts else np.zeros((0, self.n_rois))
+        timestamps = np.concatenate(self._timestamps) if self._timestamps else np.zeros(0)
+        return analyze_signals(roi_means, roi_counts, timestamps, self.frames, face_stats, self.fps, budget,
+                               self.gate)
+
+
+def _expire_upload_sessions():
+    now = time.monotonic()
+    for session_id, session in list(_upload_sessions.items()):
+        if now - session.touched > UPLOAD_SESSION_TTL_SECONDS:
+            print(f"Upload session {session_id} expired", file=sys.stderr)
+            _upload_sessions.pop(session_id, None)
+
+
+def process_upload_session(session_id, op, buffers=None, timestamps=None, fps=20,
+                           budget_seconds=None, metrics=None):
+    """
+    청크 업로드 세션 요청 하나를 처리합니다.
+
+    op가 "open"이면 세션을 만들고, "chunk"이면 프레임을 축약해 누적하며 진행 상황을 반환하고,
+    "finalize"이면 심박수/HRV 결과를 반환한 뒤 세션을 해제합니다. "abort"는 결과 없이 해제합니다.
+    finalize가 실패하면 process_frames와 같이 시뮬레이션 결과로 대체합니다.
+    """
+    _expire_upload_sessions()
+
+    if op == "open":
+        _upload_sessions[session_id] = UploadSession(fps)
+        return {"session": session_id, "frames": 0, "validFrames": 0}
+
+    session = _upload_sessions.get(session_id)
+    if session is None:
+        raise ValueError(f"Unknown upload session: {session_id}")
+
+    if op == "abort":
+        _upload_sessions.pop(session_id, None)
+        return {"session": session_id, "aborted": True}
+
+    mode = metrics_mode(metrics)
+    if op == "chunk":
+        with collect(mode) as collector:
+            progress = session.append(buffers or [], timestamps)
+        return publish(dict(session=session_id, **progress), collector, mode, source="sessionChunk")
+
+    if op == "finalize":
+        _upload_sessions.pop(session_id, None)
+        budget = make_budget(budget_seconds)
+        with collect(mode) as collector:
+            try:
+                print(f"Finalizing upload session {session_id}: {session.valid_frames}/{session.frames} "
+                      f"frames with skin signal", file=sys.stderr)
+                result = session.finalize(budget)
+            except QualityAbort as e:
+                result = quality_abort_result(e)
+            except Exception as e:
+                print(f"Error processing frames: {str(e)}", file=sys.stderr)
+                result = generate_simulated_results(str(e))
+        return publish(result, collector, mode, source="session")
+
+    raise ValueError(f"Unknown upload session op: {op}")
+
+
+def run_worker(input_stream=None, output_stream=None):
+    """
+    JSON-lines 워커 루프를 실행합니다.
+
+    요청마다 인터프리터를 새로 띄우지 않도록 한 프로세스가 stdin에서 한 줄에 하나씩
+    {"id": ..., "framesDir": ...} 또는 {"id": ..., "frames": [base64 JPEG, ...]} 요청(캡처 속도 "fps"는 선택)을 읽고
+    {"id": ..., "result": {...}} 한 줄로 응답합니다.
+    {"id": ..., "stream": <스트림 ID>, "frames": [...], "fps": 20, "end": false} 요청은
+    스트리밍 추정기에 청크를 추가하고 실시간 심박수 갱신을 반환합니다.
+    {"id": ..., "session": <세션 ID>, "op": "open"|"chunk"|"finalize"|"abort", "frames": [...],
+    "timestamps": [ms, ...]} 요청은 녹화 중 청크를 업로드하는 세션을 처리합니다 (UploadSession).
+    요청에 "budget"(초), "metrics"(true/"result"/"stderr"/"both")를 지정할 수 있습니다.
+    임포트, 하르 캐스케이드, 필터 설계는 프로세스 수명 동안 유지됩니다.
+    """
+    input_stream = input_stream or sys.stdin
+    output_stream = output_stream or sys.stdout
+
+    # 첫 요청 전에 캐스케이드와 DSP 백엔드를 미리 로드 (워밍업)
+    get_face_cascade()
+    get_backend()
+    print(f"rPPG worker ready (pid {os.getpid()})", file=sys.stderr)
+
+    for line in input_stream:
+        line = line.strip()
+        if not line:
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if request.get("session"):
+                result = process_upload_session(
+                    request["session"], request.get("op"), request.get("frames"),
+                    request.get("timestamps"), fps=request.get("fps", 20),
+                    budget_seconds=request.get("budget"), metrics=request.get("metrics"),
+                )
+            elif request.get("stream"):
+                result = process_stream_chunk(
+                    request["stream"], request.get("frames") or [],
+                    fps=request.get("fps", 20), end=request.get("end", False),
+                )
+            elif request.get("frames"):
+                result = process_encoded_frames(request["frames"], request.get("budget"), request.get("metrics"),
+                                                request.get("fps", 20))
+            elif request.get("framesDir"):
+                result = process_frames(request["framesDir"], request.get("budget"), request.get("metrics"),
+                                        request.get("fps"))
+            else:
+                raise ValueError("No frames or frames directory provided")
+            response = {"id": request_id, "result": result}
+        except Exception as e:
+            response = {"id": request_id, "error": str(e)}
+
+        output_stream.write(json.dumps(response) + "\n")
+        output_stream.flush()
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    # 환경 정보 출력은 디버깅 시에만 (RPPG_DEBUG_ENV=1)
+    if os.environ.get("RPPG_DEBUG_ENV"):
+        print_environment_info()
+
+    if "--worker" in sys.argv[1:]:
+        run_worker()
+        sys.exit(0)
+
+    # 캡처 속도 (--fps N, 기본 20 fps / 컨테이너는 기록된 값). 옵션과 값을 뺀 나머지가 위치 인자
+    args = sys.argv[1:]
+    capture_fps = None
+    if "--fps" in args:
+        index = args.index("--fps")
+        try:
+            capture_fps = float(args[index + 1])
+        except (IndexError, ValueError):
+            print(json.dumps({"error": "--fps requires a number"}))
+            sys.exit(1)
+        del args[index:index + 2]
+    positional = [arg for arg in args if not arg.startswith("--")]
+
+    if "--stdin" in args:
+        # 길이 접두사 프레임 스트림을 stdin에서 직접 읽음 (임시 디렉토리 불필요)
+        try:
+            result = process_encoded_frames(read_length_prefixed_frames(sys.stdin.buffer), fps=capture_fps or 20)
+            print(json.dumps(result))
+        except Exception as e:
+            print(json.dumps({"error": str(e), "heartRate": 0, "confidence": 0}))
+            sys.exit(1)
+        sys.exit(0)
+
+    if not positional:
         print(json.dumps({"error": "No frames directory provided"}))
         sys.exit(1)
     
-    frames_dir = sys.argv[1]
+    frames_dir = positional[0]
     
     try:
-        result = process_frames(frames_dir)
+        result = process_frames(frames_dir, fps=capture_fps)
         print(json.dumps(result))
     except Exception as e:
         print(json.dumps({"error": str(e), "heartRate": 0, "confidence": 0}))
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Offline batch reprocessing of archived rPPG sessions.
+
+Takes a root directory (every directory below it that contains frame_*.jpg, and every .rppg
+session container, is a session) or a manifest (one session per line: a frames directory or
+container path, or {"id": ..., "framesDir": ..., "fps": ...}),
+fans the sessions out across a process pool whose workers keep the Haar cascade, DSP backend
+and filter plans warm, and appends one JSON line per finished session to the output file.
+Sessions already present in the output are skipped, so an interrupted run resumes where it
+stopped. Frame directories are scored at --fps (default 20) unless the manifest entry gives
+its own "fps"; containers always use their recorded rate. The fps is part of the resume key,
+so rerunning at a different rate rescores the directories. Aggregate throughput and per-session timing percentiles are reported at the end.
+
+Each worker scores one session at a time with single-threaded frame extraction
+(RPPG_EXTRACT_WORKERS=1 unless set) and the result cache disabled, so rescoring after an
+algorithm change never returns stale cached results.
+
+Usage:
+    python scripts/rppg_batch.py (--root DIR | --manifest FILE) --out results.jsonl
+                                 [--workers N] [--fps FPS] [--retry-failed] [--metrics] [--verbose] [--json]
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from rppg_container import EXTENSION as CONTAINER_EXTENSION, is_container
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 프레임 디렉토리의 기본 fps (process_rppg.process_frames와 같은 값)
+DEFAULT_FPS = 20.0
+
+
+def parse_fps(value):
+    """양수 fps 값. None이면 DEFAULT_FPS, 잘못된 값은 ValueError."""
+    if value is None:
+        return DEFAULT_FPS
+    fps = float(value)
+    if not np.isfinite(fps) or fps <= 0:
+        raise ValueError(f"fps must be a positive number, got {value!r}")
+    return fps
+
+
+def session_fps(path, fps):
+    """세션에 적용할 fps. 컨테이너는 기록된 fps를 사용하므로 None입니다."""
+    return None if is_container(path) else fps
+
+
+def find_sessions(root, fps=DEFAULT_FPS):
+    """
+    root 아래에서 frame_*.jpg를 담은 디렉토리와 세션 컨테이너(.rppg)를 찾아 (id, 경로, fps) 목록을 반환합니다.
+    id는 root 기준 상대 경로이며, 디렉토리에는 fps를, 컨테이너에는 None을 붙입니다.
+    """
+    sessions = []
+    for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+        dirnames.sort()
+        if any(name.startswith("frame_") and name.endswith(".jpg") for name in filenames):
+            sessions.append((os.path.relpath(dirpath, root), dirpath, fps))
+        for name in sorted(filenames):
+            if name.endswith(CONTAINER_EXTENSION):
+                path = os.path.join(dirpath, name)
+                sessions.append((os.path.relpath(path, root), path, None))
+    return sessions
+
+
+def read_manifest(path, fps=DEFAULT_FPS):
+    """
+    매니페스트의 각 줄(경로 문자열 또는 {"id", "framesDir", "fps"} JSON)을 (id, 경로, fps) 목록으로 읽습니다.
+    항목에 fps가 없으면 fps 인자를 사용합니다.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    sessions = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            session_rate = fps
+            if line.startswith("{"):
+                entry = json.loads(line)
+                frames_dir = entry["framesDir"]
+                session_id = entry.get("id", frames_dir)
+                if entry.get("fps") is not None:
+                    session_rate = parse_fps(entry["fps"])
+            else:
+                frames_dir = session_id = line
+            frames_dir = os.path.join(base, frames_dir)
+            sessions.append((str(session_id), frames_dir, session_fps(frames_dir, session_rate)))
+    return sessions
+
+
+def read_done(out_path, retry_failed=False):
+    """
+    이미 출력 파일에 기록된 (세션 id, fps) 집합. fps가 다르면 다른 작업으로 보고 다시 처리하며,
+    fps 필드가 없는 이전 기록은 DEFAULT_FPS로 처리한 것으로 봅니다. retry_failed이면 실패한 세션은 다시 처리합니다.
+    """
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # 중단 시 반쯤 쓰인 마지막 줄
+            if retry_failed and entry.get("error"):
+                continue
+            fps = entry["fps"] if "fps" in entry else session_fps(entry["framesDir"], DEFAULT_FPS)
+            done.add((entry["id"], fps))
+    return done
+
+
+def warm_worker(quiet):
+    """작업 프로세스 초기화: 임포트, 하르 캐스케이드, DSP 백엔드를 미리 로드합니다."""
+    if quiet:
+        sys.stderr = open(os.devnull, "w")
+    sys.path.insert(0, SCRIPTS_DIR)
+    import process_rppg
+    process_rppg.get_face_cascade()
+    process_rppg.get_backend()
+
+
+def score_session(session_id, frames_dir, fps=None, metrics=None):
+    """
+    세션 하나를 처리하고 출력 파일에 쓸 항목을 반환합니다. fps가 None이면 (컨테이너) 기록된 fps를 사용합니다.
+    시뮬레이션 대체 결과는 실패로 기록합니다.
+    """
+    import process_rppg
+
+    if process_rppg.is_container(frames_dir):
+        frames = len(process_rppg.SessionContainer(frames_dir))
+    else:
+        frames = len(glob.glob(os.path.join(frames_dir, "frame_*.jpg")))
+    started = time.perf_counter()
+    try:
+        result = process_rppg.process_frames(frames_dir, metrics=metrics, fps=fps)
+        error = result.get("error") if result.get("simulatedData") else None
+    except Exception as e:
+        result, error = None, str(e)
+    entry = {
+        "id": session_id,
+        "framesDir": frames_dir,
+        "fps": fps,
+        "frames": frames,
+        "seconds": round(time.perf_counter() - started, 4),
+        "pid": os.getpid(),
+    }
+    if error is None:
+        entry["result"] = result
+    else:
+        entry["error"] = error
+        if result and result.get("quality"):
+            entry["quality"] = result["quality"]
+    return entry
+
+
+def summarize(entries, wall_seconds, skipped):
+    seconds = np.array([entry["seconds"] for entry in entries]) if entries else np.zeros(1)
+    frames = sum(entry["frames"] for entry in entries)
+    return {
+        "sessions": len(entries),
+        "skipped": skipped,
+        "failed": sum(1 for entry in entries if entry.get("error")),
+        "frames": frames,
+        "wallSeconds": round(wall_seconds, 3),
+        "sessionsPerSecond": round(len(entries) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "framesPerSecond": round(frames / wall_seconds, 1) if wall_seconds > 0 else 0.0,
+        "sessionSeconds": {
+            "p50": round(float(np.percentile(seconds, 50)), 4),
+            "p95": round(float(np.percentile(seconds, 95)), 4),
+            "max": round(float(seconds.max()), 4),
+            "total": round(float(seconds.sum()), 3),
+        },
+    }
+
+
+def run_batch(sessions, out_path, workers, retry_failed=False, metrics=None, quiet=True, progress=sys.stderr):
+    """처리하지 않은 세션을 프로세스 풀에서 처리하며 끝나는 순서대로 JSON-lines로 추가 기록합니다."""
+    done = read_done(out_path, retry_failed)
+    pending = [session for session in sessions if (session[0], session[2]) not in done]
+    skipped = len(sessions) - len(pending)
+    print(f"{len(pending)} sessions to process ({skipped} already done), {workers} workers", file=progress)
+
+    entries = []
+    started = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_worker, initargs=(quiet,))
+    try:
+        futures = [pool.submit(score_session, session_id, frames_dir, fps, metrics)
+                   for session_id, frames_dir, fps in pending]
+        with open(out_path, "a") as out:
+            for future in as_completed(futures):
+                entry = future.result()
+                out.write(json.dumps(entry) + "\n")
+                out.flush()
+                entries.append(entry)
+                status = f"error: {entry['error']}" if entry.get("error") else \
+                    f"{entry['result']['heartRate']:.1f} BPM"
+                print(f"[{len(entries)}/{len(pending)}] {entry['id']} {entry['seconds']:.2f}s {status}",
+                      file=progress)
+    finally:
+        # 중단(Ctrl-C) 시 대기 중인 작업은 버림. 기록된 줄은 다음 실행에서 건너뜀
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return summarize(entries, time.perf_counter() - started, skipped)
+
+
+def _arg(argv, name, default=None):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+def main(argv):
+    root, manifest, out_path = _arg(argv, "--root"), _arg(argv, "--manifest"), _arg(argv, "--out")
+    if not out_path or bool(root) == bool(manifest):
+        print(__doc__.strip().split("Usage:")[1], file=sys.stderr)
+        return 2
+
+    # 세션 단위로 병렬화하므로 세션 내부 추출은 단일 스레드, 재채점이므로 결과 캐시는 사용하지 않음
+    os.environ.setdefault("RPPG_EXTRACT_WORKERS", "1")
+    os.environ["RPPG_CACHE_ENTRIES"] = "0"
+
+    try:
+        fps = parse_fps(_arg(argv, "--fps"))
+        sessions = find_sessions(root, fps) if root else read_manifest(manifest, fps)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    workers = int(_arg(argv, "--workers", os.cpu_count() or 1))
+    try:
+        summary = run_batch(
+            sessions, out_path, workers,
+            retry_failed="--retry-failed" in argv,
+            metrics="result" if "--metrics" in argv else None,
+            quiet="--verbose" not in argv,
+        )
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun the same command to resume from {out_path}", file=sys.stderr)
+        return 130
+
+    if "--json" in argv:
+        print(json.dumps(summary, indent=2))
+    else:
+        timing = summary["sessionSeconds"]
+        print(f"{summary['sessions']} sessions ({summary['failed']} failed, {summary['skipped']} skipped) "
+              f"in {summary['wallSeconds']:.1f}s: {summary['sessionsPerSecond']:.2f} sessions/s, "
+              f"{summary['framesPerSecond']:.0f} frames/s; per session p50 {timing['p50']:.2f}s, "
+              f"p95 {timing['p95']:.2f}s, max {timing['max']:.2f}s")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Synthetic-video benchmark for the rPPG pipeline.
+
+Renders face-like videos whose skin tone is modulated at a known heart rate (with RR variability,
+sensor noise and head motion), then drives process_rppg.process_frames and the heartrate.handler
+HTTP endpoint end to end, plus the individual pipeline stages. Each scenario runs in a fresh
+interpreter so peak RSS is attributable to it.
+
+Reports frames/s, p50/p99 latency, peak RSS and absolute BPM error per target (plus SDNN error
+against the synthetic RR intervals for process_frames), and can save a baseline JSON and compare
+later runs against it.
+
+--precision-check runs every scenario with RPPG_DSP_PRECISION=float64 and =float32 and fails when
+BPM or HRV outputs of the float32 path drift from the float64 path by more than the fixed tolerances.
+
+--face-mode-check runs process_frames with RPPG_FACE_MODE=detect and =track and fails when the
+tracking mode's BPM error exceeds per-frame detection by more than a fixed margin.
+
+Usage:
+    python scripts/rppg_bench.py [--suite quick|full] [--repeat N] [--json]
+                                 [--save-baseline PATH] [--compare PATH]
+    python scripts/rppg_bench.py --precision-check [--suite quick|full] [--json]
+    python scripts/rppg_bench.py --face-mode-check [--suite quick|full] [--repeat N] [--json]
+"""
+
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import cv2
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(SCRIPTS_DIR, '..', 'api', 'python')
+
+# 배경, 피부(BGR), 눈/눈썹/입 색상
+BACKGROUND = (60, 70, 80)
+SKIN = (120, 150, 200)
+
+# 맥박에 의한 채널별 피부 밝기 변화 비율 (B, G, R) - 녹색 채널이 가장 큼
+PULSE_GAIN = np.array([1.0, 3.0, 1.5], dtype=np.float32)
+
+SUITES = {
+    "quick": [
+        dict(name="vga-20fps-10s", width=640, height=480, fps=20, seconds=10, bpm=72),
+        dict(name="vga-20fps-noisy-motion", width=640, height=480, fps=20, seconds=10, bpm=90,
+             noise=4.0, motion=6.0),
+    ],
+    "full": [
+        dict(name="qvga-20fps-10s", width=320, height=240, fps=20, seconds=10, bpm=72),
+        dict(name="vga-20fps-10s", width=640, height=480, fps=20, seconds=10, bpm=72),
+        dict(name="vga-20fps-30s", width=640, height=480, fps=20, seconds=30, bpm=65),
+        dict(name="vga-20fps-noisy-motion", width=640, height=480, fps=20, seconds=10, bpm=90,
+             noise=4.0, motion=6.0),
+        dict(name="hd-20fps-10s", width=1280, height=720, fps=20, seconds=10, bpm=80),
+        dict(name="vga-15fps-20s", width=640, height=480, fps=15, seconds=20, bpm=60),
+        dict(name="vga-10fps-30s", width=640, height=480, fps=10, seconds=30, bpm=75),
+        dict(name="vga-30fps-10s", width=640, height=480, fps=30, seconds=10, bpm=110),
+    ],
+}
+
+# 기준선 대비 회귀 판정 기준
+MAX_THROUGHPUT_DROP = 0.15   # 처리량 15% 이상 감소
+MAX_BPM_ERROR_INCREASE = 3.0  # BPM 오차 3 이상 증가
+
+# float32 경로가 float64 경로와 달라도 되는 최대 차이 (--precision-check)
+PRECISION_TOLERANCES = {
+    "heartRate": 0.5,   # BPM
+    "confidence": 0.01,
+    "sdnn": 5.0,        # ms
+    "rmssd": 5.0,       # ms
+    "pnn50": 5.0,       # %p
+    "lfHfRatio": 0.25,
+}
+
+# 추적 모드의 BPM 오차가 매 프레임 감지보다 이만큼 넘게 크면 실패 (--face-mode-check)
+FACE_MODE_MAX_BPM_ERROR_INCREASE = 1.0
+
+
+def render_face(width, height):
+    """하르 캐스케이드가 얼굴로 감지하는 단순한 얼굴 그림과 피부 마스크, 얼굴 영역을 반환합니다."""
+    img = np.full((height, width, 3), BACKGROUND, np.uint8)
+    cx, cy, s = width // 2, height // 2, min(width, height) // 4
+    thickness = max(2, s // 20)
+
+    cv2.ellipse(img, (cx, cy), (int(s * 0.8), s), 0, 0, 360, SKIN, -1)
+    skin_mask = np.all(img == SKIN, axis=2)
+    for dx in (-1, 1):
+        cv2.ellipse(img, (cx + dx * int(s * 0.35), cy - int(s * 0.2)), (int(s * 0.15), int(s * 0.08)),
+                    0, 0, 360, (40, 40, 40), -1)
+        cv2.line(img, (cx + dx * int(s * 0.5), cy - int(s * 0.4)), (cx + dx * int(s * 0.2), cy - int(s * 0.4)),
+                 (30, 30, 30), thickness)
+    cv2.line(img, (cx, cy - int(s * 0.1)), (cx, cy + int(s * 0.25)), (90, 110, 150), max(2, thickness - 1))
+    cv2.ellipse(img, (cx, cy + int(s * 0.5)), (int(s * 0.3), int(s * 0.1)), 0, 0, 360, (60, 60, 140), -1)
+
+    skin_mask &= np.all(img == SKIN, axis=2)
+    face_box = (cx - int(s * 0.8), cy - s, int(s * 1.6), 2 * s)
+    return img, skin_mask, face_box
+
+
+def pulse_waveform(n_frames, fps, bpm, seed=0):
+    """
+    호흡성 동성 부정맥(0.25 Hz)과 저주파(0.1 Hz) 변동, 무작위 흔들림이 있는 맥박 파형과 박동 시각을 만듭니다.
+    평균 심박수는 bpm이며, HRV 주파수 지표가 0이 되지 않도록 RR 간격이 변합니다.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_frames) / fps
+    wobble = np.convolve(rng.normal(0, 0.02, n_frames), np.ones(5) / 5, mode='same')
+    rate = bpm / 60 * (1 + 0.05 * np.sin(2 * np.pi * 0.25 * t) + 0.04 * np.sin(2 * np.pi * 0.1 * t + 1) + wobble)
+    phase = 2 * np.pi * np.cumsum(rate) / fps
+    wave = np.sin(phase) + 0.3 * np.sin(2 * phase)
+    # 박동은 위상이 2π 증가할 때마다 한 번 (파형의 피크 위상은 일정하므로 RR 간격은 위상 교차 간격과 같음)
+    cycles = np.arange(np.ceil(phase[0] / (2 * np.pi)), np.floor(phase[-1] / (2 * np.pi)) + 1)
+    beats = np.interp(2 * np.pi * cycles, phase, t)
+    return wave.astype(np.float32), float(np.mean(rate) * 60), np.diff(beats) * 1000
+
+
+def synthesize_frames(width, height, fps, seconds, bpm, noise=2.0, motion=3.0, amplitude=1.0, seed=0):
+    """
+    (frames BGR uint8 목록, 실제 평균 BPM, 얼굴 영역, 실제 RR 간격(ms))을 생성합니다.
+    noise는 픽셀 가우시안 잡음 표준편차, motion은 머리 흔들림 진폭(픽셀)입니다.
+    """
+    rng = np.random.default_rng(seed + 1)
+    base, skin_mask, face_box = render_face(width, height)
+    n_frames = int(round(fps * seconds))
+    wave, true_bpm, true_rr = pulse_waveform(n_frames, fps, bpm, seed)
+
+    base = base.astype(np.float32)
+    skin = skin_mask[..., None].astype(np.float32) * PULSE_GAIN
+    frames = []
+    for i in range(n_frames):
+        t = i / fps
+        img = base + skin * (amplitude * wave[i])
+        if noise > 0:
+            img += rng.normal(0, noise, img.shape).astype(np.float32)
+        if motion > 0:
+            dx = motion * np.sin(2 * np.pi * 0.3 * t)
+            dy = 0.5 * motion * np.sin(2 * np.pi * 0.2 * t)
+            img = cv2.warpAffine(img, np.float32([[1, 0, dx], [0, 1, dy]]), (width, height),
+                                 borderMode=cv2.BORDER_REPLICATE)
+        frames.append(np.clip(img, 0, 255).astype(np.uint8))
+    return frames, true_bpm, face_box, true_rr
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 2)
+
+
+def peak_rss_mb():
+    # Linux는 KB, macOS는 바이트 단위
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize_target(latencies, n_frames, bpm_errors, extra=None):
+    summary = {
+        "framesPerSecond": round(n_frames / float(np.median(latencies)), 1),
+        "p50Ms": percentile_ms(latencies, 50),
+        "p99Ms": percentile_ms(latencies, 99),
+        "bpmError": round(float(np.mean(bpm_errors)), 2) if bpm_errors else None,
+    }
+    summary.update(extra or {})
+    return summary
+
+
+def bench_process_frames(frames_dir, n_frames, fps, true_bpm, repeat, true_sdnn=None):
+    """process_rppg.process_frames를 프레임 디렉토리에 대해 end-to-end로 실행합니다. SDNN 오차(ms)도 보고합니다."""
+    import process_rppg
+
+    latencies, errors, sdnn_errors, simulated = [], [], [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = process_rppg.process_frames(frames_dir, fps=fps)
+        latencies.append(time.perf_counter() - started)
+        if result.get("simulatedData"):
+            simulated += 1
+        else:
+            errors.append(abs(result["heartRate"] - true_bpm))
+            if true_sdnn is not None and result["hrv"]:
+                sdnn_errors.append(abs(result["hrv"]["sdnn"] - true_sdnn))
+    extra = {"simulatedRuns": simulated}
+    if sdnn_errors:
+        extra["sdnnError"] = round(float(np.mean(sdnn_errors)), 2)
+    return summarize_target(latencies, n_frames, errors, extra)
+
+
+def bench_handler(frames, face_box, fps, true_bpm, repeat):
+    """
+    heartrate.handler를 로컬 HTTP 서버로 띄우고, 얼굴 영역을 잘라낸 (N, 3, H, W) uint8 프레임을
+    RPPG 바이너리 형식으로 POST해 end-to-end로 측정합니다.
+    """
+    import http.client
+    from http.server import HTTPServer
+
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    import heartrate
+    from _rppg.codec import encode_frame_payload
+
+    x, y, w, h = face_box
+    crops = np.stack([cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2RGB) for frame in frames])
+    body = encode_frame_payload(np.ascontiguousarray(crops.transpose(0, 3, 1, 2)), fps)
+
+    heartrate.handler.log_message = lambda *args: None
+    server = HTTPServer(("127.0.0.1", 0), heartrate.handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    latencies, errors = [], []
+    try:
+        for _ in range(repeat):
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+            started = time.perf_counter()
+            conn.request("POST", "/", body=body, headers={"Content-Type": "application/octet-stream"})
+            result = json.loads(conn.getresponse().read())
+            latencies.append(time.perf_counter() - started)
+            conn.close()
+            if result.get("heartRate"):
+                errors.append(abs(result["heartRate"] - true_bpm))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return summarize_target(latencies, len(frames), errors, {"payloadBytes": len(body)})
+
+
+def bench_stages(frames_dir, frames, fps, repeat):
+    """디코딩, 피부 신호 추출, 심박수 추정(POS/필터/FFT), 주파수 영역 HRV 단계를 각각 측정합니다."""
+    import process_rppg
+    from rppg_skin import combine_roi_traces
+
+    files = sorted(glob.glob(os.path.join(frames_dir, "frame_*.jpg")))
+    timings = {"decode": [], "extract": [], "heartRate": [], "hrv": []}
+    rr = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in files:
+            cv2.imread(path)
+        timings["decode"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        roi_means, roi_counts, timestamps, _, _ = process_rppg.extract_skin_signals(frames, lambda f: f, fps=fps)
+        timings["extract"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        rgb = combine_roi_traces(roi_means, roi_counts)
+        estimate = process_rppg.estimate_heart_rate(rgb.T, fps)
+        timings["heartRate"].append(time.perf_counter() - started)
+
+        if estimate["heartRate"]:
+            rr = np.full(int(len(frames) / fps * estimate["heartRate"] / 60), 60000 / estimate["heartRate"])
+            rr += np.random.default_rng(0).normal(0, 30, len(rr))
+            started = time.perf_counter()
+            try:
+                process_rppg.calculate_frequency_domain_hrv(rr)
+            except Exception:
+                pass
+            timings["hrv"].append(time.perf_counter() - started)
+
+    return {stage: {"p50Ms": percentile_ms(samples, 50), "p99Ms": percentile_ms(samples, 99)}
+            for stage, samples in timings.items() if samples}
+
+
+def run_scenario(scenario, repeat):
+    """시나리오 하나를 현재 프로세스에서 실행하고 결과 dict를 반환합니다."""
+    params = dict(noise=2.0, motion=3.0, amplitude=1.0, seed=0)
+    params.update({k: v for k, v in scenario.items() if k != "name"})
+    frames, true_bpm, face_box, true_rr = synthesize_frames(**params)
+    fps = params["fps"]
+    true_sdnn = float(np.std(true_rr, ddof=1))
+
+    with tempfile.TemporaryDirectory(prefix="rppg-bench-") as frames_dir:
+        for i, frame in enumerate(frames):
+            cv2.imwrite(os.path.join(frames_dir, f"frame_{i:05d}.jpg"), frame)
+
+        # 하르 캐스케이드 로드 등 첫 호출 비용은 측정에서 제외
+        bench_process_frames(frames_dir, len(frames), fps, true_bpm, 1)
+
+        result = {
+            "scenario": scenario["name"],
+            "frames": len(frames),
+            "trueBpm": round(true_bpm, 2),
+            "trueSdnn": round(true_sdnn, 2),
+            "processFrames": bench_process_frames(frames_dir, len(frames), fps, true_bpm, repeat, true_sdnn),
+            "handler": bench_handler(frames, face_box, fps, true_bpm, repeat),
+            "stages": bench_stages(frames_dir, frames, fps, repeat),
+        }
+    result["peakRssMb"] = peak_rss_mb()
+    return result
+
+
+def run_isolated(scenario, repeat):
+    """피크 RSS를 시나리오별로 구분하기 위해 새 인터프리터에서 시나리오를 실행합니다."""
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-scenario", json.dumps(scenario), "--repeat", str(repeat)],
+        capture_output=True, text=True, cwd=SCRIPTS_DIR,
+        # 반복 측정이 결과 캐시 적중으로 바뀌지 않도록 캐시를 끔
+        env=dict(os.environ, RPPG_CACHE_ENTRIES="0"),
+    )
+    if proc.returncode != 0:
+        return {"scenario": scenario["name"], "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_precision_scenario(scenario):
+    """
+    현재 프로세스의 정밀도(RPPG_DSP_PRECISION)로 시나리오의 출력값만 계산합니다.
+    process_frames의 심박수/HRV와 handler 경로(RPPG 바이너리 프레임)의 심박수를 반환합니다.
+    """
+    import process_rppg
+
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    import heartrate
+    from _rppg.codec import encode_frame_payload
+
+    params = dict(noise=2.0, motion=3.0, amplitude=1.0, seed=0)
+    params.update({k: v for k, v in scenario.items() if k != "name"})
+    frames, _, face_box, _ = synthesize_frames(**params)
+
+    outputs = {}
+    with tempfile.TemporaryDirectory(prefix="rppg-bench-") as frames_dir:
+        for i, frame in enumerate(frames):
+            cv2.imwrite(os.path.join(frames_dir, f"frame_{i:05d}.jpg"), frame)
+        result = process_rppg.process_frames(frames_dir, fps=params["fps"])
+    if not result.get("simulatedData"):
+        outputs["processFrames"] = dict(heartRate=result["heartRate"], confidence=result["confidence"],
+                                        **(result["hrv"] or {}))
+
+    x, y, w, h = face_box
+    crops = np.stack([cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2RGB) for frame in frames])
+    body = encode_frame_payload(np.ascontiguousarray(crops.transpose(0, 3, 1, 2)), params["fps"])
+    result = heartrate.analyze_body(body)
+    outputs["handler"] = {"heartRate": result["heartRate"], "confidence": result["confidence"]}
+    return outputs
+
+
+def precision_check(scenarios):
+    """
+    시나리오마다 float64/float32 경로를 각각 새 인터프리터에서 실행해 출력 차이를 PRECISION_TOLERANCES와
+    비교합니다. (결과 목록, 허용 오차를 넘은 항목) 을 반환합니다.
+    """
+    results, failures = [], []
+    for scenario in scenarios:
+        runs = {}
+        for precision in ("float64", "float32"):
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-precision", json.dumps(scenario)],
+                capture_output=True, text=True, cwd=SCRIPTS_DIR,
+                env=dict(os.environ, RPPG_CACHE_ENTRIES="0", RPPG_DSP_PRECISION=precision),
+            )
+            if proc.returncode != 0:
+                failures.append(f"{scenario['name']}/{precision}: {proc.stderr.strip().splitlines()[-1:]}")
+                break
+            runs[precision] = json.loads(proc.stdout.strip().splitlines()[-1])
+        else:
+            entry = {"scenario": scenario["name"], "diffs": {}}
+            for target, reference in runs["float64"].items():
+                single = runs["float32"].get(target)
+                if single is None:
+                    failures.append(f"{scenario['name']}/{target}: float32 path produced no result")
+                    continue
+                for name, tolerance in PRECISION_TOLERANCES.items():
+                    if reference.get(name) is None or single.get(name) is None:
+                        continue
+                    diff = abs(single[name] - reference[name])
+                    entry["diffs"][f"{target}.{name}"] = float(f"{diff:.3g}")
+                    if diff > tolerance:
+                        failures.append(f"{scenario['name']}/{target}: {name} {reference[name]:.3f} (float64) "
+                                        f"vs {single[name]:.3f} (float32), tolerance {tolerance}")
+            results.append(entry)
+    return results, failures
+
+
+def run_face_mode_scenario(scenario, repeat):
+    """현재 프로세스의 얼굴 모드(RPPG_FACE_MODE)로 시나리오의 process_frames 결과만 측정합니다."""
+    params = dict(noise=2.0, motion=3.0, amplitude=1.0, seed=0)
+    params.update({k: v for k, v in scenario.items() if k != "name"})
+    frames, true_bpm, _, true_rr = synthesize_frames(**params)
+    true_sdnn = float(np.std(true_rr, ddof=1))
+
+    with tempfile.TemporaryDirectory(prefix="rppg-bench-") as frames_dir:
+        for i, frame in enumerate(frames):
+            cv2.imwrite(os.path.join(frames_dir, f"frame_{i:05d}.jpg"), frame)
+        bench_process_frames(frames_dir, len(frames), params["fps"], true_bpm, 1)
+        return bench_process_frames(frames_dir, len(frames), params["fps"], true_bpm, repeat, true_sdnn)
+
+
+def face_mode_check(scenarios, repeat):
+    """
+    시나리오마다 감지/추적 모드를 각각 새 인터프리터에서 실행해 BPM/SDNN 오차와 처리량을 비교합니다.
+    (결과 목록, 추적 모드가 기준을 넘게 나빠진 항목) 을 반환합니다.
+    """
+    results, failures = [], []
+    for scenario in scenarios:
+        entry = {"scenario": scenario["name"]}
+        for mode in ("detect", "track"):
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-face-mode", json.dumps(scenario),
+                 "--repeat", str(repeat)],
+                capture_output=True, text=True, cwd=SCRIPTS_DIR,
+                env=dict(os.environ, RPPG_CACHE_ENTRIES="0", RPPG_FACE_MODE=mode),
+            )
+            if proc.returncode != 0:
+                failures.append(f"{scenario['name']}/{mode}: {proc.stderr.strip().splitlines()[-1:]}")
+                break
+            entry[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+        else:
+            detect, track = entry["detect"], entry["track"]
+            if track["bpmError"] is None:
+                failures.append(f"{scenario['name']}: tracking mode produced no result")
+            elif detect["bpmError"] is not None and \
+                    track["bpmError"] > detect["bpmError"] + FACE_MODE_MAX_BPM_ERROR_INCREASE:
+                failures.append(f"{scenario['name']}: BPM error {detect['bpmError']} (detect) "
+                                f"vs {track['bpmError']} (track)")
+            results.append(entry)
+    return results, failures
+
+
+def compare(results, baseline):
+    """기준선과 비교해 처리량 감소 또는 BPM 오차 증가가 기준을 넘은 항목을 반환합니다."""
+    previous = {entry["scenario"]: entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        old = previous.get(entry["scenario"])
+        if old is None or "error" in entry or "error" in old:
+            continue
+        for target in ("processFrames", "handler"):
+            new_t, old_t = entry.get(target, {}), old.get(target, {})
+            if "framesPerSecond" not in new_t or "framesPerSecond" not in old_t:
+                continue
+            if new_t["framesPerSecond"] < old_t["framesPerSecond"] * (1 - MAX_THROUGHPUT_DROP):
+                regressions.append(f"{entry['scenario']}/{target}: throughput "
+                                   f"{old_t['framesPerSecond']} -> {new_t['framesPerSecond']} frames/s")
+            if (new_t.get("bpmError") is not None and old_t.get("bpmError") is not None
+                    and new_t["bpmError"] > old_t["bpmError"] + MAX_BPM_ERROR_INCREASE):
+                regressions.append(f"{entry['scenario']}/{target}: BPM error "
+                                   f"{old_t['bpmError']} -> {new_t['bpmError']}")
+    return regressions
+
+
+def print_table(results):
+    header = f"{'scenario':<26}{'target':<14}{'frames/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'BPM err':>9}{'SDNN err':>10}{'RSS MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for entry in results:
+        if "error" in entry:
+            print(f"{entry['scenario']:<26}error: {entry['error']}")
+            continue
+        for target in ("processFrames", "handler"):
+            t = entry[target]
+            if "skipped" in t:
+                print(f"{entry['scenario']:<26}{target:<14}  skipped: {t['skipped']}")
+                continue
+            bpm_error = "-" if t["bpmError"] is None else f"{t['bpmError']:.2f}"
+            sdnn_error = f"{t['sdnnError']:.2f}" if "sdnnError" in t else "-"
+            print(f"{entry['scenario']:<26}{target:<14}{t['framesPerSecond']:>10.1f}{t['p50Ms']:>10.1f}"
+                  f"{t['p99Ms']:>10.1f}{bpm_error:>9}{sdnn_error:>10}{entry['peakRssMb']:>9.1f}")
+        stages = ", ".join(f"{name} {timing['p50Ms']:.1f}" for name, timing in entry["stages"].items())
+        print(f"{'':<26}{'stages p50 ms':<14}  {stages}")
+
+
+def main(argv):
+    repeat = int(argv[argv.index("--repeat") + 1]) if "--repeat" in argv else 5
+
+    if "--run-scenario" in argv:
+        scenario = json.loads(argv[argv.index("--run-scenario") + 1])
+        print(json.dumps(run_scenario(scenario, repeat)))
+        return 0
+
+    if "--run-precision" in argv:
+        scenario = json.loads(argv[argv.index("--run-precision") + 1])
+        print(json.dumps(run_precision_scenario(scenario)))
+        return 0
+
+    if "--run-face-mode" in argv:
+        scenario = json.loads(argv[argv.index("--run-face-mode") + 1])
+        print(json.dumps(run_face_mode_scenario(scenario, repeat)))
+        return 0
+
+    suite = argv[argv.index("--suite") + 1] if "--suite" in argv else "quick"
+    if "--face-mode-check" in argv:
+        results, failures = face_mode_check(SUITES[suite], repeat)
+        if "--json" in argv:
+            print(json.dumps({"suite": suite, "results": results, "failures": failures}, indent=2))
+        else:
+            print(f"{'scenario':<26}{'mode':<8}{'frames/s':>10}{'BPM err':>9}{'SDNN err':>10}")
+            for entry in results:
+                for mode in ("detect", "track"):
+                    t = entry[mode]
+                    bpm_error = "-" if t["bpmError"] is None else f"{t['bpmError']:.2f}"
+                    sdnn_error = f"{t['sdnnError']:.2f}" if "sdnnError" in t else "-"
+                    print(f"{entry['scenario']:<26}{mode:<8}{t['framesPerSecond']:>10.1f}"
+                          f"{bpm_error:>9}{sdnn_error:>10}")
+        for line in failures:
+            print(f"FACE MODE {line}", file=sys.stderr)
+        return 1 if failures else 0
+
+    if "--precision-check" in argv:
+        results, failures = precision_check(SUITES[suite])
+        if "--json" in argv:
+            print(json.dumps({"suite": suite, "tolerances": PRECISION_TOLERANCES, "results": results,
+                              "failures": failures}, indent=2))
+        else:
+            for entry in results:
+                diffs = ", ".join(f"{name} {diff:g}" for name, diff in entry["diffs"].items())
+                print(f"{entry['scenario']:<26}{diffs}")
+        for line in failures:
+            print(f"PRECISION {line}", file=sys.stderr)
+        return 1 if failures else 0
+
+    results = [run_isolated(scenario, repeat) for scenario in SUITES[suite]]
+    report = {"suite": suite, "repeat": repeat, "python": sys.version.split()[0],
+              "cpus": os.cpu_count(), "results": results}
+
+    if "--json" in argv:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(results)
+
+    if "--save-baseline" in argv:
+        path = argv[argv.index("--save-baseline") + 1]
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {path}", file=sys.stderr)
+
+    if "--compare" in argv:
+        with open(argv[argv.index("--compare") + 1]) as f:
+            regressions = compare(results, json.load(f))
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Deadline-aware processing budget for rPPG extraction.
+Tracks elapsed time per stage against a wall-clock budget and records which
+degradations (lower detection resolution, frame decimation, truncation, skipped
+frequency-domain HRV) were applied to stay within it.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+
+# 추출 단계가 남은 예산에서 사용할 수 있는 비율 (나머지는 신호 처리/HRV용)
+EXTRACT_SHARE = 0.85
+
+# 감지 해상도를 절반으로 낮췄을 때 프레임당 비용 추정 비율
+DOWNSCALE_COST_FACTOR = 0.6
+
+
+class ProcessingBudget:
+    """
+    처리 시간 예산(초)을 관리합니다.
+
+    stage()로 단계별 소요 시간을 기록하고, degrade()로 적용한 품질 저하를 남기며,
+    report()가 결과 JSON에 포함될 요약을 반환합니다.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = float(seconds)
+        self.start = time.monotonic()
+        self.stages = {}
+        self.degradations = []
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def remaining(self):
+        return self.seconds - self.elapsed()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.monotonic() - started)
+
+    def degrade(self, name, **details):
+        self.degradations.append(dict(name=name, **details))
+
+    def report(self):
+        return {
+            "budgetSeconds": self.seconds,
+            "elapsedSeconds": round(self.elapsed(), 4),
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "degradations": self.degradations,
+        }
+
+
+def plan_extraction(budget, per_frame_seconds, remaining_frames, max_stride, can_downscale=True):
+    """
+    남은 프레임의 예상 추출 시간이 예산을 넘으면 품질 저하 단계를 순서대로 결정합니다.
+
+    1. 얼굴 감지 해상도를 절반으로 낮춤
+    2. 프레임을 stride 간격으로 솎아냄 (대역 상한의 나이퀴스트 조건을 지키는 범위 내)
+    3. 그래도 부족하면 뒤쪽 프레임을 잘라냄
+
+    (downscale 여부, stride, 처리할 남은 프레임 수)를 반환합니다.
+    """
+    allowed = max(0.0, budget.remaining() * EXTRACT_SHARE)
+    projected = per_frame_seconds * remaining_frames
+    downscale = False
+    stride = 1
+
+    if projected > allowed and can_downscale:
+        downscale = True
+        per_frame_seconds *= DOWNSCALE_COST_FACTOR
+        projected = per_frame_seconds * remaining_frames
+
+    if projected > allowed and max_stride > 1:
+        stride = min(max_stride, math.ceil(projected / allowed) if allowed > 0 else max_stride)
+        projected /= stride
+
+    frames = remaining_frames
+    if projected > allowed:
+        frames = int(allowed / per_frame_seconds) * stride if per_frame_seconds > 0 else remaining_frames
+
+    return downscale, stride, min(frames, remaining_frames)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Single-file rPPG session container (.rppg).
+
+Replaces a directory of frame_*.jpg files with one file that is opened with np.memmap and
+read lazily. Layout (little-endian):
+
+    header   b"RPSS" <version:u8> <kind:u8> <reserved:u16> <fps:f32>
+             <frames:u32> <height:u32> <width:u32> <channels:u32>
+    times    f64 * frames                    capture time of each frame in seconds
+    kind 0   u64 * (frames + 1) offset index, then the concatenated JPEG blobs
+    kind 1   uint8 frames (frames, height, width, channels), 64-byte aligned
+
+JPEG containers keep the original bytes (no re-encoding); raw containers store decoded and
+optionally downscaled BGR frames so replays skip JPEG decoding entirely. Either way frames are
+zero-copy slices of the mapping.
+
+Usage:
+    python scripts/rppg_container.py pack <frames_dir> <out.rppg> [--fps 20] [--raw] [--scale 0.5]
+    python scripts/rppg_container.py info <file.rppg>
+"""
+
+import glob
+import json
+import os
+import struct
+import sys
+
+import cv2
+import numpy as np
+
+MAGIC = b"RPSS"
+VERSION = 1
+KIND_JPEG = 0
+KIND_RAW = 1
+EXTENSION = ".rppg"
+
+_HEADER = struct.Struct("<4sBBHfIIII")
+_ALIGN = 64
+
+
+def is_container(path):
+    """경로가 세션 컨테이너 파일인지 (매직 바이트로) 확인합니다."""
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(4) == MAGIC
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_container(path, frames, fps, timestamps=None, raw=False, scale=None):
+    """
+    프레임을 컨테이너 파일로 씁니다.
+
+    frames는 JPEG 바이트 목록(raw=False) 또는 BGR uint8 프레임 목록입니다. raw=True이면 JPEG 바이트도
+    디코딩해 저장하며 scale(<1)로 축소할 수 있습니다. timestamps(초)가 없으면 프레임 번호 / fps입니다.
+    파일은 임시 경로에 쓴 뒤 교체되므로 중간에 중단되어도 반쯤 쓰인 컨테이너가 남지 않습니다.
+    """
+    frames = list(frames)
+    n = len(frames)
+    times = np.arange(n) / float(fps) if timestamps is None else np.asarray(timestamps, dtype='<f8')
+    if len(times) != n:
+        raise ValueError(f"Expected {n} timestamps, got {len(times)}")
+
+    def to_raw(frame):
+        if isinstance(frame, (bytes, bytearray, memoryview)):
+            frame = cv2.imdecode(np.frombuffer(frame, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if scale is not None and scale != 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return np.ascontiguousarray(frame, dtype=np.uint8)
+
+    if raw:
+        # 디코딩은 쓰면서 한 프레임씩 (첫 프레임만 미리 디코딩해 크기를 정함)
+        first = to_raw(frames[0]) if n else None
+    else:
+        frames = [bytes(frame) if isinstance(frame, (bytes, bytearray, memoryview))
+                  else cv2.imencode(".jpg", frame)[1].tobytes() for frame in frames]
+        first = cv2.imdecode(np.frombuffer(frames[0], dtype=np.uint8), cv2.IMREAD_COLOR) if n else None
+    shape = first.shape if first is not None else (0, 0, 3)
+
+    height, width = shape[:2]
+    channels = shape[2] if len(shape) > 2 else 1
+    header = _HEADER.pack(MAGIC, VERSION, KIND_RAW if raw else KIND_JPEG, 0, float(fps),
+                          n, height, width, channels)
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(times.astype('<f8').tobytes())
+            if raw:
+                f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+                for k, frame in enumerate(frames):
+                    frame = first if k == 0 else to_raw(frame)
+                    if frame.shape != shape:
+                        raise ValueError(f"Frame shape {frame.shape} differs from {shape}")
+                    f.write(frame.tobytes())
+            else:
+                offsets = np.zeros(n + 1, dtype='<u8')
+                offsets[1:] = np.cumsum([len(blob) for blob in frames])
+                f.write(offsets.tobytes())
+                for blob in frames:
+                    f.write(blob)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class SessionContainer:
+    """
+    np.memmap으로 연 세션 컨테이너입니다. 파일 전체를 읽지 않고 접근하는 프레임만 페이지로 올라옵니다.
+    frame(i)은 BGR 프레임을 반환하며, raw 컨테이너에서는 디코딩 없이 매핑의 읽기 전용 뷰입니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self.buffer) < _HEADER.size:
+            raise ValueError(f"Truncated session container: {path}")
+        magic, version, self.kind, _, fps, n, height, width, channels = _HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError(f"Not a session container: {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported session container version: {version}")
+
+        self.fps = float(fps)
+        self.shape = (height, width, channels)
+        offset = _HEADER.size
+        self.timestamps = np.frombuffer(self.buffer, dtype='<f8', count=n, offset=offset)
+        offset += 8 * n
+
+        if self.kind == KIND_JPEG:
+            self._offsets = np.frombuffer(self.buffer, dtype='<u8', count=n + 1, offset=offset)
+            self._data_offset = offset + 8 * (n + 1)
+            expected = self._data_offset + int(self._offsets[-1])
+        elif self.kind == KIND_RAW:
+            self._data_offset = _aligned(offset)
+            self._frames = np.frombuffer(self.buffer, dtype=np.uint8, count=n * height * width * channels,
+                                         offset=self._data_offset).reshape(n, height, width, channels)
+            expected = self._data_offset + self._frames.nbytes
+        else:
+            raise ValueError(f"Unknown session container kind: {self.kind}")
+        if len(self.buffer) < expected:
+            raise ValueError(f"Truncated session container: {path}")
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def blob(self, index):
+        """JPEG 컨테이너에서 프레임 하나의 인코딩된 바이트 뷰 (복사 없음)."""
+        start = self._data_offset + int(self._offsets[index])
+        end = self._data_offset + int(self._offsets[index + 1])
+        return self.buffer[start:end]
+
+    def frame(self, index):
+        """프레임 번호로 BGR 프레임을 반환합니다. 디코딩할 수 없으면 None."""
+        if self.kind == KIND_RAW:
+            return self._frames[index]
+        return cv2.imdecode(self.blob(index), cv2.IMREAD_COLOR)
+
+    def key_chunks(self):
+        """
+        결과 캐시 키 조각. 프레임 데이터를 해시하면 매핑 전체를 읽게 되므로 파일 식별 정보
+        (경로, 크기, 수정 시각, inode)와 헤더 값, 타임스탬프, JPEG 오프셋 색인만 사용합니다.
+        """
+        stat = os.stat(self.path)
+        meta = dict(path=os.path.realpath(self.path), size=stat.st_size, mtime=stat.st_mtime_ns,
+                    inode=stat.st_ino, kind=self.kind, fps=self.fps, shape=list(self.shape), frames=len(self))
+        chunks = [json.dumps(meta, sort_keys=True), self.timestamps.tobytes()]
+        if self.kind == KIND_JPEG:
+            chunks.append(self._offsets.tobytes())
+        return chunks
+
+    def info(self):
+        return {
+            "path": self.path,
+            "kind": "raw" if self.kind == KIND_RAW else "jpeg",
+            "frames": len(self),
+            "fps": self.fps,
+            "shape": list(self.shape),
+            "duration": float(self.timestamps[-1] - self.timestamps[0]) if len(self) else 0.0,
+            "bytes": int(len(self.buffer)),
+        }
+
+
+def pack_directory(frames_dir, out_path, fps=20, raw=False, scale=None):
+    """frame_*.jpg 디렉토리를 컨테이너 하나로 묶습니다. JPEG 모드는 원본 바이트를 그대로 담습니다."""
+    files = sorted(glob.glob(os.path.join(frames_dir, "frame_*.jpg")))
+    if not files:
+        raise ValueError(f"No frames found in {frames_dir}")
+
+    def read(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    write_container(out_path, (read(path) for path in files), fps, raw=raw, scale=scale)
+    return SessionContainer(out_path).info()
+
+
+def main(argv):
+    if len(argv) >= 3 and argv[0] == "pack":
+        fps = float(argv[argv.index("--fps") + 1]) if "--fps" in argv else 20.0
+        scale = float(argv[argv.index("--scale") + 1]) if "--scale" in argv else None
+        print(json.dumps(pack_directory(argv[1], argv[2], fps, raw="--raw" in argv, scale=scale)))
+        return 0
+    if len(argv) >= 2 and argv[0] == "info":
+        print(json.dumps(SessionContainer(argv[1]).info()))
+        return 0
+    print(__doc__.strip().split("Usage:")[1], file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
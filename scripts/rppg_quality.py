@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Quality gate for rPPG sessions.
+After the first few seconds of frames the gate checks the face-detection ratio and the skin
+coverage of the facial sub-ROIs, and aborts with a reason code when the session is hopeless
+(no face, bad lighting). Before the peak and HRV stages the band SNR of the full recording is
+checked; a low SNR keeps the heart rate but drops peaks and HRV, which depend on clean beats.
+
+The early SNR of the head is only reported: on a few seconds of signal the SNR window covers
+most of the heart-rate band and does not separate pulse from noise reliably enough to abort on.
+
+Opt-in with RPPG_QUALITY_GATE=1 until the thresholds are calibrated on real recordings.
+"""
+
+import os
+
+import numpy as np
+from rppg_skin import combine_roi_traces
+
+# 조기 판정에 쓰는 선행 구간 (초). 녹화가 이 구간의 2배보다 짧으면 조기 판정을 생략
+GATE_SECONDS = 4.0
+
+# 선행 구간에서 얼굴+피부가 검출되어야 하는 최소 프레임 비율
+MIN_DETECTION_RATIO = 0.5
+
+# 검출된 프레임의 하위 영역 중 피부로 분류되어야 하는 최소 비율 (조명/색 왜곡 판정)
+MIN_SKIN_COVERAGE = 0.25
+
+# 전체 신호의 대역 SNR(dB) 하한. 이보다 낮으면 피크/HRV를 생략 (심박수는 유지)
+MIN_SNR_DB = 0.0
+
+
+def _db(value):
+    """JSON에 넣을 dB 값 (무한대/NaN은 None)."""
+    return round(float(value), 2) if value is not None and np.isfinite(value) else None
+
+
+class QualityAbort(Exception):
+    """품질 판정으로 처리를 중단할 때 발생합니다. reason은 noFace 또는 lowSkinCoverage입니다."""
+
+    def __init__(self, reason, message, **details):
+        super().__init__(message)
+        self.reason = reason
+        self.details = details
+
+    def report(self):
+        return dict(passed=False, reason=self.reason, **self.details)
+
+
+class QualityGate:
+    """
+    세션 품질 판정기입니다. check_head()는 선행 구간의 추출 결과를, check_snr()는 전체 신호의
+    SNR을 검사하며, 검사 값과 (SNR이 낮으면) 실패 사유는 report()로 결과 JSON에 포함됩니다.
+    """
+
+    def __init__(self, fps, gate_seconds=GATE_SECONDS, min_detection_ratio=MIN_DETECTION_RATIO,
+                 min_skin_coverage=MIN_SKIN_COVERAGE, min_snr_db=MIN_SNR_DB):
+        self.fps = float(fps)
+        self.head_frames = max(1, int(round(gate_seconds * self.fps)))
+        self.min_detection_ratio = min_detection_ratio
+        self.min_skin_coverage = min_skin_coverage
+        self.min_snr_db = min_snr_db
+        self.checks = {}
+        self.reason = None
+
+    @classmethod
+    def from_env(cls, fps):
+        """RPPG_QUALITY_GATE=1일 때만 판정기를 만들고, 아니면 None을 반환합니다."""
+        if os.environ.get("RPPG_QUALITY_GATE", "0") != "1":
+            return None
+        return cls(fps)
+
+    def applies_to(self, n_frames):
+        """조기 판정으로 아낄 프레임이 충분한지 (선행 구간의 2배 이상) 여부."""
+        return n_frames >= 2 * self.head_frames
+
+    def check_head(self, results, snr_fn):
+        """
+        선행 구간의 프레임별 추출 결과((means, counts, area) 또는 None)를 검사합니다.
+        snr_fn은 (3, N) RGB 트레이스와 fps로 대역 SNR(dB)을 계산하는 함수이며, 그 값은 보고만 합니다.
+        얼굴이나 피부가 부족하면 QualityAbort.
+        """
+        valid = [r for r in results if r is not None]
+        ratio = len(valid) / len(results) if results else 0.0
+        self.checks["detectionRatio"] = round(ratio, 3)
+        if ratio < self.min_detection_ratio:
+            raise QualityAbort("noFace", f"Face with enough skin detected in only {ratio:.0%} of the first "
+                               f"{len(results)} frames", detectionRatio=round(ratio, 3))
+
+        coverage = float(np.mean([counts.sum() / area for _, counts, area in valid]))
+        self.checks["skinCoverage"] = round(coverage, 3)
+        if coverage < self.min_skin_coverage:
+            raise QualityAbort("lowSkinCoverage", f"Skin coverage {coverage:.0%} is too low "
+                               f"(check lighting)", skinCoverage=round(coverage, 3))
+
+        means = np.array([r[0] for r in valid])
+        counts = np.array([r[1] for r in valid])
+        snr = snr_fn(combine_roi_traces(means, counts).T, self.fps)
+        self.checks["earlySnrDb"] = _db(snr)
+
+    def check_snr(self, snr):
+        """전체 신호의 대역 SNR(dB)을 검사합니다. 하한보다 낮으면 False (피크/HRV를 생략할 것)."""
+        self.checks["snrDb"] = _db(snr)
+        if snr is not None and snr < self.min_snr_db:
+            self.reason = "lowSnr"
+            return False
+        return True
+
+    def report(self):
+        if self.reason is not None:
+            return dict(passed=False, reason=self.reason, **self.checks)
+        return dict(passed=True, **self.checks)
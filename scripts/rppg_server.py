@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Standalone concurrent server for heartrate.py.
+
+A threaded HTTP front end accepts the same requests as heartrate.handler and dispatches the
+CPU-bound analysis to a pre-warmed process pool. Admission is bounded (pool size + queue
+length); when full the server answers 429 with Retry-After instead of queueing without limit.
+Each request has a timeout (504), results are served from the shared result cache before
+touching the pool, and GET /health reports queue depth and counters.
+
+A running task cannot be cancelled from the front end, so the worker enforces its own
+deadline (DEADLINE_SHARE of the timeout) with SIGALRM and stops the analysis at the next
+bytecode boundary. A 504 therefore does not free capacity by itself: the request's slot is
+returned only when the worker actually finishes, and a call stuck inside one long native
+operation keeps its worker busy until that call returns.
+
+Usage:
+    python scripts/rppg_server.py [--host 127.0.0.1] [--port 8765] [--workers N] [--queue N] [--timeout S]
+
+Environment defaults: RPPG_SERVER_HOST, RPPG_SERVER_PORT, RPPG_SERVER_WORKERS (cpu count),
+RPPG_SERVER_QUEUE (2 x workers), RPPG_SERVER_TIMEOUT (10 s), RPPG_SERVER_MAX_BODY_MB (64).
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api', 'python'))
+import heartrate  # noqa: E402
+from _rppg.backend import get_backend  # noqa: E402
+from _rppg.cache import cache_stats, get_result_cache  # noqa: E402
+
+# 작업 프로세스의 자체 마감 시간 비율. 프런트엔드의 504보다 먼저 끝나 슬롯을 반납하도록 약간 짧게 둠
+DEADLINE_SHARE = 0.9
+
+
+def warm_worker():
+    """작업 프로세스 초기화: DSP 백엔드와 자주 쓰는 필터 플랜을 미리 로드합니다."""
+    get_backend()
+    import numpy as np
+    for fps in (20, 30):
+        heartrate.analyze_frames_array(np.random.rand(fps * 10, 3), fps)
+    return os.getpid()
+
+
+def run_with_deadline(seconds, fn, *args):
+    """
+    작업 프로세스에서 fn을 실행하고 seconds가 지나면 TimeoutError로 중단합니다.
+    풀 작업은 작업 프로세스의 메인 스레드에서 실행되므로 SIGALRM 핸들러에서 예외를 던질 수 있습니다.
+    setitimer가 없는 플랫폼에서는 마감 없이 실행합니다.
+    """
+    if not seconds or not hasattr(signal, "setitimer"):
+        return fn(*args)
+
+    def expire(signum, frame):
+        raise TimeoutError(f"Analysis timed out after {seconds:.1f} s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class RppgServer(ThreadingHTTPServer):
+    """요청 스레드는 입출력만 처리하고 분석은 프로세스 풀에서 실행하는 HTTP 서버입니다."""
+
+    daemon_threads = True
+
+    def __init__(self, address, workers, max_queue, timeout, max_body_bytes):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+
+        # 스레드를 띄우기 전에 풀을 만들고 모든 작업 프로세스를 워밍업
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_worker)
+        for future in [self.pool.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.counters = {"served": 0, "rejected": 0, "timeouts": 0, "errors": 0, "cacheHits": 0}
+        self.started = time.time()
+        super().__init__(address, RppgRequestHandler)
+
+    def try_admit(self):
+        """풀과 대기열이 가득 찼으면 False. 허용된 요청은 작업이 실제로 끝날 때 release()로 반납합니다."""
+        if not self._slots.acquire(blocking=False):
+            self.count("rejected")
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self, _future=None):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def health(self):
+        with self._lock:
+            in_flight = self.in_flight
+            counters = dict(self.counters)
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "inFlight": in_flight,
+            "queueDepth": max(0, in_flight - self.workers),
+            "maxQueue": self.max_queue,
+            "timeoutSeconds": self.timeout,
+            "uptimeSeconds": round(time.time() - self.started, 1),
+            "cache": cache_stats(),
+            **counters,
+        }
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class RppgRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path in ("/", "/health"):
+            self.send_json(200, self.server.health())
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > self.server.max_body_bytes:
+            self.close_connection = True
+            self.send_json(413, {"error": f"Request body too large ({length} bytes)"})
+            return
+        post_data = self.rfile.read(length)
+        query = parse_qs(urlparse(self.path).query)
+
+        try:
+            fps = query.get('fps', [self.headers.get('X-Fps')])[0]
+            fps = float(fps) if fps else None
+            metrics = query.get('metrics', [None])[0]
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        # 캐시 적중은 풀을 거치지 않고 바로 응답
+        cache = get_result_cache()
+        key = heartrate.request_cache_key(post_data, fps) if cache is not None else None
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            cached["cached"] = True
+            self.server.count("cacheHits")
+            self.server.count("served")
+            self.send_json(200, cached)
+            return
+
+        if not self.server.try_admit():
+            self.send_json(429, {"error": "Server busy, retry later"}, {"Retry-After": "1"})
+            return
+
+        future = self.server.pool.submit(run_with_deadline, self.server.timeout * DEADLINE_SHARE,
+                                         heartrate.handle_request, post_data, fps, metrics, False)
+        # 슬롯은 시간 초과 여부와 관계없이 작업이 실제로 끝날 때 반납 (과부하 시 대기열이 계속 제한됨).
+        # 실행 중인 작업은 취소할 수 없으므로 작업 프로세스의 마감(run_with_deadline)이 작업을 끝냄
+        future.add_done_callback(self.server.release)
+        try:
+            result = future.result(timeout=self.server.timeout)
+        except (FutureTimeout, TimeoutError):
+            # 대기열에서 아직 시작하지 않은 작업만 취소됨
+            future.cancel()
+            self.server.count("timeouts")
+            self.send_json(504, {"error": f"Analysis timed out after {self.server.timeout} s"})
+            return
+        except ValueError as e:
+            self.server.count("errors")
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.server.count("errors")
+            self.send_json(400, {"error": f"Error processing frames: {str(e)}"})
+            return
+
+        if cache is not None and result.get("processed"):
+            cache.put(key, {k: v for k, v in result.items() if k != "metrics"})
+        result["cached"] = False
+        self.server.count("served")
+        self.send_json(200, result)
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}", file=sys.stderr)
+
+
+def _arg(argv, name, default):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+def main(argv):
+    workers = int(_arg(argv, "--workers", os.environ.get("RPPG_SERVER_WORKERS", os.cpu_count() or 1)))
+    server = RppgServer(
+        (_arg(argv, "--host", os.environ.get("RPPG_SERVER_HOST", "127.0.0.1")),
+         int(_arg(argv, "--port", os.environ.get("RPPG_SERVER_PORT", 8765)))),
+        workers=workers,
+        max_queue=int(_arg(argv, "--queue", os.environ.get("RPPG_SERVER_QUEUE", workers * 2))),
+        timeout=float(_arg(argv, "--timeout", os.environ.get("RPPG_SERVER_TIMEOUT", 10))),
+        max_body_bytes=int(float(os.environ.get("RPPG_SERVER_MAX_BODY_MB", 64)) * 1024 * 1024),
+    )
+    host, port = server.server_address[:2]
+    print(f"rPPG server listening on http://{host}:{port} ({workers} workers, queue {server.max_queue})",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Single-pass skin signal extractor for rPPG.
+Computes masked channel means and skin pixel counts for several facial sub-ROIs
+(forehead, left cheek, right cheek) without intermediate full-ROI copies.
+"""
+
+import cv2
+import numpy as np
+
+# 얼굴 박스 대비 상대 좌표 (x0, y0, x1, y1)
+DEFAULT_SUB_ROIS = {
+    "forehead": (0.25, 0.05, 0.75, 0.25),
+    "leftCheek": (0.15, 0.45, 0.40, 0.70),
+    "rightCheek": (0.60, 0.45, 0.85, 0.70),
+}
+
+# YCrCb 색상 공간의 피부색 범위
+SKIN_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+SKIN_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+
+
+class SkinSignalExtractor:
+    """
+    얼굴 ROI 안의 여러 하위 영역에서 피부 픽셀의 채널 평균을 한 번에 계산합니다.
+
+    YCrCb 변환과 마스크는 재사용 버퍼에 기록되며, 하위 영역은 뷰(slice)로만 접근하고
+    cv2.mean(..., mask)로 평균을 구하므로 bitwise_and/split 같은 중간 복사본이 생기지 않습니다.
+    버퍼를 재사용하므로 인스턴스를 스레드 간에 공유하면 안 됩니다.
+    """
+
+    def __init__(self, sub_rois=None, min_pixels=1000):
+        self.sub_rois = dict(sub_rois or DEFAULT_SUB_ROIS)
+        self.names = list(self.sub_rois)
+        self.min_pixels = min_pixels
+        self._ycrcb = None
+        self._mask = None
+
+    def extract(self, frame, roi):
+        """
+        BGR 프레임과 얼굴 박스 (x, y, w, h)에서 (means, counts, area)를 반환합니다.
+
+        means는 하위 영역별 RGB 평균 (n_rois, 3), counts는 피부 픽셀 수 (n_rois,),
+        area는 하위 영역 전체 픽셀 수입니다 (counts.sum() / area = 피부 비율).
+        전체 피부 픽셀이 min_pixels 미만이면 None을 반환합니다.
+        """
+        x, y, w, h = (int(v) for v in roi)
+        face = frame[max(0, y):y+h, max(0, x):x+w]
+        if face.size == 0:
+            return None
+
+        ycrcb, mask = self._buffers(face.shape)
+        cv2.cvtColor(face, cv2.COLOR_BGR2YCrCb, dst=ycrcb)
+        cv2.inRange(ycrcb, SKIN_LOWER, SKIN_UPPER, dst=mask)
+
+        fh, fw = face.shape[:2]
+        means = np.zeros((len(self.names), 3), dtype=np.float64)
+        counts = np.zeros(len(self.names), dtype=np.int64)
+        area = 0
+        for k, name in enumerate(self.names):
+            x0, y0, x1, y1 = self.sub_rois[name]
+            sub = (slice(int(y0 * fh), int(y1 * fh)), slice(int(x0 * fw), int(x1 * fw)))
+            sub_mask = mask[sub]
+            area += sub_mask.size
+            counts[k] = cv2.countNonZero(sub_mask)
+            if counts[k]:
+                b, g, r, _ = cv2.mean(face[sub], mask=sub_mask)
+                means[k] = (r, g, b)
+
+        if counts.sum() < self.min_pixels:
+            return None
+        return means, counts, area
+
+    def _buffers(self, shape):
+        h, w = shape[:2]
+        if self._mask is None or self._mask.shape != (h, w):
+            self._ycrcb = np.empty((h, w, 3), dtype=np.uint8)
+            self._mask = np.empty((h, w), dtype=np.uint8)
+        return self._ycrcb, self._mask
+
+
+def combine_roi_traces(means, counts):
+    """
+    (frames, n_rois, 3) 평균 배열을 피부 픽셀 수로 가중 평균하여 (frames, 3) RGB 트레이스로 합칩니다.
+    """
+    weights = counts.astype(np.float64)
+    total = weights.sum(axis=1, keepdims=True)
+    total[total == 0] = 1.0
+    return np.einsum('fr,frc->fc', weights, means) / total
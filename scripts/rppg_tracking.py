@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Face ROI tracker for rPPG extraction.
+Runs the Haar cascade on a downscaled frame every K frames (or when tracking is lost)
+and follows the ROI in between with normalized template matching.
+"""
+
+import cv2
+
+
+class FaceTracker:
+    """
+    한 번 감지한 얼굴 ROI를 템플릿 매칭으로 추적하여 매 프레임 하르 감지를 피합니다.
+
+    - detect_interval 프레임마다 축소된 그레이스케일 영상에서 다시 감지합니다.
+    - 추적 신뢰도(정규화 상관계수)가 min_confidence 아래로 떨어지면 즉시 재감지합니다.
+    - ROI 크기는 감지 시점에 고정되어 프레임 간 흔들림(jitter)이 줄어듭니다.
+    """
+
+    def __init__(self, face_cascade, detect_interval=10, detect_scale=0.5,
+                 min_confidence=0.6, search_margin=0.25):
+        self.face_cascade = face_cascade
+        self.detect_interval = max(1, int(detect_interval))
+        self.detect_scale = detect_scale
+        self.min_confidence = min_confidence
+        self.search_margin = search_margin
+        self.reset()
+
+    def reset(self):
+        self._roi = None          # 축소 좌표계의 (x, y, w, h)
+        self._template = None
+        self._since_detect = 0
+        self.frames = 0
+        self.detections = 0
+        self.redetections = 0
+        self.tracked_frames = 0
+
+    def update(self, gray):
+        """그레이스케일 프레임 하나를 처리하고 원본 좌표계의 (x, y, w, h) 또는 None을 반환합니다."""
+        self.frames += 1
+        small = cv2.resize(gray, None, fx=self.detect_scale, fy=self.detect_scale,
+                           interpolation=cv2.INTER_AREA)
+
+        roi = None
+        if self._roi is not None and self._since_detect + 1 < self.detect_interval:
+            roi = self._track(small)
+            if roi is None:
+                # 추적 실패 - 예정보다 일찍 재감지
+                self.redetections += 1
+            else:
+                self.tracked_frames += 1
+                self._since_detect += 1
+
+        if roi is None:
+            roi = self._detect(small)
+
+        if roi is None:
+            return None
+
+        x, y, w, h = roi
+        scale = 1.0 / self.detect_scale
+        return (int(x * scale), int(y * scale), int(w * scale), int(h * scale))
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "redetections": self.redetections,
+            "trackedFrames": self.tracked_frames,
+            "detectRate": self.detections / self.frames if self.frames else 0.0,
+        }
+
+    def _detect(self, small):
+        self.detections += 1
+        self._since_detect = 0
+        faces = self.face_cascade.detectMultiScale(small, 1.3, 5)
+
+        if len(faces) == 0:
+            self._roi = None
+            self._template = None
+            return None
+
+        # 가장 큰 얼굴 영역 선택
+        x, y, w, h = max(faces, key=lambda rect: rect[2] * rect[3])
+        self._roi = (int(x), int(y), int(w), int(h))
+        self._template = small[y:y+h, x:x+w].copy()
+        return self._roi
+
+    def _track(self, small):
+        x, y, w, h = self._roi
+        mx, my = int(w * self.search_margin), int(h * self.search_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(small.shape[1], x + w + mx), min(small.shape[0], y + h + my)
+
+        window = small[y0:y1, x0:x1]
+        if window.shape[0] < h or window.shape[1] < w:
+            return None
+
+        result = cv2.matchTemplate(window, self._template, cv2.TM_CCOEFF_NORMED)
+        _, confidence, _, (dx, dy) = cv2.minMaxLoc(result)
+        if confidence < self.min_confidence:
+            return None
+
+        self._roi = (x0 + dx, y0 + dy, w, h)
+        return self._roi